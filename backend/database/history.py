@@ -0,0 +1,401 @@
+"""
+Camera status history: daily partitions, retention and rollups.
+
+Raw samples live in camera_status_history (and per-snapshot vehicle counts in
+camera_vehicle_counts), range-partitioned by day so that retention is a cheap
+DROP TABLE per expired day instead of a large DELETE.
+Hourly and daily rollups are kept indefinitely and answer questions such as
+"how busy is this block on Tuesdays at 6pm" without touching raw rows.
+"""
+
+import os
+from datetime import datetime, time, timedelta, timezone
+from sqlalchemy import text
+from .models import Camera, CameraStatusHistory, CameraVehicleCount, STATUS_CODES
+
+# Days of raw samples to keep; rollups are not affected
+HISTORY_RETENTION_DAYS = int(os.getenv("HISTORY_RETENTION_DAYS", "30"))
+# Days of partitions to create ahead of time
+HISTORY_PARTITIONS_AHEAD = int(os.getenv("HISTORY_PARTITIONS_AHEAD", "3"))
+# Local timezone used for day-of-week / hour-of-day buckets
+HISTORY_TIMEZONE = "America/New_York"
+
+# Raw tables that share the daily partitioning and retention
+PARTITIONED_TABLES = ("camera_status_history", "camera_vehicle_counts")
+
+
+def partition_name(day, table="camera_status_history"):
+    return f"{table}_p{day:%Y%m%d}"
+
+
+def partition_bounds(day):
+    """UTC [start, end) range covered by the partition for a day."""
+    start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+def status_code(status):
+    """Encode a status name as its SMALLINT code (unrecognised -> unknown)."""
+    return STATUS_CODES.get(status, STATUS_CODES['unknown'])
+
+
+def default_partition(table):
+    return f"{table}_default"
+
+
+def _table_exists(session, name):
+    return session.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None
+
+
+def create_partition(session, table, day):
+    """
+    Create the partition for a day unless it exists. The caller commits.
+
+    Postgres refuses to create a partition for a range the default partition
+    already holds rows for, so rows that landed there (because this job did not
+    run in time) are moved into the new partition, which is then attached.
+    """
+    name = partition_name(day, table)
+    if _table_exists(session, name):
+        return
+    start, end = partition_bounds(day)
+    bounds = f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    default = default_partition(table)
+    day_range = {"start": start, "end": end}
+    # Blocks inserts into the default partition until the commit, so none can
+    # land in this day's range between the move and the attach
+    session.execute(text(f"LOCK TABLE {default} IN SHARE ROW EXCLUSIVE MODE"))
+    stranded = session.execute(text(
+        f"SELECT EXISTS (SELECT 1 FROM {default} WHERE recorded_at >= :start AND recorded_at < :end)"
+    ), day_range).scalar()
+    if not stranded:
+        session.execute(text(f"CREATE TABLE {name} PARTITION OF {table} {bounds}"))
+        return
+    session.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    session.execute(text(
+        f"WITH moved AS (DELETE FROM {default} WHERE recorded_at >= :start AND recorded_at < :end RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ), day_range)
+    session.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} {bounds}"))
+
+
+def ensure_partitions(session, today=None, ahead=HISTORY_PARTITIONS_AHEAD):
+    """Create daily partitions from today through `ahead` days in the future."""
+    today = today or datetime.now(timezone.utc).date()
+    created = []
+    for table in PARTITIONED_TABLES:
+        # Catch-all so inserts never fail if this job has not run for a while
+        session.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {default_partition(table)} "
+            f"PARTITION OF {table} DEFAULT"
+        ))
+        for offset in range(ahead + 1):
+            day = today + timedelta(days=offset)
+            create_partition(session, table, day)
+            created.append(partition_name(day, table))
+    session.commit()
+    return created
+
+
+def drop_expired_partitions(session, retention_days=HISTORY_RETENTION_DAYS, today=None):
+    """Drop raw partitions older than the retention window. Returns dropped names."""
+    today = today or datetime.now(timezone.utc).date()
+    expired = []
+    for table in PARTITIONED_TABLES:
+        cutoff = partition_name(today - timedelta(days=retention_days), table)
+        rows = session.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :table"
+        ), {"table": table}).scalars().all()
+
+        # Names sort chronologically because of the YYYYMMDD suffix
+        prefix = f"{table}_p"
+        expired.extend(sorted(name for name in rows if name.startswith(prefix) and name < cutoff))
+    for name in expired:
+        session.execute(text(f"DROP TABLE IF EXISTS {name}"))
+    session.commit()
+    return expired
+
+
+def purge_expired_default_rows(session, retention_days=HISTORY_RETENTION_DAYS, today=None):
+    """
+    Apply retention to the default partitions, which no DROP covers.
+
+    Returns:
+        Rows deleted.
+    """
+    today = today or datetime.now(timezone.utc).date()
+    cutoff, _ = partition_bounds(today - timedelta(days=retention_days))
+    purged = 0
+    for table in PARTITIONED_TABLES:
+        if _table_exists(session, default_partition(table)):
+            purged += session.execute(text(
+                f"DELETE FROM {default_partition(table)} WHERE recorded_at < :cutoff"
+            ), {"cutoff": cutoff}).rowcount
+    session.commit()
+    return purged
+
+
+def record_status(session, camera_key, status, recorded_at=None):
+    """Append one raw sample. The caller commits."""
+    session.add(CameraStatusHistory(
+        camera_key=camera_key,
+        status=status_code(status),
+        recorded_at=recorded_at or datetime.now(timezone.utc),
+    ))
+
+
+def camera_keys(session, camera_addresses):
+    """Map addresses to compact keys, creating camera rows that do not exist yet."""
+    keys = dict(
+        session.query(Camera.address, Camera.key)
+        .filter(Camera.address.in_(list(camera_addresses)))
+        .all()
+    )
+    missing = [address for address in camera_addresses if address not in keys]
+    for address in missing:
+        session.add(Camera(address=address, last_status='unknown'))
+    if missing:
+        session.flush()
+        keys.update(
+            session.query(Camera.address, Camera.key)
+            .filter(Camera.address.in_(missing))
+            .all()
+        )
+    return keys
+
+
+def record_samples(session, statuses, keys, recorded_at=None):
+    """
+    Bulk-append one sample per camera. The caller commits.
+
+    Args:
+        statuses: Mapping of camera address -> status name
+        keys: Mapping of camera address -> compact key (see camera_keys)
+    """
+    recorded_at = recorded_at or datetime.now(timezone.utc)
+    rows = [
+        {"camera_key": keys[address], "status": status_code(status), "recorded_at": recorded_at}
+        for address, status in statuses.items()
+        if address in keys
+    ]
+    if rows:
+        session.execute(CameraStatusHistory.__table__.insert(), rows)
+    return len(rows)
+
+
+def record_vehicle_counts(session, counts):
+    """
+    Bulk-append vehicle counts. The caller commits.
+
+    Args:
+        counts: Iterable of (camera_key, recorded_at, vehicle_count)
+    """
+    rows = [
+        {"camera_key": key, "recorded_at": recorded_at, "vehicle_count": min(count, 32767)}
+        for key, recorded_at, count in counts
+    ]
+    if rows:
+        session.execute(CameraVehicleCount.__table__.insert(), rows)
+    return len(rows)
+
+
+def load_count_baselines(session):
+    """All stored baseline bins as (address, dow, hour, samples, mean, variance)."""
+    return session.execute(text("""
+        SELECT c.address, b.dow, b.hour_of_day, b.samples, b.mean, b.variance
+        FROM camera_count_baselines b
+        JOIN cameras c ON c.key = b.camera_key
+    """)).all()
+
+
+def save_count_baselines(session, rows, keys):
+    """
+    Upsert baseline bins. The caller commits.
+
+    Args:
+        rows: Iterable of (address, dow, hour, samples, mean, variance)
+        keys: Mapping of camera address -> compact key (see camera_keys)
+    """
+    params = [
+        {"camera_key": keys[address], "dow": dow, "hour": hour,
+         "samples": samples, "mean": mean, "variance": variance}
+        for address, dow, hour, samples, mean, variance in rows
+        if address in keys
+    ]
+    if params:
+        session.execute(text("""
+            INSERT INTO camera_count_baselines (camera_key, dow, hour_of_day, samples, mean, variance)
+            VALUES (:camera_key, :dow, :hour, :samples, :mean, :variance)
+            ON CONFLICT (camera_key, dow, hour_of_day) DO UPDATE SET
+                samples = EXCLUDED.samples,
+                mean = EXCLUDED.mean,
+                variance = EXCLUDED.variance
+        """), params)
+    return len(params)
+
+
+def count_baseline(session, camera_address):
+    """
+    A camera's stored time-of-week profile and its latest vehicle count.
+
+    Returns:
+        (bins, latest): bins is a list of (dow, hour, samples, mean, variance);
+        latest is (recorded_at, vehicle_count) or None.
+    """
+    bins = session.execute(text("""
+        SELECT b.dow, b.hour_of_day, b.samples, b.mean, b.variance
+        FROM camera_count_baselines b
+        JOIN cameras c ON c.key = b.camera_key
+        WHERE c.address = :address
+        ORDER BY b.dow, b.hour_of_day
+    """), {"address": camera_address}).all()
+    latest = session.execute(text("""
+        SELECT v.recorded_at, v.vehicle_count
+        FROM camera_vehicle_counts v
+        JOIN cameras c ON c.key = v.camera_key
+        WHERE c.address = :address
+          AND v.recorded_at >= now() - interval '1 day'
+        ORDER BY v.recorded_at DESC
+        LIMIT 1
+    """), {"address": camera_address}).first()
+    return bins, latest
+
+
+def refresh_rollups(session, since=None):
+    """
+    Recompute hourly and daily rollups from `since` onwards.
+
+    Defaults to the start of the latest hourly bucket already rolled up, so
+    running this every few minutes only re-aggregates the current hour.
+    The upserts are idempotent, so overlapping runs are harmless.
+    """
+    if since is None:
+        latest = session.execute(text("SELECT max(bucket_start) FROM camera_status_hourly")).scalar()
+        since = latest or datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+    params = {
+        "since": since,
+        "tz": HISTORY_TIMEZONE,
+        "available": STATUS_CODES['available'],
+        "congested": STATUS_CODES['congested'],
+        "gridlock": STATUS_CODES['gridlock'],
+        "offline": STATUS_CODES['offline'],
+    }
+    session.execute(text("""
+        INSERT INTO camera_status_hourly
+            (camera_key, bucket_start, dow, hour_of_day, samples, available, congested, offline)
+        SELECT
+            camera_key,
+            date_trunc('hour', recorded_at) AS bucket_start,
+            extract(dow FROM date_trunc('hour', recorded_at) AT TIME ZONE :tz)::smallint,
+            extract(hour FROM date_trunc('hour', recorded_at) AT TIME ZONE :tz)::smallint,
+            count(*),
+            count(*) FILTER (WHERE status = :available),
+            count(*) FILTER (WHERE status IN (:congested, :gridlock)),
+            count(*) FILTER (WHERE status = :offline)
+        FROM camera_status_history
+        WHERE recorded_at >= date_trunc('hour', CAST(:since AS timestamptz))
+        GROUP BY camera_key, date_trunc('hour', recorded_at)
+        ON CONFLICT (camera_key, bucket_start) DO UPDATE SET
+            samples = EXCLUDED.samples,
+            available = EXCLUDED.available,
+            congested = EXCLUDED.congested,
+            offline = EXCLUDED.offline
+    """), params)
+
+    session.execute(text("""
+        INSERT INTO camera_status_daily
+            (camera_key, day, dow, samples, available, congested, offline)
+        SELECT
+            camera_key,
+            (bucket_start AT TIME ZONE :tz)::date AS local_day,
+            extract(dow FROM (bucket_start AT TIME ZONE :tz)::date)::smallint,
+            sum(samples), sum(available), sum(congested), sum(offline)
+        FROM camera_status_hourly
+        WHERE (bucket_start AT TIME ZONE :tz)::date >= (CAST(:since AS timestamptz) AT TIME ZONE :tz)::date
+        GROUP BY camera_key, local_day
+        ON CONFLICT (camera_key, day) DO UPDATE SET
+            samples = EXCLUDED.samples,
+            available = EXCLUDED.available,
+            congested = EXCLUDED.congested,
+            offline = EXCLUDED.offline
+    """), params)
+    session.commit()
+
+
+def busy_profile(session, camera_address, dow, hour_of_day, weeks=12):
+    """
+    How busy a camera usually is at a local day-of-week and hour.
+
+    Args:
+        dow: 0 = Sunday ... 6 = Saturday
+        hour_of_day: 0-23, local time
+        weeks: How many past weeks to average over
+
+    Returns:
+        dict with samples and the congested / available / offline ratios,
+        or None if there is no data.
+    """
+    row = session.execute(text("""
+        SELECT sum(h.samples), sum(h.available), sum(h.congested), sum(h.offline)
+        FROM camera_status_hourly h
+        JOIN cameras c ON c.key = h.camera_key
+        WHERE c.address = :address
+          AND h.dow = :dow
+          AND h.hour_of_day = :hour
+          AND h.bucket_start >= now() - make_interval(weeks => :weeks)
+    """), {"address": camera_address, "dow": dow, "hour": hour_of_day, "weeks": weeks}).one()
+
+    samples, available, congested, offline = row
+    if not samples:
+        return None
+    return {
+        "samples": int(samples),
+        "available_ratio": available / samples,
+        "congested_ratio": congested / samples,
+        "offline_ratio": offline / samples,
+    }
+
+
+def availability_by_camera(session, dow, hour_of_day, weeks=12):
+    """
+    Every camera's last status and how often it was available at a local
+    day-of-week and hour over the past weeks.
+
+    Returns:
+        List of (address, last_status, available_ratio); the ratio is None
+        for cameras without rolled-up samples for that hour.
+    """
+    return session.execute(text("""
+        SELECT c.address, c.last_status,
+               sum(h.available)::float / nullif(sum(h.samples), 0)
+        FROM cameras c
+        LEFT JOIN camera_status_hourly h
+          ON h.camera_key = c.key
+         AND h.dow = :dow
+         AND h.hour_of_day = :hour
+         AND h.bucket_start >= now() - make_interval(weeks => :weeks)
+        GROUP BY c.address, c.last_status
+    """), {"dow": dow, "hour": hour_of_day, "weeks": weeks}).all()
+
+
+def camera_key_for(session, camera_address):
+    """Look up (creating if needed) the compact key for a camera address."""
+    camera = session.query(Camera).filter_by(address=camera_address).first()
+    if camera is None:
+        camera = Camera(address=camera_address, last_status='unknown')
+        session.add(camera)
+        session.flush()
+    return camera.key
+
+
+def run_maintenance(session, today=None):
+    """Periodic job: create upcoming partitions, roll up, then apply retention."""
+    created = ensure_partitions(session, today=today)
+    refresh_rollups(session)
+    dropped = drop_expired_partitions(session, today=today)
+    purged = purge_expired_default_rows(session, today=today)
+    return {"partitions_ensured": created, "partitions_dropped": dropped, "default_rows_purged": purged}
@@ -0,0 +1,66 @@
+-- Migrate camera_status_history to the compact, day-partitioned layout.
+-- Run once against databases created before the cameras.key column existed:
+--   psql "$DATABASE_URL" -f database/migrations/001_partitioned_status_history.sql
+-- Afterwards run scripts/maintain_history.py to create partitions and rollups.
+
+BEGIN;
+
+ALTER TABLE cameras ADD COLUMN IF NOT EXISTS key SMALLINT GENERATED BY DEFAULT AS IDENTITY;
+ALTER TABLE cameras ADD CONSTRAINT cameras_key_key UNIQUE (key);
+ALTER TABLE cameras ALTER COLUMN key SET NOT NULL;
+
+ALTER TABLE camera_status_history RENAME TO camera_status_history_legacy;
+
+CREATE TABLE camera_status_history (
+    camera_key SMALLINT NOT NULL REFERENCES cameras(key) ON DELETE CASCADE,
+    recorded_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    status SMALLINT NOT NULL,
+    PRIMARY KEY (camera_key, recorded_at)
+) PARTITION BY RANGE (recorded_at);
+
+CREATE TABLE camera_status_history_default PARTITION OF camera_status_history DEFAULT;
+
+CREATE TABLE IF NOT EXISTS camera_status_hourly (
+    camera_key SMALLINT NOT NULL REFERENCES cameras(key) ON DELETE CASCADE,
+    bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+    dow SMALLINT NOT NULL,
+    hour_of_day SMALLINT NOT NULL,
+    samples INTEGER NOT NULL DEFAULT 0,
+    available INTEGER NOT NULL DEFAULT 0,
+    congested INTEGER NOT NULL DEFAULT 0,
+    offline INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (camera_key, bucket_start)
+);
+
+CREATE TABLE IF NOT EXISTS camera_status_daily (
+    camera_key SMALLINT NOT NULL REFERENCES cameras(key) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    dow SMALLINT NOT NULL,
+    samples INTEGER NOT NULL DEFAULT 0,
+    available INTEGER NOT NULL DEFAULT 0,
+    congested INTEGER NOT NULL DEFAULT 0,
+    offline INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (camera_key, day)
+);
+
+CREATE INDEX IF NOT EXISTS idx_status_hourly_time_of_week
+    ON camera_status_hourly(camera_key, dow, hour_of_day);
+
+-- Old rows land in the default partition; rollups pick them up on the first run
+INSERT INTO camera_status_history (camera_key, recorded_at, status)
+SELECT c.key,
+       h.recorded_at,
+       CASE h.status
+           WHEN 'available' THEN 1
+           WHEN 'congested' THEN 2
+           WHEN 'offline' THEN 3
+           ELSE 0
+       END
+FROM camera_status_history_legacy h
+JOIN cameras c ON c.address = h.camera_address
+WHERE h.recorded_at IS NOT NULL
+ON CONFLICT DO NOTHING;
+
+DROP TABLE camera_status_history_legacy;
+
+COMMIT;
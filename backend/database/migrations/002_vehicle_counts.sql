@@ -0,0 +1,16 @@
+-- Add the per-snapshot vehicle count table used by helpers/vehicle_counter.py.
+--   psql "$DATABASE_URL" -f database/migrations/002_vehicle_counts.sql
+-- Daily partitions are then created by scripts/maintain_history.py.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS camera_vehicle_counts (
+    camera_key SMALLINT NOT NULL REFERENCES cameras(key) ON DELETE CASCADE,
+    recorded_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    vehicle_count SMALLINT NOT NULL,
+    PRIMARY KEY (camera_key, recorded_at)
+) PARTITION BY RANGE (recorded_at);
+
+CREATE TABLE IF NOT EXISTS camera_vehicle_counts_default PARTITION OF camera_vehicle_counts DEFAULT;
+
+COMMIT;
@@ -0,0 +1,16 @@
+-- Add the time-of-week vehicle count baselines used by helpers/baseline.py.
+--   psql "$DATABASE_URL" -f database/migrations/003_count_baselines.sql
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS camera_count_baselines (
+    camera_key SMALLINT NOT NULL REFERENCES cameras(key) ON DELETE CASCADE,
+    dow SMALLINT NOT NULL,
+    hour_of_day SMALLINT NOT NULL,
+    samples INTEGER NOT NULL DEFAULT 0,
+    mean DOUBLE PRECISION NOT NULL DEFAULT 0,
+    variance DOUBLE PRECISION NOT NULL DEFAULT 0,
+    PRIMARY KEY (camera_key, dow, hour_of_day)
+);
+
+COMMIT;
@@ -1,20 +1,30 @@
-from datetime import datetime
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, DateTime, ForeignKey, CheckConstraint
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import create_engine, Column, Integer, SmallInteger, String, Boolean, DateTime, Date, Float, ForeignKey, CheckConstraint, Identity, Index
 from sqlalchemy.orm import relationship, sessionmaker
 from sqlalchemy.sql import func
 from .db import Base
 
+# Compact encoding for camera statuses stored in history tables
+STATUS_CODES = {
+    'unknown': 0,
+    'available': 1,
+    'congested': 2,
+    'offline': 3,
+    'gridlock': 4,
+}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+
 class Camera(Base):
     __tablename__ = 'cameras'
     
     address = Column(String(255), primary_key=True)
+    # Small surrogate key used by the (large) history and rollup tables
+    key = Column(SmallInteger, Identity(), unique=True, nullable=False)
     last_status = Column(String(50), default='unknown')
     last_checked = Column(DateTime(timezone=True), nullable=True)
     
     # Relationships
     watchers = relationship('Watcher', back_populates='camera', cascade='all, delete-orphan')
-    status_history = relationship('CameraStatusHistory', back_populates='camera', cascade='all, delete-orphan')
+    status_history = relationship('CameraStatusHistory', back_populates='camera', passive_deletes=True, lazy='dynamic')
 
 class Watcher(Base):
     __tablename__ = 'watchers'
@@ -25,7 +35,7 @@ class Watcher(Base):
     notification_interval = Column(Integer, nullable=False)
     expires_at = Column(DateTime(timezone=True), nullable=False)
     is_connected = Column(Boolean, default=False)
-    created_at = Column(DateTime(timezone=True), server_default='CURRENT_TIMESTAMP')
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     camera = relationship('Camera', back_populates='watchers')
@@ -44,15 +54,85 @@ class Watcher(Base):
     )
 
 class CameraStatusHistory(Base):
+    """
+    Raw status samples, range-partitioned by day on recorded_at.
+    
+    Partitions are created ahead of time and dropped after the retention
+    period by database.history; queries over long ranges should use the
+    rollup tables below instead.
+    """
     __tablename__ = 'camera_status_history'
     
-    id = Column(Integer, primary_key=True)
-    camera_address = Column(String(255), ForeignKey('cameras.address'))
-    status = Column(String(50), nullable=False)
-    recorded_at = Column(DateTime(timezone=True), server_default='CURRENT_TIMESTAMP')
+    camera_key = Column(SmallInteger, ForeignKey('cameras.key', ondelete='CASCADE'), primary_key=True)
+    recorded_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
+    status = Column(SmallInteger, nullable=False)
     
     # Relationships
     camera = relationship('Camera', back_populates='status_history')
+    
+    __table_args__ = {'postgresql_partition_by': 'RANGE (recorded_at)'}
+
+class CameraVehicleCount(Base):
+    """
+    Vehicles detected per snapshot, partitioned by day like camera_status_history.
+    
+    Written in batches by helpers.vehicle_counter; retention is shared with the
+    status history.
+    """
+    __tablename__ = 'camera_vehicle_counts'
+    
+    camera_key = Column(SmallInteger, ForeignKey('cameras.key', ondelete='CASCADE'), primary_key=True)
+    recorded_at = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
+    vehicle_count = Column(SmallInteger, nullable=False)
+    
+    __table_args__ = {'postgresql_partition_by': 'RANGE (recorded_at)'}
+
+class CameraStatusHourly(Base):
+    """Hourly rollup of camera_status_history, indexed for time-of-week lookups."""
+    __tablename__ = 'camera_status_hourly'
+    
+    camera_key = Column(SmallInteger, ForeignKey('cameras.key', ondelete='CASCADE'), primary_key=True)
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    # Local (America/New_York) day of week, 0 = Sunday, and hour of day
+    dow = Column(SmallInteger, nullable=False)
+    hour_of_day = Column(SmallInteger, nullable=False)
+    samples = Column(Integer, nullable=False, default=0)
+    available = Column(Integer, nullable=False, default=0)
+    congested = Column(Integer, nullable=False, default=0)
+    offline = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        Index('idx_status_hourly_time_of_week', 'camera_key', 'dow', 'hour_of_day'),
+    )
+
+class CameraStatusDaily(Base):
+    """Daily rollup built from the hourly table."""
+    __tablename__ = 'camera_status_daily'
+    
+    camera_key = Column(SmallInteger, ForeignKey('cameras.key', ondelete='CASCADE'), primary_key=True)
+    day = Column(Date, primary_key=True)
+    dow = Column(SmallInteger, nullable=False)
+    samples = Column(Integer, nullable=False, default=0)
+    available = Column(Integer, nullable=False, default=0)
+    congested = Column(Integer, nullable=False, default=0)
+    offline = Column(Integer, nullable=False, default=0)
+
+class CameraCountBaseline(Base):
+    """
+    Typical vehicle count per camera and local hour of week.
+    
+    Maintained incrementally by helpers.baseline (running mean/variance) and
+    upserted periodically; never rebuilt from camera_vehicle_counts.
+    """
+    __tablename__ = 'camera_count_baselines'
+    
+    camera_key = Column(SmallInteger, ForeignKey('cameras.key', ondelete='CASCADE'), primary_key=True)
+    # Local (America/New_York) day of week, 0 = Sunday, and hour of day
+    dow = Column(SmallInteger, primary_key=True)
+    hour_of_day = Column(SmallInteger, primary_key=True)
+    samples = Column(Integer, nullable=False, default=0)
+    mean = Column(Float, nullable=False, default=0)
+    variance = Column(Float, nullable=False, default=0)
 
 # Database connection
 def init_db(database_url):
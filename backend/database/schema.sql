@@ -1,6 +1,7 @@
 -- Cameras table stores basic camera info and current status
 CREATE TABLE cameras (
     address VARCHAR(255) PRIMARY KEY,
+    key SMALLINT GENERATED BY DEFAULT AS IDENTITY UNIQUE NOT NULL,  -- compact key for history tables
     last_status VARCHAR(50) DEFAULT 'unknown',
     last_checked TIMESTAMP WITH TIME ZONE DEFAULT NULL
 );
@@ -17,16 +18,66 @@ CREATE TABLE watchers (
     UNIQUE(camera_address, client_id)  -- Prevent duplicate watches
 );
 
--- Optional: Camera status history
+-- Camera status history, one table per UTC day (see database/history.py).
+-- status is a SMALLINT code: 0 unknown, 1 available, 2 congested, 3 offline, 4 gridlock
 CREATE TABLE camera_status_history (
-    id SERIAL PRIMARY KEY,
-    camera_address VARCHAR(255) REFERENCES cameras(address),
-    status VARCHAR(50) NOT NULL,
-    recorded_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    camera_key SMALLINT NOT NULL REFERENCES cameras(key) ON DELETE CASCADE,
+    recorded_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    status SMALLINT NOT NULL,
+    PRIMARY KEY (camera_key, recorded_at)
+) PARTITION BY RANGE (recorded_at);
+
+-- Catches rows if maintenance has not created the day's partition yet
+CREATE TABLE camera_status_history_default PARTITION OF camera_status_history DEFAULT;
+
+-- Vehicles detected per snapshot (helpers/vehicle_counter.py), partitioned like the history
+CREATE TABLE camera_vehicle_counts (
+    camera_key SMALLINT NOT NULL REFERENCES cameras(key) ON DELETE CASCADE,
+    recorded_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    vehicle_count SMALLINT NOT NULL,
+    PRIMARY KEY (camera_key, recorded_at)
+) PARTITION BY RANGE (recorded_at);
+
+CREATE TABLE camera_vehicle_counts_default PARTITION OF camera_vehicle_counts DEFAULT;
+
+-- Hourly rollup, kept indefinitely; dow/hour_of_day are America/New_York local time
+CREATE TABLE camera_status_hourly (
+    camera_key SMALLINT NOT NULL REFERENCES cameras(key) ON DELETE CASCADE,
+    bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+    dow SMALLINT NOT NULL,
+    hour_of_day SMALLINT NOT NULL,
+    samples INTEGER NOT NULL DEFAULT 0,
+    available INTEGER NOT NULL DEFAULT 0,
+    congested INTEGER NOT NULL DEFAULT 0,
+    offline INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (camera_key, bucket_start)
+);
+
+-- Daily rollup built from the hourly table
+CREATE TABLE camera_status_daily (
+    camera_key SMALLINT NOT NULL REFERENCES cameras(key) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    dow SMALLINT NOT NULL,
+    samples INTEGER NOT NULL DEFAULT 0,
+    available INTEGER NOT NULL DEFAULT 0,
+    congested INTEGER NOT NULL DEFAULT 0,
+    offline INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (camera_key, day)
+);
+
+-- Typical vehicle count per camera and local hour of week (helpers/baseline.py)
+CREATE TABLE camera_count_baselines (
+    camera_key SMALLINT NOT NULL REFERENCES cameras(key) ON DELETE CASCADE,
+    dow SMALLINT NOT NULL,
+    hour_of_day SMALLINT NOT NULL,
+    samples INTEGER NOT NULL DEFAULT 0,
+    mean DOUBLE PRECISION NOT NULL DEFAULT 0,
+    variance DOUBLE PRECISION NOT NULL DEFAULT 0,
+    PRIMARY KEY (camera_key, dow, hour_of_day)
 );
 
 -- Index for faster expiration checks
 CREATE INDEX idx_watchers_expires_at ON watchers(expires_at);
 
--- Index for status history queries
-CREATE INDEX idx_status_history_camera_time ON camera_status_history(camera_address, recorded_at); 
\ No newline at end of file
+-- Index for "typical status on this day of week at this hour" queries
+CREATE INDEX idx_status_hourly_time_of_week ON camera_status_hourly(camera_key, dow, hour_of_day);
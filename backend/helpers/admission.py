@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+from flask import current_app, g, has_request_context, jsonify, request
+
+# Image requests worked on at once per process, and how many more may wait
+ADMISSION_IMAGE_CONCURRENCY = int(os.getenv("ADMISSION_IMAGE_CONCURRENCY", "8"))
+ADMISSION_IMAGE_QUEUE = int(os.getenv("ADMISSION_IMAGE_QUEUE", "16"))
+# Longest a request waits for a slot before it is shed
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2"))
+# Seconds an image request may take in total, queueing included
+ADMISSION_IMAGE_BUDGET = float(os.getenv("ADMISSION_IMAGE_BUDGET", "10"))
+# Retry-After sent with 503 responses
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "2"))
+
+
+class RouteGate:
+    """Concurrency limit with a bounded, time-limited wait queue."""
+
+    def __init__(self, concurrency, queue, budget, degrade=False):
+        self.concurrency = concurrency
+        self.queue = queue
+        self.budget = budget
+        self.degrade = degrade
+        self.active = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout):
+        """Take a slot, waiting up to timeout. False when the queue is full or the wait times out."""
+        with self._cond:
+            if self.active < self.concurrency:
+                self.active += 1
+                return True
+            if self.waiting >= self.queue:
+                return False
+            self.waiting += 1
+            try:
+                if not self._cond.wait_for(lambda: self.active < self.concurrency, timeout):
+                    return False
+                self.active += 1
+                return True
+            finally:
+                self.waiting -= 1
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+
+def admission(concurrency, queue, budget, degrade=False):
+    """
+    Admission control for a view. Apply below the route decorator:
+
+        @bp.post("/thing")
+        @admission(8, 16, budget=10, degrade=True)
+        def thing(): ...
+
+    Args:
+        concurrency: Requests handled at once (per process)
+        queue: Requests allowed to wait for a slot
+        budget: Seconds the whole request may take; see time_left()
+        degrade: When shed, serve from cached images only instead of a 503
+    """
+    def decorator(view):
+        view.admission = RouteGate(concurrency, queue, budget, degrade)
+        return view
+    return decorator
+
+
+def time_left(default):
+    """Seconds left in the current request's budget, or `default` outside a gated request."""
+    if has_request_context() and "deadline" in g:
+        return max(0.0, g.deadline - time.monotonic())
+    return default
+
+
+def cached_only():
+    """True when the current request was shed to cached-only images."""
+    return has_request_context() and g.get("cached_only", False)
+
+
+class AdmissionControl:
+    """
+    Hooks enforcing each view's @admission.
+
+    A request first waits (bounded by the queue length and
+    ADMISSION_QUEUE_TIMEOUT) for a slot. If it cannot get one it is shed at
+    once: a 503 with Retry-After, or for degrade views a cached-only response
+    that does no upstream or image work. Admitted requests get a deadline of
+    arrival + budget that the fetch and transcode stages honour.
+    """
+
+    def init_app(self, app):
+        app.before_request(self.admit)
+        app.after_request(self.mark_degraded)
+        app.teardown_request(self.release)
+
+    @staticmethod
+    def admit():
+        if request.endpoint is None:
+            return None
+        gate = getattr(current_app.view_functions.get(request.endpoint), "admission", None)
+        if gate is None:
+            return None
+        arrived = time.monotonic()
+        if gate.acquire(min(ADMISSION_QUEUE_TIMEOUT, gate.budget)):
+            g.admission_gate = gate
+            g.deadline = arrived + gate.budget
+            return None
+        if gate.degrade:
+            print(f"[INFO] Shedding {request.path} to cached images ({gate.active} active, {gate.waiting} waiting)")
+            g.cached_only = True
+            return None
+        print(f"[INFO] Shedding {request.path} with 503 ({gate.active} active, {gate.waiting} waiting)")
+        response = jsonify(error="Server busy, try again shortly")
+        response.status_code = 503
+        response.headers["Retry-After"] = str(ADMISSION_RETRY_AFTER)
+        return response
+
+    @staticmethod
+    def mark_degraded(response):
+        if g.get("cached_only", False):
+            response.headers["X-Degraded"] = "cached-only"
+        return response
+
+    @staticmethod
+    def release(exc=None):
+        gate = g.pop("admission_gate", None)
+        if gate is not None:
+            gate.release()
@@ -0,0 +1,200 @@
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+import numpy as np
+
+# Samples before a time-of-week bin is trusted for scoring
+BASELINE_MIN_SAMPLES = int(os.getenv("BASELINE_MIN_SAMPLES", "8"))
+# Cap on the effective sample count; past it the statistics become an
+# exponential moving average so the baseline follows slow seasonal drift
+BASELINE_MAX_SAMPLES = int(os.getenv("BASELINE_MAX_SAMPLES", "240"))
+# Standard deviation floor (vehicles) so near-constant bins do not explode scores
+BASELINE_MIN_STD = float(os.getenv("BASELINE_MIN_STD", "1.0"))
+# Seconds between writes of changed bins to camera_count_baselines
+BASELINE_FLUSH_SECONDS = float(os.getenv("BASELINE_FLUSH_SECONDS", "300"))
+# A score older than this is stale and not used by the status engine
+BASELINE_SCORE_MAX_AGE = float(os.getenv("BASELINE_SCORE_MAX_AGE", "180"))
+
+# Same local time as the history rollups (database.history.HISTORY_TIMEZONE)
+BASELINE_TIMEZONE = ZoneInfo("America/New_York")
+WEEK_BINS = 7 * 24
+
+
+def time_of_week(when):
+    """
+    Map a timestamp to its local (dow, hour_of_day), dow 0 = Sunday.
+
+    Args:
+        when: Aware datetime or epoch seconds
+    """
+    if not isinstance(when, datetime):
+        when = datetime.fromtimestamp(when, timezone.utc)
+    local = when.astimezone(BASELINE_TIMEZONE)
+    return (local.weekday() + 1) % 7, local.hour
+
+
+class TimeOfWeekBaseline:
+    """
+    Streaming per-camera, per-hour-of-week vehicle count statistics.
+
+    Each camera has 168 bins holding a sample count, mean and variance that
+    are updated incrementally (Welford) as counts arrive, so nothing is ever
+    recomputed from raw history. Once a bin has max_samples samples the same
+    update becomes an exponential moving average.
+
+    update() also remembers each camera's latest anomaly score, making
+    anomaly() an O(1) lookup for the status engine.
+    """
+
+    def __init__(self, min_samples=BASELINE_MIN_SAMPLES, max_samples=BASELINE_MAX_SAMPLES,
+                 min_std=BASELINE_MIN_STD, clock=time.time):
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self.min_std = min_std
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._index = {}
+        self._samples = np.zeros((0, WEEK_BINS), dtype=np.int32)
+        self._mean = np.zeros((0, WEEK_BINS), dtype=np.float64)
+        self._variance = np.zeros((0, WEEK_BINS), dtype=np.float64)
+        self._latest = {}
+        self._dirty = set()
+
+    def _slot(self, camera_address):
+        slot = self._index.get(camera_address)
+        if slot is None:
+            slot = len(self._index)
+            self._index[camera_address] = slot
+            if slot >= len(self._samples):
+                # Grow geometrically so adding cameras stays amortised O(1)
+                grow = max(16, len(self._samples))
+                self._samples = np.vstack([self._samples, np.zeros((grow, WEEK_BINS), dtype=np.int32)])
+                self._mean = np.vstack([self._mean, np.zeros((grow, WEEK_BINS))])
+                self._variance = np.vstack([self._variance, np.zeros((grow, WEEK_BINS))])
+        return slot
+
+    def _score(self, slot, bin_index, value):
+        if self._samples[slot, bin_index] < self.min_samples:
+            return None
+        std = max(np.sqrt(self._variance[slot, bin_index]), self.min_std)
+        return float((value - self._mean[slot, bin_index]) / std)
+
+    def score(self, camera_address, value, when):
+        """Standard score of a count against its time-of-week bin, or None if too few samples."""
+        slot = self._index.get(camera_address)
+        if slot is None:
+            return None
+        dow, hour = time_of_week(when)
+        with self._lock:
+            return self._score(slot, dow * 24 + hour, value)
+
+    def update(self, camera_address, value, when):
+        """
+        Score a new count against the baseline, then fold it in.
+
+        Returns:
+            The anomaly score from before the update (None while the bin is warming up).
+        """
+        dow, hour = time_of_week(when)
+        bin_index = dow * 24 + hour
+        with self._lock:
+            slot = self._slot(camera_address)
+            score = self._score(slot, bin_index, value)
+
+            n = min(self._samples[slot, bin_index] + 1, self.max_samples)
+            delta = value - self._mean[slot, bin_index]
+            self._mean[slot, bin_index] += delta / n
+            self._variance[slot, bin_index] += (delta * (value - self._mean[slot, bin_index])
+                                                - self._variance[slot, bin_index]) / n
+            self._samples[slot, bin_index] = n
+            self._dirty.add((camera_address, dow, hour))
+            self._latest[camera_address] = (score, self._clock())
+        return score
+
+    def anomaly(self, camera_address, max_age=BASELINE_SCORE_MAX_AGE):
+        """Latest anomaly score for a camera, or None if unknown or stale."""
+        latest = self._latest.get(camera_address)
+        if latest is None or latest[0] is None or self._clock() - latest[1] > max_age:
+            return None
+        return latest[0]
+
+    def bin(self, camera_address, dow, hour):
+        """(samples, mean, variance) for one bin."""
+        slot = self._index.get(camera_address)
+        if slot is None:
+            return 0, 0.0, 0.0
+        i = dow * 24 + hour
+        return int(self._samples[slot, i]), float(self._mean[slot, i]), float(self._variance[slot, i])
+
+    def load(self, rows):
+        """Seed from stored bins: iterable of (address, dow, hour, samples, mean, variance)."""
+        with self._lock:
+            for camera_address, dow, hour, samples, mean, variance in rows:
+                slot = self._slot(camera_address)
+                i = dow * 24 + hour
+                self._samples[slot, i] = samples
+                self._mean[slot, i] = mean
+                self._variance[slot, i] = variance
+
+    def drain_dirty(self):
+        """Bins changed since the last call, as (address, dow, hour, samples, mean, variance)."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            return [(address, dow, hour) + self.bin(address, dow, hour) for address, dow, hour in dirty]
+
+
+class BaselineRecorder:
+    """
+    Vehicle-counter handler that feeds counts into a TimeOfWeekBaseline and
+    periodically upserts the changed bins so the API can serve them.
+    """
+
+    def __init__(self, baseline, session_factory=None, flush_interval=BASELINE_FLUSH_SECONDS):
+        if session_factory is None:
+            from database.db import SessionLocal
+            session_factory = SessionLocal
+        self.baseline = baseline
+        self._session_factory = session_factory
+        self.flush_interval = flush_interval
+        self._last_flush = time.monotonic()
+        self._keys = {}
+
+    def load(self):
+        """Restore the baseline from the database (call once at startup)."""
+        from database.history import load_count_baselines
+        db = self._session_factory()
+        try:
+            rows = load_count_baselines(db)
+        finally:
+            db.close()
+        self.baseline.load(rows)
+        return len(rows)
+
+    def __call__(self, results):
+        for camera_address, captured_at, boxes in results:
+            self.baseline.update(camera_address, len(boxes), captured_at)
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        from database.history import camera_keys, save_count_baselines
+        self._last_flush = time.monotonic()
+        rows = self.baseline.drain_dirty()
+        if not rows:
+            return 0
+        db = self._session_factory()
+        try:
+            missing = list({address for address, *_ in rows if address not in self._keys})
+            if missing:
+                self._keys.update(camera_keys(db, missing))
+            saved = save_count_baselines(db, rows, self._keys)
+            db.commit()
+            return saved
+        except Exception as e:
+            db.rollback()
+            print(f"[ERROR] Failed to save count baselines: {e}")
+            return 0
+        finally:
+            db.close()
@@ -0,0 +1,45 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Upper bound on concurrent blocking (database) calls made from the WebSocket server.
+# Keep it at or below the SQLAlchemy pool size + overflow.
+DB_WORKER_POOL_SIZE = int(os.getenv("DB_WORKER_POOL_SIZE", "8"))
+
+
+class BlockingWorkPool:
+    """
+    Bounded pool of real OS threads for blocking calls such as SQLAlchemy queries.
+
+    Under gevent/eventlet a blocking psycopg2 call would stall every green
+    connection in the process, so the work is handed to native threads and the
+    calling greenlet waits cooperatively. In threading mode it is a plain
+    ThreadPoolExecutor, which still caps how many handlers hit the database at once.
+    """
+
+    def __init__(self, async_mode="threading", max_workers=DB_WORKER_POOL_SIZE):
+        self.async_mode = async_mode
+        self.max_workers = max_workers
+        if async_mode == "gevent":
+            from gevent.threadpool import ThreadPool
+            self._pool = ThreadPool(max_workers)
+        elif async_mode == "eventlet":
+            from eventlet import tpool
+            # eventlet's native thread pool is sized globally
+            os.environ.setdefault("EVENTLET_THREADPOOL_SIZE", str(max_workers))
+            self._pool = tpool
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db-worker")
+
+    def run(self, fn, *args, **kwargs):
+        """Run fn in the pool and wait for its result without blocking other connections."""
+        if self.async_mode == "gevent":
+            return self._pool.apply(fn, args, kwargs)
+        if self.async_mode == "eventlet":
+            return self._pool.execute(fn, *args, **kwargs)
+        return self._pool.submit(fn, *args, **kwargs).result()
+
+    def shutdown(self):
+        if self.async_mode == "gevent":
+            self._pool.kill()
+        elif self.async_mode == "threading":
+            self._pool.shutdown(wait=True)
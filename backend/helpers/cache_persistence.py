@@ -0,0 +1,150 @@
+import gzip
+import json
+import os
+import threading
+import time
+
+# File the hot caches are saved to and restored from; empty disables persistence
+CACHE_SNAPSHOT_PATH = os.getenv("CACHE_SNAPSHOT_PATH", "cache_snapshot.json.gz")
+# Seconds between periodic saves, so a crash loses at most this much
+CACHE_SNAPSHOT_INTERVAL = float(os.getenv("CACHE_SNAPSHOT_INTERVAL", "60"))
+
+SNAPSHOT_VERSION = 2
+
+_caches = {}    # name -> (dump, load)
+# One save at a time: they share the temporary file
+_save_lock = threading.Lock()
+
+
+def persistent_cache(name, dump, load):
+    """
+    Include a cache in the saved snapshot.
+
+    Args:
+        name: Key of the cache in the snapshot file
+        dump: callable() -> JSON-serialisable entries
+        load: callable(entries, elapsed) restoring them, elapsed being the
+            seconds since they were saved; returns how many were kept
+    """
+    _caches[name] = (dump, load)
+
+
+def _read_snapshot(path):
+    """Parsed snapshot file, or None if it is missing, unreadable or of another version."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with gzip.open(path, "rb") as f:
+            snapshot = json.loads(f.read())
+    except (OSError, EOFError, ValueError) as e:
+        print(f"[ERROR] Ignoring unreadable cache snapshot {path}: {e}")
+        return None
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        return None
+    return snapshot
+
+
+def _cache_saved_at(snapshot, name):
+    return snapshot.get("cache_saved_at", {}).get(name, snapshot["saved_at"])
+
+
+def save_caches(path=CACHE_SNAPSHOT_PATH, merge=False):
+    """
+    Write every registered cache to path. Returns entries written per cache.
+
+    Args:
+        merge: Keep the caches already in the file that this process has not
+            registered (with their original save time), instead of dropping
+            them. For tools that share the server's snapshot.
+    """
+    if not path:
+        return {}
+    with _save_lock:
+        return _save_caches(path, merge)
+
+
+def _save_caches(path, merge):
+    now = time.time()
+    caches = {}
+    saved_at = {}
+    for name, (dump, _) in list(_caches.items()):
+        try:
+            caches[name] = dump()
+            saved_at[name] = now
+        except Exception as e:
+            print(f"[ERROR] Could not save cache {name}: {e}")
+    previous = _read_snapshot(path) if merge else None
+    if previous is not None:
+        for name, entries in previous["caches"].items():
+            if name not in caches:
+                caches[name] = entries
+                saved_at[name] = _cache_saved_at(previous, name)
+    data = json.dumps({"version": SNAPSHOT_VERSION, "saved_at": now, "cache_saved_at": saved_at,
+                       "caches": caches}, separators=(",", ":")).encode()
+    # Write then rename so a crash mid-save never leaves a truncated snapshot
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with gzip.open(tmp_path, "wb", compresslevel=5) as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return {name: len(entries) for name, entries in caches.items()}
+
+
+def restore_caches(path=CACHE_SNAPSHOT_PATH, now=None):
+    """
+    Reload the caches saved in path, dropping entries that expired while the
+    process was down. A missing, stale-format or corrupt file restores nothing.
+
+    Returns:
+        Entries restored per cache.
+    """
+    snapshot = _read_snapshot(path)
+    if snapshot is None:
+        return {}
+
+    now = now or time.time()
+    restored = {}
+    for name, entries in snapshot["caches"].items():
+        if name not in _caches:
+            continue
+        elapsed = max(0.0, now - _cache_saved_at(snapshot, name))
+        try:
+            restored[name] = _caches[name][1](entries, elapsed)
+        except Exception as e:
+            print(f"[ERROR] Could not restore cache {name}: {e}")
+    print(f"[INFO] Restored caches saved {max(0.0, now - snapshot['saved_at']):.0f}s ago: {restored}")
+    return restored
+
+
+class CacheSaver:
+    """Background thread saving the caches every CACHE_SNAPSHOT_INTERVAL seconds."""
+
+    def __init__(self, path=CACHE_SNAPSHOT_PATH, interval=CACHE_SNAPSHOT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Start saving (idempotent)."""
+        if self._thread is None and self.path:
+            self._thread = threading.Thread(target=self._run, name="cache-saver", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the thread and save one last time, after any save in progress."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.save()
+
+    def save(self):
+        if not self.path:
+            return
+        try:
+            save_caches(self.path)
+        except Exception as e:
+            print(f"[ERROR] Cache snapshot failed: {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.save()
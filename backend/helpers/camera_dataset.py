@@ -0,0 +1,277 @@
+import bisect
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import threading
+import uuid
+from collections.abc import Mapping
+
+CAMERA_DATA_FILE = "camera_id_lat_lng_wiped.json"
+# Compiled form of CAMERA_DATA_FILE (scripts/build_camera_dataset.py)
+CAMERA_DATASET_PATH = os.getenv("CAMERA_DATASET_PATH", "camera_dataset.bin")
+
+# --- File format -----------------------------------------------------------
+#
+# Little-endian, every section 8-byte aligned, cameras sorted by the UTF-8
+# bytes of their address so lookups are a binary search over the file:
+#
+#   header      magic, version, camera count, grid cell count, cell size (km)
+#   sections    offsets of each section below, plus the end of the file
+#   latitude    float64[count], NaN when unknown
+#   longitude   float64[count]
+#   camera_ids  16-byte UUID[count]
+#   name_index  uint32[count + 1], offsets of each address in names
+#   names       UTF-8 addresses, back to back
+#   cell_keys   int64[cells], packed (x, y) grid cell of CameraIndex, sorted
+#   cell_start  uint32[cells + 1], where each cell's cameras begin in members
+#   members     uint32[located cameras], rows grouped by cell
+
+MAGIC = b"PSCD"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIId")
+SECTIONS = ("latitude", "longitude", "camera_ids", "name_index", "names",
+            "cell_keys", "cell_start", "members", "end")
+SECTION_TABLE = struct.Struct(f"<{len(SECTIONS)}Q")
+
+
+def cell_key(cell):
+    """Pack a CameraIndex grid cell (x, y) into one sortable int64."""
+    x, y = cell
+    return (x << 32) | (y & 0xFFFFFFFF)
+
+
+def _align(data):
+    data.extend(b"\0" * (-len(data) % 8))
+
+
+def build_dataset(camera_data, path, cell_km=0.5):
+    """
+    Compile camera data ({address: {camera_id, latitude, longitude}}) into
+    the binary format at path. Only the fields the server uses are kept.
+
+    Raises:
+        ValueError: If a camera_id is not a UUID.
+
+    Returns:
+        Number of cameras written.
+    """
+    from helpers.camera_index import CameraIndex
+
+    addresses = sorted(camera_data, key=lambda address: address.encode())
+    rows = {address: row for row, address in enumerate(addresses)}
+    index = CameraIndex(camera_data, cell_km=cell_km)
+    cells = sorted(index._grid.items(), key=lambda item: cell_key(item[0]))
+
+    names = b"".join(address.encode() for address in addresses)
+    name_index = [0]
+    for address in addresses:
+        name_index.append(name_index[-1] + len(address.encode()))
+    cell_start = [0]
+    members = []
+    for _, cell_addresses in cells:
+        members.extend(rows[address] for address in cell_addresses)
+        cell_start.append(len(members))
+
+    def coordinate(address, field):
+        value = camera_data[address].get(field)
+        return math.nan if value is None else float(value)
+
+    sections = {
+        "latitude": struct.pack(f"<{len(addresses)}d", *(coordinate(a, "latitude") for a in addresses)),
+        "longitude": struct.pack(f"<{len(addresses)}d", *(coordinate(a, "longitude") for a in addresses)),
+        "camera_ids": b"".join(uuid.UUID(camera_data[a]["camera_id"]).bytes for a in addresses),
+        "name_index": struct.pack(f"<{len(name_index)}I", *name_index),
+        "names": names,
+        "cell_keys": struct.pack(f"<{len(cells)}q", *(cell_key(cell) for cell, _ in cells)),
+        "cell_start": struct.pack(f"<{len(cell_start)}I", *cell_start),
+        "members": struct.pack(f"<{len(members)}I", *members),
+    }
+
+    data = bytearray(HEADER.size + SECTION_TABLE.size)
+    offsets = []
+    for name in SECTIONS[:-1]:
+        _align(data)
+        offsets.append(len(data))
+        data.extend(sections[name])
+    _align(data)
+    offsets.append(len(data))
+    HEADER.pack_into(data, 0, MAGIC, VERSION, 0, len(addresses), len(cells), cell_km)
+    SECTION_TABLE.pack_into(data, HEADER.size, *offsets)
+
+    # Write then rename so running servers never map a half-written file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return len(addresses)
+
+
+class CameraDataset(Mapping):
+    """
+    Read-only view of a compiled camera dataset, memory-mapped so every
+    worker process shares one copy through the page cache. Opening it parses
+    nothing; lookups read the mapped arrays directly.
+
+    Behaves like the JSON dict it was built from: dataset[address] returns
+    {"camera_id", "latitude", "longitude"}.
+
+    Raises:
+        ValueError: If the file is not a dataset of this version.
+    """
+
+    def __init__(self, path):
+        if sys.byteorder != "little":
+            raise ValueError("camera datasets are little-endian")
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < HEADER.size + SECTION_TABLE.size:
+            raise ValueError(f"{path} is not a camera dataset")
+        magic, version, _, self.count, self.cells, self.cell_km = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} camera dataset")
+        offsets = dict(zip(SECTIONS, SECTION_TABLE.unpack_from(self._map, HEADER.size)))
+        if offsets["end"] != len(self._map):
+            raise ValueError(f"{path} is truncated")
+        view = memoryview(self._map)
+
+        def section(name, fmt=None):
+            start = offsets[name]
+            end = offsets[SECTIONS[SECTIONS.index(name) + 1]]
+            part = view[start:end]
+            return part.cast(fmt) if fmt else part
+
+        self._lat = section("latitude", "d")[:self.count]
+        self._lng = section("longitude", "d")[:self.count]
+        self._ids = section("camera_ids")
+        self._name_index = section("name_index", "I")[:self.count + 1]
+        self._names = section("names")
+        self._cell_keys = section("cell_keys", "q")[:self.cells]
+        self._cell_start = section("cell_start", "I")[:self.cells + 1]
+        self._members = section("members", "I")[:self._cell_start[self.cells]]
+        self.grid = _MappedGrid(self)
+        self.points = _MappedPoints(self)
+
+    def address(self, row):
+        return bytes(self._names[self._name_index[row]:self._name_index[row + 1]]).decode()
+
+    def row(self, address):
+        """Row of an address, or None. Binary search over the sorted names."""
+        target = address.encode()
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            name = bytes(self._names[self._name_index[mid]:self._name_index[mid + 1]])
+            if name == target:
+                return mid
+            if name < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def location(self, row):
+        """(lat, lng) of a row, or None if it has no coordinates."""
+        lat, lng = self._lat[row], self._lng[row]
+        return None if math.isnan(lat) or math.isnan(lng) else (lat, lng)
+
+    def details(self, row):
+        location = self.location(row) or (None, None)
+        return {
+            "camera_id": str(uuid.UUID(bytes=bytes(self._ids[row * 16:row * 16 + 16]))),
+            "latitude": location[0],
+            "longitude": location[1],
+        }
+
+    def __getitem__(self, address):
+        row = self.row(address) if isinstance(address, str) else None
+        if row is None:
+            raise KeyError(address)
+        return self.details(row)
+
+    def __contains__(self, address):
+        return isinstance(address, str) and self.row(address) is not None
+
+    def __iter__(self):
+        return (self.address(row) for row in range(self.count))
+
+    def __len__(self):
+        return self.count
+
+    def cell(self, cell):
+        """Addresses in a CameraIndex grid cell."""
+        position = bisect.bisect_left(self._cell_keys, cell_key(cell))
+        if position == self.cells or self._cell_keys[position] != cell_key(cell):
+            return []
+        return [self.address(self._members[i])
+                for i in range(self._cell_start[position], self._cell_start[position + 1])]
+
+
+# The two adapters below memoise what they have decoded, so hot cells cost a
+# dict lookup while cameras nobody asks about are never read out of the file.
+
+class _MappedGrid:
+    """CameraIndex._grid backed by the dataset's cell section."""
+
+    def __init__(self, dataset):
+        self._dataset = dataset
+        self._cells = {}
+
+    def get(self, cell, default=()):
+        addresses = self._cells.get(cell)
+        if addresses is None:
+            addresses = self._cells[cell] = self._dataset.cell(cell)
+        return addresses or default
+
+
+class _MappedPoints:
+    """CameraIndex._points backed by the dataset's coordinate arrays."""
+
+    def __init__(self, dataset):
+        self._dataset = dataset
+        self._points = {}
+
+    def __getitem__(self, address):
+        point = self._points.get(address)
+        if point is None:
+            from helpers.camera_index import project
+            row = self._dataset.row(address)
+            location = None if row is None else self._dataset.location(row)
+            if location is None:
+                raise KeyError(address)
+            point = self._points[address] = project(*location)
+        return point
+
+
+def load_cameras(json_path=CAMERA_DATA_FILE, dataset_path=CAMERA_DATASET_PATH):
+    """
+    Camera data as a mapping of address -> details: the compiled dataset when
+    it exists and is at least as new as the JSON, otherwise the parsed JSON.
+    """
+    if dataset_path and os.path.exists(dataset_path):
+        if os.path.exists(json_path) and os.path.getmtime(json_path) > os.path.getmtime(dataset_path):
+            print(f"[WARNING] {dataset_path} is older than {json_path}; "
+                  f"run scripts/build_camera_dataset.py. Using the JSON for now")
+        else:
+            try:
+                return CameraDataset(dataset_path)
+            except (OSError, ValueError) as e:
+                print(f"[ERROR] Could not open {dataset_path}, using {json_path}: {e}")
+    with open(json_path, "r") as f:
+        return json.load(f)
+
+
+_cameras = None
+_cameras_lock = threading.Lock()
+
+
+def get_cameras():
+    """Process-wide camera data (see load_cameras), loaded on first use."""
+    global _cameras
+    if _cameras is None:
+        with _cameras_lock:
+            if _cameras is None:
+                _cameras = load_cameras()
+    return _cameras
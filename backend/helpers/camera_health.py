@@ -0,0 +1,182 @@
+import os
+import threading
+import time
+
+# Consecutive failures that open a camera's circuit
+CAMERA_BREAKER_FAILURES = int(os.getenv("CAMERA_BREAKER_FAILURES", "3"))
+# Also open when the success rate (EWMA) falls below this after enough samples
+CAMERA_BREAKER_MIN_SUCCESS = float(os.getenv("CAMERA_BREAKER_MIN_SUCCESS", "0.5"))
+CAMERA_BREAKER_MIN_SAMPLES = 10
+# Seconds an open circuit waits before a background probe; doubles after each
+# failed probe up to the maximum
+CAMERA_BREAKER_COOLDOWN = float(os.getenv("CAMERA_BREAKER_COOLDOWN", "60"))
+CAMERA_BREAKER_MAX_COOLDOWN = float(os.getenv("CAMERA_BREAKER_MAX_COOLDOWN", "900"))
+# Seconds between prober passes, and most cameras probed per pass
+CAMERA_PROBE_INTERVAL = float(os.getenv("CAMERA_PROBE_INTERVAL", "5"))
+CAMERA_PROBES_PER_PASS = int(os.getenv("CAMERA_PROBES_PER_PASS", "8"))
+
+# EWMA weights for latency and success rate
+LATENCY_ALPHA = 0.2
+SUCCESS_ALPHA = 0.1
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CameraHealth:
+    """Rolling health of one camera."""
+
+    __slots__ = ("state", "latency", "success_rate", "samples", "failures", "cooldown", "retry_at")
+
+    def __init__(self):
+        self.state = CLOSED
+        self.latency = None        # EWMA seconds of successful fetches
+        self.success_rate = 1.0
+        self.samples = 0
+        self.failures = 0          # consecutive
+        self.cooldown = CAMERA_BREAKER_COOLDOWN
+        self.retry_at = 0.0
+
+
+class CameraBreaker:
+    """
+    Per-camera circuit breaker for NYCTMC snapshot fetches.
+
+    Every fetch result updates the camera's EWMA latency and success rate.
+    A camera that keeps failing is opened: allow() returns False for it, so
+    user requests skip it without any network call. Open cameras are never
+    retried from the request path; a background prober moves them to half-open
+    once their cool-down has passed and probes them, closing the circuit on
+    success or reopening it with a doubled cool-down on failure.
+
+    Args:
+        probe: callable(camera_id) -> bool, a fetch that bypasses the breaker
+    """
+
+    def __init__(self, probe=None, failures=CAMERA_BREAKER_FAILURES, min_success=CAMERA_BREAKER_MIN_SUCCESS,
+                 cooldown=CAMERA_BREAKER_COOLDOWN, max_cooldown=CAMERA_BREAKER_MAX_COOLDOWN,
+                 clock=time.monotonic):
+        self.probe = probe
+        self.failures = failures
+        self.min_success = min_success
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._health = {}
+        self._thread = None
+        self._stop = threading.Event()
+
+    def allow(self, camera_id):
+        """Whether the request path may call this camera now. Lock-free."""
+        health = self._health.get(camera_id)
+        return health is None or health.state == CLOSED
+
+    def latency(self, camera_id):
+        """EWMA latency in seconds, or None before the first success."""
+        health = self._health.get(camera_id)
+        return None if health is None else health.latency
+
+    def health(self, camera_id):
+        return self._health.get(camera_id)
+
+    def record(self, camera_id, ok, latency):
+        """Fold one fetch result into the camera's health; may open or close its circuit."""
+        now = self._clock()
+        with self._lock:
+            health = self._health.get(camera_id)
+            if health is None:
+                health = self._health[camera_id] = CameraHealth()
+            health.samples += 1
+            health.success_rate += SUCCESS_ALPHA * ((1.0 if ok else 0.0) - health.success_rate)
+            if ok:
+                health.latency = latency if health.latency is None else (
+                    health.latency + LATENCY_ALPHA * (latency - health.latency))
+                health.failures = 0
+                # Only a probe closes the circuit; late results of fetches
+                # started before it opened do not
+                if health.state == HALF_OPEN:
+                    print(f"[INFO] Camera {camera_id} recovered, closing circuit")
+                    health.state = CLOSED
+                    health.cooldown = self.cooldown
+                    # Start over so old failures do not reopen it at once
+                    health.success_rate = 1.0
+                    health.samples = 1
+                return
+
+            health.failures += 1
+            if health.state == HALF_OPEN:
+                # Failed probe: back off further
+                health.cooldown = min(health.cooldown * 2, self.max_cooldown)
+                self._open(camera_id, health, now)
+            elif health.state == CLOSED and (
+                    health.failures >= self.failures
+                    or (health.samples >= CAMERA_BREAKER_MIN_SAMPLES and health.success_rate < self.min_success)):
+                self._open(camera_id, health, now)
+
+    def _open(self, camera_id, health, now):
+        health.state = OPEN
+        health.retry_at = now + health.cooldown
+        print(f"[INFO] Camera {camera_id} failing, circuit open for {health.cooldown:.0f}s")
+
+    def due_probes(self, limit=CAMERA_PROBES_PER_PASS):
+        """Move up to `limit` open cameras past their cool-down to half-open and return them."""
+        now = self._clock()
+        due = []
+        with self._lock:
+            for camera_id, health in self._health.items():
+                if health.state == OPEN and health.retry_at <= now:
+                    health.state = HALF_OPEN
+                    due.append(camera_id)
+                    if len(due) >= limit:
+                        break
+        return due
+
+    def probe_once(self):
+        """Probe every camera that is due. Returns how many were probed."""
+        due = self.due_probes()
+        for camera_id in due:
+            start = self._clock()
+            try:
+                ok = bool(self.probe(camera_id))
+            except Exception as e:
+                print(f"[ERROR] Probe failed for camera {camera_id}: {e}")
+                ok = False
+            self.record(camera_id, ok, self._clock() - start)
+        return len(due)
+
+    def start(self):
+        """Start the background prober (idempotent)."""
+        if self._thread is None and self.probe is not None:
+            self._thread = threading.Thread(target=self._run, name="camera-prober", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(CAMERA_PROBE_INTERVAL):
+            try:
+                self.probe_once()
+            except Exception as e:
+                print(f"[ERROR] Camera probe pass failed: {e}")
+
+
+_breaker = None
+_breaker_lock = threading.Lock()
+
+
+def get_camera_breaker():
+    """Process-wide CameraBreaker, with its prober started on first use."""
+    global _breaker
+    if _breaker is None:
+        with _breaker_lock:
+            if _breaker is None:
+                from helpers.fetch_image import probe_camera
+                from helpers.shutdown import on_shutdown
+                breaker = CameraBreaker(probe=probe_camera)
+                breaker.start()
+                on_shutdown(breaker.stop, name="camera prober")
+                _breaker = breaker
+    return _breaker
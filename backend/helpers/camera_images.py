@@ -0,0 +1,337 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from flask import Response, request, stream_with_context
+from helpers.admission import cached_only, time_left
+from helpers.camera_health import get_camera_breaker
+from helpers.cache_persistence import persistent_cache
+from helpers.fetch_image import CAMERA_FETCH_TIMEOUT, dump_frames, fetch_camera_frame, last_frame_digest, load_frames
+from helpers.shutdown import on_shutdown
+
+# Threads shared by all streaming requests for fetching camera snapshots
+STREAM_FETCH_WORKERS = int(os.getenv("STREAM_FETCH_WORKERS", "16"))
+
+# Content-addressed snapshot files, kept this long after they were last served
+SNAPSHOT_DIR = os.path.join("static", "snapshots")
+SNAPSHOT_TTL_SECONDS = int(os.getenv("SNAPSHOT_TTL_SECONDS", "300"))
+# Seconds between sweeps of expired snapshot files
+SNAPSHOT_CLEANUP_INTERVAL = 30
+
+# Seconds a request waits for its images; whatever is ready by then is returned
+CAMERA_FETCH_DEADLINE = float(os.getenv("CAMERA_FETCH_DEADLINE", "8"))
+# A fetch slower than this percentile of recent fetches gets a hedged duplicate
+CAMERA_HEDGE_PERCENTILE = float(os.getenv("CAMERA_HEDGE_PERCENTILE", "90"))
+# Hedge delay bounds, and the delay used until enough fetches have been timed
+HEDGE_MIN_SECONDS = 0.25
+HEDGE_DEFAULT_SECONDS = 1.5
+HEDGE_MIN_SAMPLES = 20
+
+STREAM_FORMATS = ("ndjson", "sse")
+
+_executor = ThreadPoolExecutor(max_workers=STREAM_FETCH_WORKERS, thread_name_prefix="camera-fetch")
+_cleanup_lock = threading.Lock()
+_last_cleanup = 0.0
+_latencies = deque(maxlen=256)
+# digest -> time.time() it was last returned. Kept apart from the file's mtime,
+# which is its Last-Modified and must stay the time the image was written
+_served = {}
+
+
+def snapshot_path(digest):
+    return os.path.join(SNAPSHOT_DIR, f"{digest}.jpg")
+
+
+def _load_frames(entries, elapsed):
+    # A frame is only worth restoring while its snapshot file has not been swept
+    return load_frames(entries, keep=lambda digest: os.path.exists(snapshot_path(digest)))
+
+
+persistent_cache("frames", dump_frames, _load_frames)
+
+
+def _finish_fetches():
+    # Let running fetches complete their write-then-rename (each is bounded by
+    # CAMERA_FETCH_TIMEOUT) and drop the queued ones
+    _executor.shutdown(wait=True, cancel_futures=True)
+
+
+on_shutdown(_finish_fetches, name="camera fetches")
+
+
+def mark_served(digest, now=None):
+    _served[digest] = now or time.time()
+
+
+def cleanup_old_snapshots(now=None):
+    """Delete snapshot files not written or served for SNAPSHOT_TTL_SECONDS (at most every 30s)."""
+    global _last_cleanup
+    now = now or time.time()
+    with _cleanup_lock:
+        if now - _last_cleanup < SNAPSHOT_CLEANUP_INTERVAL:
+            return 0
+        _last_cleanup = now
+    removed = 0
+    if os.path.isdir(SNAPSHOT_DIR):
+        for name in os.listdir(SNAPSHOT_DIR):
+            path = os.path.join(SNAPSHOT_DIR, name)
+            digest = name.split(".")[0]
+            try:
+                if now - max(os.path.getmtime(path), _served.get(digest, 0)) > SNAPSHOT_TTL_SECONDS:
+                    os.remove(path)
+                    _served.pop(digest, None)
+                    removed += 1
+            except OSError as e:
+                print(f"Failed to cleanup snapshot {path}: {e}")
+    return removed
+
+
+def save_camera_image(addr, camera_id, stamp, base_url, end=None):
+    """
+    Fetch one camera snapshot into the content-addressed snapshot cache.
+
+    Files are named by the hash of the JPEG we serve, so an unchanged frame
+    maps to the same URL for every request and can be cached as immutable.
+
+    Args:
+        end: Optional time.monotonic() deadline; no fetch or transcode starts after it
+
+    Returns:
+        {"address", "url"} or None if the camera returned nothing usable.
+    """
+    try:
+        timeout = CAMERA_FETCH_TIMEOUT
+        if end is not None:
+            timeout = min(timeout, end - time.monotonic())
+            if timeout <= 0:
+                return None
+        frame = fetch_camera_frame(camera_id, stamp, timeout)
+        if frame is None:
+            print(f"[ERROR] No image returned for {addr}")
+            return None
+        if frame.offline:
+            print(f"[INFO] Camera {addr} is showing a placeholder, skipping")
+            return None
+        if end is not None and time.monotonic() >= end:
+            # Nobody is waiting for this image any more
+            return None
+
+        digest = frame.digest()
+        path = snapshot_path(digest)
+        mark_served(digest)
+        if not os.path.exists(path):
+            os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+            # Write then rename so a concurrent reader never sees a partial file
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                # Unchanged frames reuse the JPEG encoded for the previous fetch
+                f.write(frame.jpeg())
+            os.replace(tmp_path, path)
+
+        return {
+            "address": addr,
+            "url": f"{base_url}/snapshots/{digest}.jpg"
+        }
+    except Exception as e:
+        print(f"[ERROR] Failed for {addr}: {e}")
+        return None
+
+
+def _timed_save(addr, camera_id, stamp, base_url, end):
+    start = time.monotonic()
+    result = save_camera_image(addr, camera_id, stamp, base_url, end)
+    if result is not None:
+        _latencies.append(time.monotonic() - start)
+    return result
+
+
+def hedge_delay():
+    """Seconds after which a fetch is a straggler: the recent CAMERA_HEDGE_PERCENTILE latency."""
+    samples = sorted(_latencies)
+    if len(samples) < HEDGE_MIN_SAMPLES:
+        return HEDGE_DEFAULT_SECONDS
+    index = min(len(samples) - 1, int(len(samples) * CAMERA_HEDGE_PERCENTILE / 100))
+    return max(HEDGE_MIN_SECONDS, samples[index])
+
+
+def cached_camera_images(candidates, numCams, base_url):
+    """
+    Images for the first numCams candidates that already have a snapshot on
+    disk, without any upstream request or image work. Used when shedding load.
+    """
+    output = []
+    for addr, camera_id in candidates:
+        digest = last_frame_digest(camera_id)
+        if digest is None or not os.path.exists(snapshot_path(digest)):
+            continue
+        mark_served(digest)
+        output.append({"address": addr, "url": f"{base_url}/snapshots/{digest}.jpg"})
+        if len(output) >= numCams:
+            break
+    return output
+
+
+def iter_camera_images(candidates, numCams, stamp, base_url, deadline=None):
+    """
+    Fetch images for the first numCams usable cameras of a candidate list,
+    yielding each as soon as it is ready.
+
+    The candidates are a queue, best first. numCams fetches start at once;
+    every failed fetch is replaced by the next candidate, and a fetch still
+    running past hedge_delay() gets one duplicate request, whichever answers
+    first winning. Cameras whose circuit is open are skipped. Stops after
+    numCams images, when candidates run out, or at the deadline.
+
+    Requests shed by admission control get cached_camera_images() instead.
+
+    Args:
+        candidates: Sequence of (address, camera_id) in preference order
+        deadline: Seconds from now to give up on outstanding fetches; default
+            is what is left of the request's budget, at most CAMERA_FETCH_DEADLINE
+
+    Yields:
+        (rank, {"address", "url"}) in completion order, rank being the
+        candidate's position so callers can restore preference order.
+    """
+    if cached_only():
+        yield from enumerate(cached_camera_images(candidates, numCams, base_url))
+        return
+    if deadline is None:
+        deadline = min(CAMERA_FETCH_DEADLINE, time_left(CAMERA_FETCH_DEADLINE))
+    end = time.monotonic() + deadline
+    breaker = get_camera_breaker()
+    queue = ((rank, addr, camera_id) for rank, (addr, camera_id) in enumerate(candidates)
+             if breaker.allow(camera_id))
+    pending = {}      # future -> (rank, addr, camera_id, started)
+    hedged = set()
+    finished = set()
+    returned = 0
+
+    def launch(rank, addr, camera_id):
+        future = _executor.submit(_timed_save, addr, camera_id, stamp, base_url, end)
+        pending[future] = (rank, addr, camera_id, time.monotonic())
+
+    def fill():
+        # The losing copy of a won hedge is still pending but holds no slot
+        active = {rank for rank, *_ in pending.values() if rank not in finished}
+        while len(active) < numCams - returned:
+            candidate = next(queue, None)
+            if candidate is None:
+                return
+            launch(*candidate)
+            active.add(candidate[0])
+
+    try:
+        fill()
+        while pending:
+            now = time.monotonic()
+            if now >= end:
+                print(f"[INFO] Camera fetch deadline reached with {returned}/{numCams} images")
+                return
+            threshold = hedge_delay()
+            wake = end
+            for rank, _, _, started in pending.values():
+                if rank not in hedged:
+                    wake = min(wake, started + threshold)
+
+            done, _ = wait(list(pending), timeout=max(0.0, wake - now), return_when=FIRST_COMPLETED)
+            for future in done:
+                rank = pending.pop(future)[0]
+                if rank in finished:
+                    continue
+                result = future.result()
+                if result is not None:
+                    finished.add(rank)
+                    returned += 1
+                    yield rank, result
+                    if returned >= numCams:
+                        return
+                elif not any(other == rank for other, *_ in pending.values()):
+                    # Every copy of this camera failed; fill() backfills it
+                    finished.add(rank)
+
+            # Duplicate the stragglers once each
+            now = time.monotonic()
+            for rank, addr, camera_id, started in list(pending.values()):
+                if rank not in hedged and rank not in finished and now - started >= threshold:
+                    hedged.add(rank)
+                    launch(rank, addr, camera_id)
+            fill()
+    finally:
+        # Nobody will read these: do not start fetches that have not begun
+        for future in pending:
+            future.cancel()
+
+
+def fetch_camera_images(candidates, numCams, stamp, base_url, deadline=None):
+    """Up to numCams images from the candidate queue (see iter_camera_images), in candidate order."""
+    results = sorted(iter_camera_images(candidates, numCams, stamp, base_url, deadline), key=lambda item: item[0])
+    return [result for _, result in results]
+
+
+def requested_stream_format(data):
+    """
+    Streaming format asked for by the request, or None for a plain JSON response.
+
+    Either the body's "stream" field ("ndjson" / "sse") or an Accept header of
+    application/x-ndjson / text/event-stream selects streaming.
+
+    Raises:
+        ValueError: If "stream" names an unknown format.
+    """
+    stream = data.get("stream")
+    if stream:
+        if stream not in STREAM_FORMATS:
+            raise ValueError(f"stream must be one of: {', '.join(STREAM_FORMATS)}")
+        return stream
+    accept = request.headers.get("Accept", "")
+    if "application/x-ndjson" in accept:
+        return "ndjson"
+    if "text/event-stream" in accept:
+        return "sse"
+    return None
+
+
+def _encode(fmt, kind, payload):
+    if fmt == "sse":
+        return f"event: {kind}\ndata: {json.dumps(payload)}\n\n"
+    return json.dumps({"type": kind, **payload}) + "\n"
+
+
+def stream_camera_images(fmt, candidates, numCams, stamp, base_url):
+    """
+    Stream camera images as each fetch completes, then a summary record.
+
+    NDJSON lines carry {"type": "camera", "address", "url"} and finally
+    {"type": "summary", "requested", "returned", "elapsed_ms"}; with SSE the
+    same payloads are sent as "camera" and "summary" events.
+
+    Args:
+        candidates: List of (address, camera_id), fetched as in iter_camera_images
+    """
+    start = time.time()
+    images = iter_camera_images(candidates, numCams, stamp, base_url)
+
+    def generate():
+        returned = 0
+        try:
+            for _, result in images:
+                returned += 1
+                yield _encode(fmt, "camera", result)
+            yield _encode(fmt, "summary", {
+                "requested": numCams,
+                "returned": returned,
+                "elapsed_ms": round((time.time() - start) * 1000),
+            })
+        finally:
+            # Client went away: cancel fetches nobody will read
+            images.close()
+
+    mimetype = "text/event-stream" if fmt == "sse" else "application/x-ndjson"
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    response.headers["Cache-Control"] = "no-cache"
+    # Stop reverse proxies from buffering the stream
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,164 @@
+import math
+import threading
+
+# Equirectangular projection around NYC: accurate to well under 1% across the city
+_ORIGIN_LAT = 40.7128
+_KM_PER_DEG_LAT = 110.574
+_KM_PER_DEG_LNG = 111.320 * math.cos(math.radians(_ORIGIN_LAT))
+
+# Cameras nearby() returns: enough to rank and to backfill ones that fail
+NEARBY_CAMERA_LIMIT = 24
+
+
+def project(lat, lng):
+    """Latitude/longitude to planar (x, y) km."""
+    return lng * _KM_PER_DEG_LNG, lat * _KM_PER_DEG_LAT
+
+
+class CameraIndex:
+    """
+    Uniform grid over camera positions in projected km.
+
+    Each cell holds the cameras inside it, so a query only looks at the cells
+    its search area overlaps instead of every camera.
+    """
+
+    def __init__(self, camera_data, cell_km=0.5):
+        self.cell_km = cell_km
+        self.cameras = {}
+        self._points = {}
+        self._grid = {}
+        for address, details in camera_data.items():
+            lat, lng = details.get('latitude'), details.get('longitude')
+            if lat is None or lng is None:
+                continue
+            point = project(lat, lng)
+            self.cameras[address] = details
+            self._points[address] = point
+            self._grid.setdefault(self._cell(point), []).append(address)
+
+    @classmethod
+    def from_dataset(cls, dataset):
+        """
+        Index over a compiled CameraDataset, using its prebuilt grid in place:
+        nothing is copied out of the memory-mapped file.
+        """
+        index = cls.__new__(cls)
+        index.cell_km = dataset.cell_km
+        index.cameras = dataset
+        index._points = dataset.points
+        index._grid = dataset.grid
+        return index
+
+    def _cell(self, point):
+        return int(math.floor(point[0] / self.cell_km)), int(math.floor(point[1] / self.cell_km))
+
+    def _candidates(self, min_x, min_y, max_x, max_y):
+        x0, y0 = self._cell((min_x, min_y))
+        x1, y1 = self._cell((max_x, max_y))
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                yield from self._grid.get((cx, cy), ())
+
+    def nearest(self, lat, lng, limit, radius_km=7):
+        """
+        Up to `limit` cameras closest to a point, within radius_km.
+
+        Grid cells are visited in rings of growing size around the point;
+        once every camera still unvisited must be farther away than the
+        limit-th closest found so far, the search stops.
+
+        Returns:
+            List of (address, distance_km) sorted by distance.
+        """
+        px, py = project(lat, lng)
+        cx, cy = self._cell((px, py))
+        max_ring = int(math.ceil(radius_km / self.cell_km)) + 1
+        found = []
+        for ring in range(max_ring + 1):
+            for gx in range(cx - ring, cx + ring + 1):
+                for gy in range(cy - ring, cy + ring + 1):
+                    if max(abs(gx - cx), abs(gy - cy)) != ring:
+                        continue
+                    for address in self._grid.get((gx, gy), ()):
+                        x, y = self._points[address]
+                        distance = math.hypot(x - px, y - py)
+                        if distance <= radius_km:
+                            found.append((address, distance))
+            found.sort(key=lambda item: item[1])
+            # Anything outside this ring is at least `ring` whole cells away
+            if len(found) >= limit and found[limit - 1][1] <= ring * self.cell_km:
+                break
+        return found[:limit]
+
+    def nearby(self, lat, lng, limit=NEARBY_CAMERA_LIMIT, radius_km=7):
+        """
+        nearest() with each camera's details.
+
+        Returns:
+            Dict of address -> {camera_id, latitude, longitude, distance (km)},
+            closest first.
+        """
+        return {address: dict(self.cameras[address], distance=distance)
+                for address, distance in self.nearest(lat, lng, limit, radius_km)}
+
+    def along_route(self, waypoints, corridor_km):
+        """
+        Cameras within corridor_km of a polyline, in the order they are passed.
+
+        Every segment is checked only against cameras in grid cells overlapping
+        its bounding box grown by the corridor, so the cost grows with route
+        length rather than with (segments x cameras).
+
+        Args:
+            waypoints: Sequence of (lat, lng), at least two
+            corridor_km: Maximum distance from the route
+
+        Returns:
+            List of (address, distance_km, along_km) sorted by along_km, where
+            along_km is how far along the route the camera's closest point is.
+        """
+        points = [project(lat, lng) for lat, lng in waypoints]
+        best = {}
+        travelled = 0.0
+        for (ax, ay), (bx, by) in zip(points, points[1:]):
+            dx, dy = bx - ax, by - ay
+            length_sq = dx * dx + dy * dy
+            length = math.sqrt(length_sq)
+            for address in self._candidates(min(ax, bx) - corridor_km, min(ay, by) - corridor_km,
+                                            max(ax, bx) + corridor_km, max(ay, by) + corridor_km):
+                px, py = self._points[address]
+                t = 0.0 if length_sq == 0 else max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length_sq))
+                distance = math.hypot(px - (ax + t * dx), py - (ay + t * dy))
+                if distance <= corridor_km:
+                    previous = best.get(address)
+                    if previous is None or distance < previous[0]:
+                        best[address] = (distance, travelled + t * length)
+            travelled += length
+
+        return sorted(
+            ((address, distance, along) for address, (distance, along) in best.items()),
+            key=lambda item: item[2],
+        )
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_camera_index():
+    """
+    Process-wide index over the camera data, built on first use. With a
+    compiled dataset (scripts/build_camera_dataset.py) this is instant.
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                from helpers.camera_dataset import CameraDataset, get_cameras
+                cameras = get_cameras()
+                if isinstance(cameras, CameraDataset):
+                    _index = CameraIndex.from_dataset(cameras)
+                else:
+                    _index = CameraIndex(cameras)
+    return _index
@@ -0,0 +1,145 @@
+import math
+import os
+import threading
+import time
+
+# Relative weight of distance, current status and historical availability
+RANKING_DISTANCE_WEIGHT = float(os.getenv("RANKING_DISTANCE_WEIGHT", "0.5"))
+RANKING_STATUS_WEIGHT = float(os.getenv("RANKING_STATUS_WEIGHT", "0.3"))
+RANKING_HISTORY_WEIGHT = float(os.getenv("RANKING_HISTORY_WEIGHT", "0.2"))
+# Distance (km) at which the distance score has fallen to 1/e
+RANKING_DISTANCE_SCALE_KM = float(os.getenv("RANKING_DISTANCE_SCALE_KM", "1.0"))
+# Seconds between reloads of statuses and availability from the database
+RANKING_REFRESH_SECONDS = float(os.getenv("RANKING_REFRESH_SECONDS", "300"))
+
+RANK_MODES = ("distance", "likelihood")
+
+# How promising each current status is for finding parking
+STATUS_SCORES = {
+    'available': 1.0,
+    'unknown': 0.5,
+    'congested': 0.2,
+    'gridlock': 0.0,
+    'offline': 0.0,
+}
+# Used for cameras with no history for the current hour
+DEFAULT_HISTORY_SCORE = 0.5
+
+
+class CameraScores:
+    """
+    In-memory status and availability scores for ranking nearby cameras.
+
+    A background thread reloads every camera's last status and its historical
+    availability for the current local hour of week once per refresh interval,
+    and status changes published on the message bus are applied as they
+    arrive, so ranking a request never touches the database.
+    """
+
+    def __init__(self, session_factory=None, refresh_interval=RANKING_REFRESH_SECONDS):
+        self._session_factory = session_factory
+        self.refresh_interval = refresh_interval
+        self._status = {}
+        self._history = {}
+        self._thread = None
+        self._stop = threading.Event()
+        self.loaded_at = None
+
+    def status(self, address):
+        return self._status.get(address, 'unknown')
+
+    def history(self, address):
+        return self._history.get(address)
+
+    def on_camera_update(self, message):
+        """Message bus callback for CAMERA_UPDATE_CHANNEL."""
+        self._status[message['address']] = message['status']
+
+    def refresh(self):
+        """Reload scores for the current hour of week in one query."""
+        from database.history import availability_by_camera
+        from helpers.baseline import time_of_week
+        if self._session_factory is None:
+            from database.db import SessionLocal
+            self._session_factory = SessionLocal
+        dow, hour = time_of_week(time.time())
+        db = self._session_factory()
+        try:
+            rows = availability_by_camera(db, dow, hour)
+        finally:
+            db.close()
+        # Swap whole dicts so readers never see a half-built table
+        self._status = {address: status or 'unknown' for address, status, _ in rows}
+        self._history = {address: ratio for address, _, ratio in rows if ratio is not None}
+        self.loaded_at = time.time()
+        return len(rows)
+
+    def start(self):
+        """Start the refresher thread (idempotent)."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="camera-scores", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"[ERROR] Failed to refresh camera ranking scores: {e}")
+            self._stop.wait(self.refresh_interval)
+
+
+def likelihood_score(distance_km, status, history_ratio):
+    """Blend distance, current status and historical availability into 0-1."""
+    distance_score = math.exp(-distance_km / RANKING_DISTANCE_SCALE_KM)
+    status_score = STATUS_SCORES.get(status, STATUS_SCORES['unknown'])
+    history_score = DEFAULT_HISTORY_SCORE if history_ratio is None else history_ratio
+    total = RANKING_DISTANCE_WEIGHT + RANKING_STATUS_WEIGHT + RANKING_HISTORY_WEIGHT
+    return (RANKING_DISTANCE_WEIGHT * distance_score
+            + RANKING_STATUS_WEIGHT * status_score
+            + RANKING_HISTORY_WEIGHT * history_score) / total
+
+
+def rank_cameras(cameras, scores):
+    """
+    Reorder nearby cameras by parking likelihood.
+
+    Args:
+        cameras: Mapping of address -> details with a 'distance' (km) entry,
+            as returned by CameraIndex.nearby
+        scores: CameraScores
+
+    Returns:
+        New dict in descending likelihood order; offline cameras go last.
+    """
+    ranked = sorted(
+        cameras.items(),
+        key=lambda item: (
+            scores.status(item[0]) == 'offline',
+            -likelihood_score(item[1]['distance'], scores.status(item[0]), scores.history(item[0])),
+        ),
+    )
+    return dict(ranked)
+
+
+_scores = None
+_scores_lock = threading.Lock()
+
+
+def get_camera_scores():
+    """Process-wide CameraScores, started and subscribed on first use."""
+    global _scores
+    if _scores is None:
+        with _scores_lock:
+            if _scores is None:
+                from helpers.message_bus import CAMERA_UPDATE_CHANNEL, get_message_bus
+                from helpers.shutdown import on_shutdown
+                scores = CameraScores()
+                get_message_bus().subscribe(CAMERA_UPDATE_CHANNEL, scores.on_camera_update)
+                scores.start()
+                on_shutdown(scores.stop, name="camera score refresher")
+                _scores = scores
+    return _scores
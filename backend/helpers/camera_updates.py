@@ -0,0 +1,111 @@
+from datetime import datetime, timezone
+from database.db import SessionLocal
+from database.history import record_status
+from database.models import Camera, Watcher
+from helpers.message_bus import CAMERA_UPDATE_CHANNEL, get_message_bus
+
+
+def record_camera_update(camera_address, new_status, session_factory=SessionLocal, record_history=True):
+    """
+    Store a camera's new status and build the message to publish for it.
+
+    The watcher list (with each watcher's notification interval) is resolved
+    once here and shipped with the message, so receiving nodes only have to
+    match it against their own open sockets.
+    This is the blocking (database) half of publish_camera_update.
+
+    Pass record_history=False when the caller already writes a history
+    sample for every poll (see status_poller).
+
+    Returns:
+        The message, or None if the database update failed.
+    """
+    db = session_factory()
+    try:
+        watchers = dict(
+            db.query(Watcher.client_id, Watcher.notification_interval)
+            .filter_by(camera_address=camera_address)
+            .all()
+        )
+
+        now = datetime.now(timezone.utc)
+        camera = db.query(Camera).filter_by(address=camera_address).first()
+        if not camera:
+            camera = Camera(address=camera_address)
+            db.add(camera)
+        camera.last_status = new_status
+        camera.last_checked = now
+        if record_history:
+            db.flush()
+            record_status(db, camera.key, new_status, now)
+        db.commit()
+    except Exception as e:
+        print(f"Error recording camera update for {camera_address}: {e}")
+        db.rollback()
+        return None
+    finally:
+        db.close()
+
+    return {
+        'address': camera_address,
+        'status': new_status,
+        'timestamp': now.isoformat(),
+        'watchers': watchers,
+    }
+
+
+def publish_camera_update(camera_address, new_status, bus=None, session_factory=SessionLocal, record_history=True):
+    """
+    Record a camera's new status and publish it to every WebSocket node.
+
+    Safe to call from any process (a WebSocket node, the HTTP app or a poller).
+
+    Returns:
+        The published message, or None if the database update failed.
+    """
+    message = record_camera_update(camera_address, new_status, session_factory, record_history)
+    if message is not None:
+        (bus or get_message_bus()).publish(CAMERA_UPDATE_CHANNEL, message)
+    return message
+
+
+def deliver_camera_update(message, registry, scheduler):
+    """
+    Hand a published camera update to this node's notification scheduler.
+
+    Nothing is emitted here; send_due_notifications delivers it once each
+    watcher's notification interval allows.
+
+    Args:
+        message: Message produced by publish_camera_update
+        registry: This node's ConnectionRegistry
+        scheduler: This node's NotificationScheduler
+
+    Returns:
+        True if the camera's status actually changed.
+    """
+    camera_address = message['address']
+    watchers = message.get('watchers', {})
+    registry.set_camera_watchers(camera_address, watchers.keys())
+    scheduler.sync_camera(camera_address, watchers)
+    return scheduler.record_status(camera_address, message['status'], message['timestamp'])
+
+
+def send_due_notifications(scheduler, registry, emit):
+    """
+    Emit one coalesced camera_update per client whose watches are due.
+
+    Payload: {'updates': [{'address', 'status', 'timestamp', 'seq'}, ...]}.
+    Clients acknowledge with a camera_update_ack event carrying the same
+    address/seq pairs so unchanged cameras are not sent again.
+
+    Args:
+        emit: Callable (event, payload, room) that sends to one client room
+
+    Returns:
+        Number of clients notified.
+    """
+    due = scheduler.pop_due(is_connected=registry.is_connected)
+    for client_id, updates in due.items():
+        emit('camera_update', {'updates': updates}, client_id)
+    return len(due)
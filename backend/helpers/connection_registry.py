@@ -0,0 +1,241 @@
+import os
+import threading
+from sqlalchemy import update
+from database.db import SessionLocal
+from database.models import Watcher
+
+# How often (seconds) coalesced is_connected changes are written to the database.
+# Set to 0 to keep connectivity purely in memory and never persist it.
+CONNECTION_STATE_FLUSH_INTERVAL = float(os.getenv("CONNECTION_STATE_FLUSH_INTERVAL", "5"))
+
+
+class ConnectionLimitError(Exception):
+    """Raised when accepting a socket would exceed a configured connection limit."""
+
+
+class ConnectionRegistry:
+    """
+    Process-local source of truth for WebSocket connectivity.
+
+    Tracks sid <-> client_id and camera_address <-> client_id so that connect,
+    disconnect and emit lookups never have to touch the database.
+    A client counts as connected while at least one of its sids is open.
+
+    Args:
+        max_connections: Cap on open sockets in this process (0 = unlimited)
+        max_per_client: Cap on open sockets per client_id (0 = unlimited)
+    """
+
+    def __init__(self, max_connections=0, max_per_client=0):
+        self.max_connections = max_connections
+        self.max_per_client = max_per_client
+        self._lock = threading.Lock()
+        self._sid_to_client = {}
+        self._client_sids = {}
+        self._camera_watchers = {}
+        self._client_cameras = {}
+
+    def connect(self, sid, client_id):
+        """
+        Register a socket. Returns True if this is the client's first open socket.
+
+        Raises:
+            ConnectionLimitError: if the process or per-client limit is reached
+        """
+        with self._lock:
+            if self.max_connections and len(self._sid_to_client) >= self.max_connections:
+                raise ConnectionLimitError("Server connection limit reached")
+            existing = self._client_sids.get(client_id, ())
+            if self.max_per_client and len(existing) >= self.max_per_client:
+                raise ConnectionLimitError("Too many connections for this client")
+            self._sid_to_client[sid] = client_id
+            sids = self._client_sids.setdefault(client_id, set())
+            first = not sids
+            sids.add(sid)
+            return first
+
+    def disconnect(self, sid):
+        """
+        Forget a socket.
+
+        Returns:
+            (client_id, last) where last is True if the client has no sockets left,
+            or (None, False) if the sid was never registered.
+        """
+        with self._lock:
+            client_id = self._sid_to_client.pop(sid, None)
+            if client_id is None:
+                return None, False
+            sids = self._client_sids.get(client_id)
+            if sids is not None:
+                sids.discard(sid)
+                if not sids:
+                    del self._client_sids[client_id]
+                    return client_id, True
+            return client_id, False
+
+    def client_for(self, sid):
+        with self._lock:
+            return self._sid_to_client.get(sid)
+
+    def is_connected(self, client_id):
+        with self._lock:
+            return client_id in self._client_sids
+
+    def set_camera_watchers(self, camera_address, client_ids):
+        """Replace the cached set of clients watching a camera."""
+        with self._lock:
+            for client_id in self._camera_watchers.pop(camera_address, ()):
+                cameras = self._client_cameras.get(client_id)
+                if cameras is not None:
+                    cameras.discard(camera_address)
+                    if not cameras:
+                        del self._client_cameras[client_id]
+            watchers = set(client_ids)
+            if watchers:
+                self._camera_watchers[camera_address] = watchers
+            for client_id in watchers:
+                self._client_cameras.setdefault(client_id, set()).add(camera_address)
+
+    def watch(self, client_id, camera_address):
+        with self._lock:
+            self._camera_watchers.setdefault(camera_address, set()).add(client_id)
+            self._client_cameras.setdefault(client_id, set()).add(camera_address)
+
+    def unwatch(self, client_id, camera_address):
+        with self._lock:
+            watchers = self._camera_watchers.get(camera_address)
+            if watchers is not None:
+                watchers.discard(client_id)
+                if not watchers:
+                    del self._camera_watchers[camera_address]
+            cameras = self._client_cameras.get(client_id)
+            if cameras is not None:
+                cameras.discard(camera_address)
+                if not cameras:
+                    del self._client_cameras[client_id]
+
+    def watched_cameras(self, client_id):
+        with self._lock:
+            return set(self._client_cameras.get(client_id, ()))
+
+    def connected_watchers(self, camera_address):
+        """Client ids watching this camera that currently have an open socket."""
+        with self._lock:
+            return {
+                client_id for client_id in self._camera_watchers.get(camera_address, ())
+                if client_id in self._client_sids
+            }
+
+    def stats(self):
+        with self._lock:
+            return {
+                "sockets": len(self._sid_to_client),
+                "clients": len(self._client_sids),
+                "watched_cameras": len(self._camera_watchers),
+            }
+
+
+class ConnectionStateWriter:
+    """
+    Persists Watcher.is_connected in coalesced batches.
+
+    Only the latest state per client is kept between flushes, so a client that
+    reconnects ten times in one interval costs at most one row update. Each flush
+    issues at most two bulk UPDATE statements (connected / disconnected).
+    """
+
+    def __init__(self, interval=CONNECTION_STATE_FLUSH_INTERVAL, session_factory=SessionLocal, runner=None):
+        self.interval = interval
+        self._session_factory = session_factory
+        # Executes the blocking database write, e.g. BlockingWorkPool.run under gevent
+        self._runner = runner or (lambda fn, *args: fn(*args))
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._persisted = {}    # client_id -> True, for clients last written as connected
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def enabled(self):
+        return self.interval > 0
+
+    def mark(self, client_id, connected):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._pending[client_id] = connected
+
+    def start(self):
+        if not self.enabled or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="connection-state-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread and write whatever is still pending."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 5)
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def flush(self):
+        """Write pending changes. Returns the number of clients whose state was written."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        changes = {
+            client_id: connected for client_id, connected in pending.items()
+            if self._persisted.get(client_id) != connected
+        }
+        if not changes:
+            return 0
+
+        connected_ids = [c for c, state in changes.items() if state]
+        disconnected_ids = [c for c, state in changes.items() if not state]
+
+        try:
+            self._runner(self._write, connected_ids, disconnected_ids)
+        except Exception as e:
+            print(f"Error persisting watcher connection state: {e}")
+            # Put the changes back unless a newer state arrived meanwhile
+            with self._lock:
+                for client_id, state in changes.items():
+                    self._pending.setdefault(client_id, state)
+            return 0
+
+        # Only connected clients are remembered: a disconnected one is usually
+        # gone for good, and keeping it would grow this map forever
+        for client_id in connected_ids:
+            self._persisted[client_id] = True
+        for client_id in disconnected_ids:
+            self._persisted.pop(client_id, None)
+        return len(changes)
+
+    def _write(self, connected_ids, disconnected_ids):
+        """Blocking database half of flush(); safe to run on a worker thread."""
+        db = self._session_factory()
+        try:
+            if connected_ids:
+                db.execute(
+                    update(Watcher)
+                    .where(Watcher.client_id.in_(connected_ids))
+                    .values(is_connected=True)
+                )
+            if disconnected_ids:
+                db.execute(
+                    update(Watcher)
+                    .where(Watcher.client_id.in_(disconnected_ids))
+                    .values(is_connected=False)
+                )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
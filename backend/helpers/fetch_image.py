@@ -1,14 +1,26 @@
+import hashlib
 import json
 import requests
-from PIL import Image
-from io import BytesIO
 import time
 import os
 from werkzeug.utils import secure_filename
 import io
+import threading
+from helpers.camera_health import get_camera_breaker
+from helpers.shutdown import CLOSE, on_shutdown
 
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 ALLOWED_EXTENSIONS = {'jpg', 'jpeg', 'png'}
+# Seconds before an upstream camera request is abandoned
+CAMERA_FETCH_TIMEOUT = float(os.getenv("CAMERA_FETCH_TIMEOUT", "5"))
+# Kept-alive connections to the camera API, enough for every fetch thread
+CAMERA_HTTP_POOL_SIZE = int(os.getenv("CAMERA_HTTP_POOL_SIZE", "32"))
+CAMERA_API_BASE = "https://webcams.nyctmc.org/api/cameras"
+
+# One session so TLS connections to the camera API are reused between fetches
+_http = requests.Session()
+_http.mount("https://", requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=CAMERA_HTTP_POOL_SIZE))
+on_shutdown(_http.close, CLOSE, name="camera API connections")
 
 def secure_file_path(base_dir, filename):
     """Create a secure file path that prevents directory traversal"""
@@ -17,6 +29,7 @@ def secure_file_path(base_dir, filename):
 
 def validate_image(img_data):
     """Validate image size and format"""
+    from PIL import Image
     if len(img_data) > MAX_FILE_SIZE:
         raise ValueError("Image too large")
         
@@ -28,26 +41,20 @@ def validate_image(img_data):
     except Exception as e:
         raise ValueError(f"Invalid image: {str(e)}")
 
-def fetch_and_save_image(camera_id, timestamp):
-    """Fetch an image from the NYC traffic camera API"""
+def request_image_bytes(camera_id, timestamp, timeout=CAMERA_FETCH_TIMEOUT):
+    """Download a snapshot from the NYC traffic camera API. Returns raw bytes or None."""
     try:
-        api_url = f'https://webcams.nyctmc.org/api/cameras/{camera_id}/image?t={timestamp}'
+        api_url = f'{CAMERA_API_BASE}/{camera_id}/image?t={timestamp}'
         print(f"[DEBUG] Fetching image from: {api_url}")
         
-        response = requests.get(api_url)
+        response = _http.get(api_url, timeout=timeout)
         print(f"[DEBUG] Response status: {response.status_code}, Content length: {len(response.content) if response.status_code == 200 else 0}")
         
         if response.status_code == 200:
-            try:
-                img_data = response.content
-                img = validate_image(img_data)
-                return img
-            except ValueError as e:
-                print(f"Image validation failed: {e}")
-                return None
-            except Exception as e:
-                print(f"Image fetch failed: {e}")
+            if len(response.content) > MAX_FILE_SIZE:
+                print("Image validation failed: Image too large")
                 return None
+            return response.content
         else:
             print(f"[ERROR] Failed to fetch image for camera {camera_id}. Status Code: {response.status_code}")
             if response.status_code != 404:  # Don't print potentially large error responses
@@ -58,6 +65,249 @@ def fetch_and_save_image(camera_id, timestamp):
         print(f"[ERROR] Request failed for camera {camera_id}: {e}")
         return None
 
+def download_image_bytes(camera_id, timestamp, timeout=CAMERA_FETCH_TIMEOUT):
+    """
+    Download a snapshot unless the camera's circuit is open.
+
+    Cameras that keep failing are skipped without a network call until the
+    background prober sees them recover (see helpers/camera_health.py).
+    """
+    breaker = get_camera_breaker()
+    if not breaker.allow(camera_id):
+        print(f"[INFO] Skipping camera {camera_id}: circuit open")
+        return None
+    start = time.monotonic()
+    img_data = request_image_bytes(camera_id, timestamp, timeout)
+    breaker.record(camera_id, img_data is not None, time.monotonic() - start)
+    return img_data
+
+def prime_http_pool(connections=4):
+    """Open `connections` kept-alive connections to the camera API. Returns how many answered."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    def ping(_):
+        try:
+            _http.head(CAMERA_API_BASE, timeout=CAMERA_FETCH_TIMEOUT)
+            return True
+        except requests.RequestException as e:
+            print(f"[ERROR] Camera API unreachable: {e}")
+            return False
+
+    # Concurrent, or the pool would keep reusing a single connection
+    with ThreadPoolExecutor(max_workers=connections) as pool:
+        return sum(pool.map(ping, range(connections)))
+
+def probe_camera(camera_id):
+    """Background health probe: fetch one snapshot, bypassing the circuit breaker."""
+    return request_image_bytes(camera_id, int(time.time())) is not None
+
+def fetch_and_save_image(camera_id, timestamp):
+    """Fetch an image from the NYC traffic camera API"""
+    img_data = download_image_bytes(camera_id, timestamp)
+    if img_data is None:
+        return None
+    try:
+        return validate_image(img_data)
+    except ValueError as e:
+        print(f"Image validation failed: {e}")
+        return None
+
+# --- Perceptual-hash dedup -------------------------------------------------
+#
+# NYCTMC often serves the same frame again, or a shared "camera unavailable"
+# placeholder. A frame whose bytes are identical to the camera's last frame
+# reuses the previously encoded output instead of resize + re-encode. Only an
+# exact match counts: a few cars arriving barely move a perceptual hash.
+#
+# Configured placeholders are matched perceptually, by a 64-bit difference
+# hash (dHash) of a tiny grayscale thumbnail computed from a draft-mode decode,
+# which is far cheaper than a full decode. A frame within HASH_MATCH_DISTANCE
+# bits of a known placeholder hash is offline. Unconfigured placeholders are
+# found by exact bytes being served by several cameras at once.
+
+HASH_MATCH_DISTANCE = int(os.getenv("HASH_MATCH_DISTANCE", "4"))
+# Known placeholder hashes (hex, comma separated)
+PLACEHOLDER_HASHES = {
+    int(h, 16) for h in os.getenv("CAMERA_PLACEHOLDER_HASHES", "").split(",") if h.strip()
+}
+# A frame shared verbatim by this many different cameras is treated as a placeholder
+PLACEHOLDER_SHARED_BY = 3
+
+OUTPUT_MAX_WIDTH = 640
+OUTPUT_JPEG_QUALITY = 70
+
+_frames_lock = threading.Lock()
+_frames = {}          # camera_id -> _FrameRecord for its last frame
+_hash_cameras = {}    # source hash -> camera_ids whose last frame has those exact bytes
+
+
+class _FrameRecord:
+    __slots__ = ("phash", "source", "jpeg", "digest")
+
+    def __init__(self, phash, source):
+        self.phash = phash
+        self.source = source    # hash of the upstream bytes
+        self.jpeg = None
+        self.digest = None
+
+
+def dhash(img_data, hash_size=8):
+    """64-bit difference hash of encoded image bytes."""
+    from PIL import Image
+    img = Image.open(io.BytesIO(img_data))
+    img.draft('L', (hash_size * 4, hash_size * 4))
+    small = img.convert('L').resize((hash_size + 1, hash_size), Image.BILINEAR)
+    pixels = small.tobytes()
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def is_placeholder(phash, source):
+    """
+    A frame close to a configured placeholder hash, or byte-for-byte the same
+    as the last frame of PLACEHOLDER_SHARED_BY cameras. Frames that merely look
+    alike (night, fog, empty roads) do not count.
+    """
+    if any(hamming(phash, known) <= HASH_MATCH_DISTANCE for known in PLACEHOLDER_HASHES):
+        return True
+    with _frames_lock:
+        return len(_hash_cameras.get(source, ())) >= PLACEHOLDER_SHARED_BY
+
+
+def encode_for_client(img):
+    """Resize to at most OUTPUT_MAX_WIDTH and encode as the JPEG we serve."""
+    from PIL import Image
+    if img.width > OUTPUT_MAX_WIDTH:
+        h = img.height * OUTPUT_MAX_WIDTH // img.width
+        img = img.resize((OUTPUT_MAX_WIDTH, h), Image.LANCZOS)
+    if img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    out = io.BytesIO()
+    img.save(out, format="JPEG", quality=OUTPUT_JPEG_QUALITY, optimize=True)
+    return out.getvalue()
+
+
+class CameraFrame:
+    """
+    One fetched snapshot plus what dedup learned about it.
+
+    Attributes:
+        unchanged: Byte-for-byte the camera's previous frame
+        offline: Matches a known or shared placeholder image
+    """
+
+    def __init__(self, camera_id, data, phash, record, unchanged, offline):
+        self.camera_id = camera_id
+        self.data = data
+        self.phash = phash
+        self.unchanged = unchanged
+        self.offline = offline
+        self._record = record
+        self._image = None
+
+    @property
+    def image(self):
+        """Full decode, only done on demand."""
+        if self._image is None:
+            self._image = validate_image(self.data)
+        return self._image
+
+    def jpeg(self):
+        """Client-ready JPEG bytes, encoded once per distinct frame."""
+        if self._record.jpeg is None:
+            self._record.jpeg = encode_for_client(self.image)
+        return self._record.jpeg
+
+    def digest(self):
+        """Content hash of jpeg(); names the served snapshot file and is its ETag."""
+        if self._record.digest is None:
+            self._record.digest = hashlib.sha256(self.jpeg()).hexdigest()[:32]
+        return self._record.digest
+
+
+def fetch_camera_frame(camera_id, timestamp, timeout=CAMERA_FETCH_TIMEOUT):
+    """
+    Fetch a camera snapshot, reusing the previous encode for a repeated frame.
+
+    Returns:
+        CameraFrame, or None if the download or decode failed.
+    """
+    img_data = download_image_bytes(camera_id, timestamp, timeout)
+    if img_data is None:
+        return None
+    try:
+        phash = dhash(img_data)
+    except Exception as e:
+        print(f"Image validation failed: {e}")
+        return None
+    source = hashlib.sha256(img_data).hexdigest()
+
+    with _frames_lock:
+        previous = _frames.get(camera_id)
+        unchanged = previous is not None and previous.source == source
+        # A record restored by load_frames() names a JPEG that is not in
+        # memory and whose file may have been swept since: encode it again
+        # rather than hand out a digest nothing backs
+        if unchanged and (previous.jpeg is not None or previous.digest is None):
+            record = previous
+        else:
+            if previous is not None:
+                cameras = _hash_cameras.get(previous.source)
+                if cameras is not None:
+                    cameras.discard(camera_id)
+                    if not cameras:
+                        del _hash_cameras[previous.source]
+            record = _FrameRecord(phash, source)
+            _frames[camera_id] = record
+            _hash_cameras.setdefault(source, set()).add(camera_id)
+
+    return CameraFrame(camera_id, img_data, phash, record, unchanged, is_placeholder(record.phash, record.source))
+
+def last_frame_digest(camera_id):
+    """Snapshot digest of the camera's last encoded frame, or None. Never fetches."""
+    with _frames_lock:
+        record = _frames.get(camera_id)
+    return None if record is None else record.digest
+
+def dump_frames():
+    """Each camera's last frame as [camera_id, phash, digest, source], for frames that were served."""
+    with _frames_lock:
+        return [[camera_id, f"{record.phash:016x}", record.digest, record.source]
+                for camera_id, record in _frames.items() if record.digest is not None]
+
+def load_frames(entries, keep=None):
+    """
+    Restore dump_frames() output so unchanged frames and placeholders are
+    recognised right after a restart. Cameras already fetched by this process
+    keep their newer record.
+
+    Args:
+        keep: Optional callable(digest) -> bool; entries it rejects are skipped
+
+    Returns:
+        Number of frames restored.
+    """
+    restored = 0
+    with _frames_lock:
+        for camera_id, phash, digest, source in entries:
+            if camera_id in _frames or (keep is not None and not keep(digest)):
+                continue
+            record = _FrameRecord(int(phash, 16), source)
+            # The JPEG itself stays on disk; only its name is needed to serve it
+            record.digest = digest
+            _frames[camera_id] = record
+            _hash_cameras.setdefault(record.source, set()).add(camera_id)
+            restored += 1
+    return restored
+
 def load_camera_data(filepath):
     try:
         with open(filepath, 'r') as f:
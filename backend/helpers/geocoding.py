@@ -0,0 +1,32 @@
+import os
+from helpers.cache_persistence import persistent_cache
+from helpers.ttl_cache import TTLCache
+
+# Seconds a geocoded address is reused before asking Google again
+GEOCODE_CACHE_SECONDS = int(os.getenv("GEOCODE_CACHE_SECONDS", "86400"))
+
+_geocodes = TTLCache(GEOCODE_CACHE_SECONDS, max_entries=4096)
+persistent_cache("geocodes", _geocodes.dump, _geocodes.load)
+
+
+def geocode_key(addr):
+    """Cache key of an address: case and whitespace do not matter."""
+    return " ".join(addr.lower().split())
+
+
+def geocode(gmaps, addr):
+    """
+    [lat, lng] of an address, or None if it cannot be placed. Cached per
+    address, and the cache is saved with the other hot caches.
+
+    Args:
+        gmaps: googlemaps.Client, or anything with the same geocode(address)
+    """
+    def lookup():
+        result = gmaps.geocode(addr)
+        if not result:
+            return None
+        location = result[0]['geometry']['location']
+        return [location['lat'], location['lng']]
+    location, _ = _geocodes.get_or_compute(geocode_key(addr), lookup)
+    return location
@@ -0,0 +1,62 @@
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {c: i for i, c in enumerate(_BASE32)}
+
+
+def encode(lat, lng, precision):
+    """Geohash of a point with `precision` characters (5 bits each)."""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        # Bits alternate between longitude and latitude, longitude first
+        rng, coord = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if coord >= mid:
+            value = (value << 1) | 1
+            rng[0] = mid
+        else:
+            value <<= 1
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def bounds(cell):
+    """
+    (lat_min, lng_min, lat_max, lng_max) of a geohash cell.
+
+    Raises:
+        ValueError: If cell is empty or contains characters outside the geohash alphabet.
+    """
+    if not cell:
+        raise ValueError("Empty geohash")
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    even = True
+    for char in cell:
+        if char not in _DECODE:
+            raise ValueError(f"Invalid geohash character: {char!r}")
+        value = _DECODE[char]
+        for shift in range(4, -1, -1):
+            rng = lng_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if (value >> shift) & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+    return lat_range[0], lng_range[0], lat_range[1], lng_range[1]
+
+
+def center(cell):
+    """(lat, lng) at the middle of a geohash cell."""
+    lat_min, lng_min, lat_max, lng_max = bounds(cell)
+    return (lat_min + lat_max) / 2, (lng_min + lng_max) / 2
@@ -1,17 +1,9 @@
 import json
-import requests
-from dotenv import load_dotenv
-import os
-from math import radians, cos, sin, asin, sqrt
-from haversine import haversine
-
-
-
-
 
 
 def find_nearby_cameras(user_lat, user_lng, camera_data_file, radius=7):
-    
+    from haversine import haversine
+
     if user_lat is None or user_lng is None:
         print("Failed to get the geocode for the user address.")
         return
@@ -42,41 +34,11 @@ def find_nearby_cameras(user_lat, user_lng, camera_data_file, radius=7):
     # Sort by distance (closest first)
     nearby_cameras_with_distance.sort(key=lambda x: x[0])
     
-    # Convert back to dictionary format (now sorted by distance)
+    # Convert back to dictionary format (now sorted by distance), keeping the
+    # distance in km for callers that rank by more than distance
     nearby_cameras = {}
     for distance, address, details in nearby_cameras_with_distance:
+        details['distance'] = distance
         nearby_cameras[address] = details
 
     return nearby_cameras
-
-# Usage
-load_dotenv(dotenv_path='.env')
-google_maps_api_key = os.getenv('GOOGLEMAPSAPI')
-camera_data_file = 'camera_id_lat_lng_wiped.json'
-addy =   "park ave 86 st"
-addy2 = "10_Ave_42_St"
-
-#data = get_geocode("11_Ave_42_St", google_maps_api_key)#
-#ata = find_nearby_cameras(addy, 'camera_id_lat_lng_wiped.json', google_maps_api_key)
-
-#ata2= find_nearby_cameras(addy2,'camera_id_lat_lng_wiped.json', google_maps_api_key)
-#rint(f' \n Dictionary of closests cams: {data} \n')
-
-
-   #print(find_nearby_cameras(addy, camera_data_file, google_maps_api_key))
-
-""" 
-if google_maps_api_key:
-    user_address = input("Enter the address: ")
-    radius = float(input("Enter the radius in miles (default is 0.5 miles): ") or 0.5)
-    nearby_cameras = find_nearby_cameras(user_address, camera_data_file, google_maps_api_key, radius)
-    if nearby_cameras:
-        print("Nearby Cameras:")
-        print(json.dumps(nearby_cameras, indent=4))
-    else:
-        print("No cameras found within the specified radius.")
-else:
-    print("Google Maps API key not found in environment variables.")
-"""
-
-
@@ -0,0 +1,189 @@
+import os
+from collections import deque
+
+# A vehicle counts as stationary once it has not moved for this long...
+GRIDLOCK_STATIONARY_SECONDS = float(os.getenv("GRIDLOCK_STATIONARY_SECONDS", "180"))
+# ...and as parked (ignored) once it has not moved for this long
+GRIDLOCK_PARKED_SECONDS = float(os.getenv("GRIDLOCK_PARKED_SECONDS", "900"))
+# Stationary vehicles needed, and their minimum share of all detections
+GRIDLOCK_MIN_VEHICLES = int(os.getenv("GRIDLOCK_MIN_VEHICLES", "4"))
+GRIDLOCK_MIN_SHARE = float(os.getenv("GRIDLOCK_MIN_SHARE", "0.6"))
+# Upper bound on tracked vehicles per camera
+GRIDLOCK_MAX_TRACKS = int(os.getenv("GRIDLOCK_MAX_TRACKS", "64"))
+
+STATUS_GRIDLOCK = 'gridlock'
+
+
+class _Track:
+    __slots__ = ("box", "anchor", "since", "missed")
+
+    def __init__(self, box, timestamp):
+        self.box = box
+        self.anchor = _centroid(box)
+        self.since = timestamp
+        self.missed = 0
+
+
+def _centroid(box):
+    return ((box[0] + box[2]) / 2, (box[1] + box[3]) / 2)
+
+
+def _iou(a, b):
+    iw = min(a[2], b[2]) - max(a[0], b[0])
+    ih = min(a[3], b[3]) - max(a[1], b[1])
+    if iw <= 0 or ih <= 0:
+        return 0.0
+    inter = iw * ih
+    return inter / ((a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter)
+
+
+class CameraTracker:
+    """
+    Tracks detected vehicles across polls of one camera.
+
+    Detections are matched to existing tracks by IoU, looking only at tracks
+    whose centroid falls in the same or a neighbouring grid cell, so an update
+    costs O(detections). A track remembers where it last moved (its anchor);
+    when the centroid drifts more than `move_tolerance` from the anchor it
+    counts as moving again.
+
+    Memory is bounded by `max_tracks` tracks plus a ring buffer of the last
+    `history` observations (timestamp, vehicles, stationary).
+    """
+
+    def __init__(
+        self,
+        stationary_seconds=GRIDLOCK_STATIONARY_SECONDS,
+        parked_seconds=GRIDLOCK_PARKED_SECONDS,
+        iou_threshold=0.3,
+        move_tolerance=0.03,
+        max_missed=2,
+        max_tracks=GRIDLOCK_MAX_TRACKS,
+        history=16,
+    ):
+        self.stationary_seconds = stationary_seconds
+        self.parked_seconds = parked_seconds
+        self.iou_threshold = iou_threshold
+        self.move_tolerance = move_tolerance
+        self.max_missed = max_missed
+        self.max_tracks = max_tracks
+        # Grid cell size in normalised frame units; vehicles rarely move further
+        # than one cell between matched polls without also losing IoU
+        self.cell_size = 0.1
+        self.tracks = []
+        self.history = deque(maxlen=history)
+
+    def _cell(self, point):
+        return int(point[0] / self.cell_size), int(point[1] / self.cell_size)
+
+    def update(self, boxes, timestamp):
+        """
+        Match one poll's detections and return the number of stationary vehicles.
+
+        Args:
+            boxes: Sequence of (x1, y1, x2, y2[, score]) normalised to 0-1
+            timestamp: Seconds (any monotonic-enough clock, e.g. epoch)
+        """
+        grid = {}
+        for index, track in enumerate(self.tracks):
+            grid.setdefault(self._cell(_centroid(track.box)), []).append(index)
+
+        matched = [False] * len(self.tracks)
+        unmatched = []
+        for box in boxes:
+            box = tuple(float(v) for v in box[:4])
+            cx, cy = self._cell(_centroid(box))
+            best, best_iou = None, self.iou_threshold
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    for index in grid.get((cx + dx, cy + dy), ()):
+                        if matched[index]:
+                            continue
+                        overlap = _iou(box, self.tracks[index].box)
+                        if overlap >= best_iou:
+                            best, best_iou = index, overlap
+            if best is None:
+                unmatched.append(box)
+                continue
+            matched[best] = True
+            track = self.tracks[best]
+            track.box = box
+            track.missed = 0
+            centroid = _centroid(box)
+            if max(abs(centroid[0] - track.anchor[0]), abs(centroid[1] - track.anchor[1])) > self.move_tolerance:
+                track.anchor = centroid
+                track.since = timestamp
+
+        survivors = []
+        for track, hit in zip(self.tracks, matched):
+            if not hit:
+                track.missed += 1
+                if track.missed > self.max_missed:
+                    continue
+            survivors.append(track)
+        for box in unmatched:
+            if len(survivors) >= self.max_tracks:
+                break
+            survivors.append(_Track(box, timestamp))
+        self.tracks = survivors
+
+        stationary = 0
+        for track in self.tracks:
+            still = timestamp - track.since
+            if track.missed == 0 and self.stationary_seconds <= still < self.parked_seconds:
+                stationary += 1
+        self.history.append((timestamp, len(boxes), stationary))
+        return stationary
+
+
+class GridlockTracker:
+    """
+    Vehicle-counter handler that turns per-camera tracks into gridlock events.
+
+    A camera enters gridlock when the last `confirm` observations all have at
+    least `min_vehicles` stationary vehicles making up `min_share` of the
+    detections, and leaves it once that is no longer true for `confirm`
+    observations in a row. Each transition calls on_change(address, gridlocked).
+    """
+
+    def __init__(self, on_change, min_vehicles=GRIDLOCK_MIN_VEHICLES, min_share=GRIDLOCK_MIN_SHARE,
+                 confirm=2, **tracker_options):
+        self._on_change = on_change
+        self.min_vehicles = min_vehicles
+        self.min_share = min_share
+        self.confirm = confirm
+        self._tracker_options = tracker_options
+        self._cameras = {}
+        self._gridlocked = set()
+
+    def is_gridlocked(self, camera_address):
+        return camera_address in self._gridlocked
+
+    def _jammed(self, vehicles, stationary):
+        return stationary >= self.min_vehicles and stationary >= self.min_share * vehicles
+
+    def observe(self, camera_address, boxes, timestamp):
+        """Feed one poll's detections. Returns True if the gridlock state changed."""
+        tracker = self._cameras.get(camera_address)
+        if tracker is None:
+            tracker = self._cameras[camera_address] = CameraTracker(**self._tracker_options)
+        tracker.update(boxes, timestamp)
+
+        recent = list(tracker.history)[-self.confirm:]
+        if len(recent) < self.confirm:
+            return False
+        jammed = [self._jammed(vehicles, stationary) for _, vehicles, stationary in recent]
+        gridlocked = camera_address in self._gridlocked
+        if not gridlocked and all(jammed):
+            self._gridlocked.add(camera_address)
+        elif gridlocked and not any(jammed):
+            self._gridlocked.discard(camera_address)
+        else:
+            return False
+        self._on_change(camera_address, not gridlocked)
+        return True
+
+    def __call__(self, results):
+        """InferenceWorker handler: results are (address, captured_at, boxes)."""
+        for camera_address, captured_at, boxes in results:
+            self.observe(camera_address, boxes, captured_at.timestamp())
@@ -0,0 +1,64 @@
+from flask import current_app, g, request
+
+# Cache-Control values used by the routes
+NO_STORE = "no-store"
+REVALIDATE = "no-cache"
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+IMMUTABLE = f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+
+
+def short_lived(seconds):
+    """Shared caches may reuse the response for `seconds` without revalidating."""
+    return f"public, max-age={seconds}"
+
+
+def cache_policy(value):
+    """
+    Set a view's Cache-Control policy. Apply below the route decorator:
+
+        @bp.get("/thing")
+        @cache_policy(short_lived(60))
+        def thing(): ...
+    """
+    def decorator(view):
+        view.cache_policy = value
+        return view
+    return decorator
+
+
+def response_cache_policy(value):
+    """Override the view's Cache-Control policy for the current response only."""
+    g.cache_policy = value
+
+
+def apply_cache_policy(response):
+    """
+    after_request hook: set Cache-Control from the view's policy and answer
+    conditional GETs.
+
+    A policy set with response_cache_policy() wins over the view's. Views
+    without a policy get no-store for unsafe methods and no-cache (always
+    revalidate) for GET, unless the response already chose its own headers
+    (static files, streams). The policy only covers successful responses:
+    errors, rate limits and redirects are always no-store, so a shared cache
+    never hands one client's failure to another. Cacheable GET responses get a
+    content-hash ETag if they do not have one, and If-None-Match /
+    If-Modified-Since turn them into 304 Not Modified.
+    """
+    if response.status_code not in (200, 304):
+        response.headers["Cache-Control"] = NO_STORE
+        return response
+    view = current_app.view_functions.get(request.endpoint) if request.endpoint else None
+    policy = g.get("cache_policy") or getattr(view, "cache_policy", None)
+    if policy is None:
+        if "Cache-Control" in response.headers:
+            return response
+        policy = REVALIDATE if request.method in ("GET", "HEAD") else NO_STORE
+    response.headers["Cache-Control"] = policy
+
+    if (request.method in ("GET", "HEAD") and response.status_code == 200
+            and policy != NO_STORE and not response.is_streamed):
+        if response.get_etag()[0] is None:
+            response.add_etag()
+        response.make_conditional(request)
+    return response
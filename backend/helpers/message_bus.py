@@ -0,0 +1,128 @@
+import json
+import os
+import threading
+
+# Where camera updates are published. Empty / "local://" keeps everything in-process
+# (single node, tests); "redis://host:port/db" fans out to every WebSocket node.
+MESSAGE_BUS_URL = os.getenv("MESSAGE_BUS_URL", "local://")
+
+CAMERA_UPDATE_CHANNEL = "parking_spotter:camera_update"
+
+
+class MessageBus:
+    """Minimal publish/subscribe interface shared by all bus backends."""
+
+    def publish(self, channel, message):
+        raise NotImplementedError
+
+    def subscribe(self, channel, callback):
+        """Call callback(message) for every message published on channel."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class LocalMessageBus(MessageBus):
+    """
+    In-process bus. Messages are delivered synchronously to every subscriber.
+
+    Several simulated nodes can share one instance in tests, which behaves the
+    same as separate processes sharing a Redis channel.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def publish(self, channel, message):
+        # Round-trip through JSON so local delivery sees exactly what Redis would
+        payload = json.loads(json.dumps(message))
+        with self._lock:
+            callbacks = list(self._subscribers.get(channel, ()))
+        for callback in callbacks:
+            try:
+                callback(payload)
+            except Exception as e:
+                print(f"Error delivering message on {channel}: {e}")
+        return len(callbacks)
+
+    def subscribe(self, channel, callback):
+        with self._lock:
+            self._subscribers.setdefault(channel, []).append(callback)
+
+    def close(self):
+        with self._lock:
+            self._subscribers.clear()
+
+
+class RedisMessageBus(MessageBus):
+    """Redis pub/sub backend. Each subscribing process runs one listener thread."""
+
+    def __init__(self, url):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("MESSAGE_BUS_URL points at Redis but the 'redis' package is not installed")
+        self._client = redis.Redis.from_url(url)
+        self._pubsub = None
+        self._callbacks = {}
+        self._thread = None
+
+    def publish(self, channel, message):
+        return self._client.publish(channel, json.dumps(message))
+
+    def subscribe(self, channel, callback):
+        if self._pubsub is None:
+            self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._callbacks.setdefault(channel, []).append(callback)
+        self._pubsub.subscribe(**{channel: self._dispatch})
+        if self._thread is None:
+            self._thread = self._pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def _dispatch(self, raw):
+        channel = raw["channel"].decode() if isinstance(raw["channel"], bytes) else raw["channel"]
+        try:
+            message = json.loads(raw["data"])
+        except (TypeError, ValueError) as e:
+            print(f"Dropping malformed message on {channel}: {e}")
+            return
+        for callback in self._callbacks.get(channel, ()):
+            try:
+                callback(message)
+            except Exception as e:
+                print(f"Error delivering message on {channel}: {e}")
+
+    def close(self):
+        if self._thread is not None:
+            self._thread.stop()
+            self._thread = None
+        if self._pubsub is not None:
+            self._pubsub.close()
+            self._pubsub = None
+        self._client.close()
+
+
+def create_message_bus(url=None):
+    """Build a bus from a URL (defaults to MESSAGE_BUS_URL)."""
+    url = url if url is not None else MESSAGE_BUS_URL
+    if not url or url.startswith("local://"):
+        return LocalMessageBus()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisMessageBus(url)
+    raise ValueError(f"Unsupported MESSAGE_BUS_URL scheme: {url}")
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def get_message_bus():
+    """Process-wide bus shared by the WebSocket server and any publishers."""
+    global _bus
+    with _bus_lock:
+        if _bus is None:
+            from helpers.shutdown import CLOSE, on_shutdown
+            _bus = create_message_bus()
+            on_shutdown(_bus.close, CLOSE, name="message bus")
+        return _bus
@@ -0,0 +1,161 @@
+import heapq
+import itertools
+import threading
+import time
+
+
+class _WatchEntry:
+    __slots__ = ("interval", "due", "token", "sent_seq", "sent_status", "acked_status")
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.due = None
+        self.token = None
+        self.sent_seq = None
+        self.sent_status = None
+        self.acked_status = None
+
+
+class NotificationScheduler:
+    """
+    Enforces Watcher.notification_interval for camera_update notifications.
+
+    Every (client_id, camera_address) watch has a next-due time kept in a heap.
+    Status changes only update the camera's latest state, so any number of flips
+    inside one interval collapse into a single notification. When a watch comes
+    due it is sent only if the latest status differs from what the client last
+    acknowledged; a watch with nothing new goes idle and is woken by the next
+    change instead of polling.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._heap = []
+        self._tokens = itertools.count()
+        self._entries = {}
+        self._camera_state = {}
+        self._camera_clients = {}
+        self._client_cameras = {}
+
+    def _schedule(self, key, due):
+        entry = self._entries[key]
+        entry.due = due
+        entry.token = next(self._tokens)
+        heapq.heappush(self._heap, (due, entry.token, key))
+
+    def _remove(self, client_id, camera_address):
+        self._entries.pop((client_id, camera_address), None)
+        clients = self._camera_clients.get(camera_address)
+        if clients is not None:
+            clients.discard(client_id)
+            if not clients:
+                del self._camera_clients[camera_address]
+        cameras = self._client_cameras.get(client_id)
+        if cameras is not None:
+            cameras.discard(camera_address)
+            if not cameras:
+                del self._client_cameras[client_id]
+
+    def sync_camera(self, camera_address, watchers):
+        """
+        Make the scheduled watches for a camera match the database.
+
+        Args:
+            camera_address: Camera whose watcher list was just read
+            watchers: Mapping of client_id -> notification_interval (minutes)
+        """
+        now = self._clock()
+        with self._lock:
+            for client_id in list(self._camera_clients.get(camera_address, ())):
+                if client_id not in watchers:
+                    self._remove(client_id, camera_address)
+
+            for client_id, interval_minutes in watchers.items():
+                key = (client_id, camera_address)
+                entry = self._entries.get(key)
+                if entry is None:
+                    self._entries[key] = _WatchEntry(interval_minutes * 60)
+                    self._camera_clients.setdefault(camera_address, set()).add(client_id)
+                    self._client_cameras.setdefault(client_id, set()).add(camera_address)
+                    # First notification for a new watch goes out on the next tick
+                    self._schedule(key, now)
+                else:
+                    entry.interval = interval_minutes * 60
+
+    def record_status(self, camera_address, status, timestamp):
+        """
+        Store a camera's latest status. Returns True if it actually changed.
+
+        Idle watches of this camera are woken; watches still inside their
+        interval keep their due time and will pick up the latest status then.
+        """
+        now = self._clock()
+        with self._lock:
+            current = self._camera_state.get(camera_address)
+            if current is not None and current[1] == status:
+                return False
+            seq = current[0] + 1 if current is not None else 1
+            self._camera_state[camera_address] = (seq, status, timestamp)
+            for client_id in self._camera_clients.get(camera_address, ()):
+                key = (client_id, camera_address)
+                if self._entries[key].due is None:
+                    self._schedule(key, now)
+            return True
+
+    def wake_client(self, client_id):
+        """Make a reconnecting client's idle watches due so it catches up."""
+        now = self._clock()
+        with self._lock:
+            for camera_address in self._client_cameras.get(client_id, ()):
+                key = (client_id, camera_address)
+                if self._entries[key].due is None:
+                    self._schedule(key, now)
+
+    def ack(self, client_id, camera_address, seq):
+        """Record that the client has applied the update with this seq."""
+        with self._lock:
+            entry = self._entries.get((client_id, camera_address))
+            if entry is not None and entry.sent_seq == seq:
+                entry.acked_status = entry.sent_status
+
+    def pop_due(self, is_connected=lambda client_id: True):
+        """
+        Collect every notification that is due now.
+
+        Returns:
+            Mapping of client_id -> list of updates, one per camera that changed
+            since the client's last ack.
+        """
+        now = self._clock()
+        due = {}
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, token, key = heapq.heappop(self._heap)
+                entry = self._entries.get(key)
+                if entry is None or entry.token != token:
+                    continue  # Superseded or removed
+                entry.due = None
+
+                client_id, camera_address = key
+                if not is_connected(client_id):
+                    continue  # wake_client() reschedules it on reconnect
+                state = self._camera_state.get(camera_address)
+                if state is None or state[1] == entry.acked_status:
+                    continue  # Nothing new; idle until the next change
+
+                seq, status, timestamp = state
+                due.setdefault(client_id, []).append({
+                    'address': camera_address,
+                    'status': status,
+                    'timestamp': timestamp,
+                    'seq': seq,
+                })
+                entry.sent_seq = seq
+                entry.sent_status = status
+                self._schedule(key, now + entry.interval)
+        return due
+
+    def stats(self):
+        with self._lock:
+            return {"watches": len(self._entries), "heap": len(self._heap)}
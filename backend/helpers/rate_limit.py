@@ -0,0 +1,276 @@
+import hashlib
+import math
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from flask import current_app, jsonify, request
+
+# Set to "false" to disable rate limiting (e.g. for load tests)
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() != "false"
+# File shared by every worker process on the host; empty keeps limits per process
+RATE_LIMIT_STORAGE_PATH = os.getenv(
+    "RATE_LIMIT_STORAGE_PATH",
+    os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "parking_spotter_rate_limits"),
+)
+# Buckets of 8 clients each in the shared table
+RATE_LIMIT_BUCKETS = int(os.getenv("RATE_LIMIT_BUCKETS", "8192"))
+# Number of proxies in front of the app whose X-Forwarded-For entries to trust
+RATE_LIMIT_PROXY_HOPS = int(os.getenv("RATE_LIMIT_PROXY_HOPS", "0"))
+
+# Camera endpoints: budget in camera images (cost = numCams + addresses)
+RATE_LIMIT_CAMERAS_PER_MINUTE = float(os.getenv("RATE_LIMIT_CAMERAS_PER_MINUTE", "60"))
+RATE_LIMIT_CAMERAS_BURST = int(os.getenv("RATE_LIMIT_CAMERAS_BURST", "20"))
+# Watch/unwatch and other cheap endpoints: budget in requests
+RATE_LIMIT_REQUESTS_PER_MINUTE = float(os.getenv("RATE_LIMIT_REQUESTS_PER_MINUTE", "30"))
+RATE_LIMIT_REQUESTS_BURST = int(os.getenv("RATE_LIMIT_REQUESTS_BURST", "10"))
+
+
+class Limit:
+    """
+    GCRA (generic cell rate algorithm) parameters: a sustained rate plus a
+    burst that may be spent at once. Equivalent to a token bucket holding
+    `burst` tokens refilled at `per_minute`, but the whole state per client is
+    one timestamp.
+    """
+
+    def __init__(self, per_minute, burst, cost=None):
+        self.per_minute = per_minute
+        self.burst = burst
+        self.cost = cost
+        self.interval = 60.0 / per_minute    # seconds to earn back one unit
+        self.capacity = burst * self.interval
+
+    def request_cost(self, req):
+        if self.cost is None:
+            return 1
+        try:
+            cost = int(self.cost(req))
+        except Exception:
+            return 1
+        # Never more than the burst, or the request could never be allowed
+        return max(1, min(cost, self.burst))
+
+
+def camera_request_cost(req):
+    """Cost of a camera request: numCams (default 5) plus one per address to geocode."""
+    data = req.get_json(silent=True) if req.method == "POST" else None
+    source = data if isinstance(data, dict) else req.args
+    try:
+        cost = int(source.get("numCams", 5))
+    except (TypeError, ValueError):
+        cost = 1
+    addresses = source.get("addresses")
+    if isinstance(addresses, list):
+        cost += len(addresses)
+    return cost
+
+
+def rate_limit(per_minute, burst, cost=None):
+    """
+    Limit a view per client IP. Apply below the route decorator:
+
+        @bp.post("/thing")
+        @rate_limit(60, 20, cost=camera_request_cost)
+        def thing(): ...
+
+    Args:
+        per_minute: Sustained units per minute
+        burst: Units that may be used at once after being idle
+        cost: Optional callable(request) -> units for this request (default 1)
+    """
+    def decorator(view):
+        view.rate_limit = Limit(per_minute, burst, cost)
+        return view
+    return decorator
+
+
+def key_hash(key):
+    """Non-zero 64-bit hash of a limit key (0 marks an empty shared slot)."""
+    value = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+    return value or 1
+
+
+def gcra(tat, now, increment, capacity):
+    """
+    One GCRA step.
+
+    Args:
+        tat: Stored theoretical arrival time, or None for a new client
+        increment: cost * interval
+        capacity: burst * interval
+
+    Returns:
+        (allowed, new_tat); new_tat is only meant to be stored when allowed.
+    """
+    tat = now if tat is None or tat < now else tat
+    new_tat = tat + increment
+    if new_tat - now > capacity:
+        return False, tat
+    return True, new_tat
+
+
+class MemoryStorage:
+    """Per-process limit state."""
+
+    def __init__(self, max_entries=100_000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._tat = {}
+
+    def update(self, key, now, increment, capacity):
+        with self._lock:
+            allowed, tat = gcra(self._tat.get(key), now, increment, capacity)
+            if allowed:
+                if len(self._tat) >= self.max_entries:
+                    # Entries in the past are fully refilled and can be forgotten
+                    self._tat = {k: v for k, v in self._tat.items() if v > now}
+                self._tat[key] = tat
+            return allowed, tat
+
+
+class SharedMemoryStorage:
+    """
+    Limit state in a memory-mapped file, shared by all processes on the host.
+
+    The file is a fixed hash table of buckets, each 8 (key hash, TAT) slots.
+    An update locks only its own bucket: a thread lock stripe within the
+    process plus an fcntl byte-range lock across processes. When a bucket is
+    full, the slot with the oldest TAT is reused; an entry whose TAT is in the
+    past is fully refilled, so dropping it loses nothing.
+    """
+
+    SLOT = struct.Struct("<Qd")
+    SLOTS_PER_BUCKET = 8
+    BUCKET_SIZE = SLOT.size * SLOTS_PER_BUCKET
+
+    def __init__(self, path, buckets=RATE_LIMIT_BUCKETS):
+        import fcntl
+        self._fcntl = fcntl
+        self.buckets = buckets
+        size = buckets * self.BUCKET_SIZE
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size != size:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(self._fd).st_size != size:
+                    os.ftruncate(self._fd, 0)
+                    os.ftruncate(self._fd, size)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, size)
+        self._locks = [threading.Lock() for _ in range(64)]
+
+    def update(self, key, now, increment, capacity):
+        bucket = key % self.buckets
+        offset = bucket * self.BUCKET_SIZE
+        fcntl = self._fcntl
+        with self._locks[bucket % len(self._locks)]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, self.BUCKET_SIZE, offset)
+            try:
+                slot = None
+                stored = None
+                victim_tat = None
+                for i in range(self.SLOTS_PER_BUCKET):
+                    position = offset + i * self.SLOT.size
+                    slot_key, slot_tat = self.SLOT.unpack_from(self._map, position)
+                    if slot_key == key:
+                        slot, stored = position, slot_tat
+                        break
+                    # Empty slots first, then the least recently limited client
+                    age = -1.0 if slot_key == 0 else slot_tat
+                    if victim_tat is None or age < victim_tat:
+                        victim, victim_tat = position, age
+                else:
+                    slot = victim
+                allowed, tat = gcra(stored, now, increment, capacity)
+                if allowed:
+                    self.SLOT.pack_into(self._map, slot, key, tat)
+                return allowed, tat
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, self.BUCKET_SIZE, offset)
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+
+
+def client_ip():
+    """Caller's address, looking through RATE_LIMIT_PROXY_HOPS trusted proxies."""
+    if RATE_LIMIT_PROXY_HOPS:
+        forwarded = [part.strip() for part in request.headers.get("X-Forwarded-For", "").split(",") if part.strip()]
+        if len(forwarded) >= RATE_LIMIT_PROXY_HOPS:
+            return forwarded[-RATE_LIMIT_PROXY_HOPS]
+    return request.remote_addr or "unknown"
+
+
+class RateLimiter:
+    """
+    before_request hook enforcing each view's @rate_limit per client IP and route.
+
+    Denials are remembered per process until the client could next succeed,
+    so a client hammering a limited route is turned away with a dict lookup
+    and never touches the shared table. Views without a limit cost one
+    attribute lookup.
+    """
+
+    def __init__(self, storage=None, clock=time.time):
+        self.storage = storage
+        self._clock = clock
+        self._blocked = {}   # key hash -> time the client may next succeed
+
+    def init_app(self, app):
+        if self.storage is None:
+            self.storage = self._default_storage()
+        app.before_request(self.check_request)
+
+    @staticmethod
+    def _default_storage():
+        if RATE_LIMIT_STORAGE_PATH:
+            try:
+                return SharedMemoryStorage(RATE_LIMIT_STORAGE_PATH)
+            except (OSError, ImportError) as e:
+                print(f"[ERROR] Shared rate limit storage unavailable, limiting per process: {e}")
+        return MemoryStorage()
+
+    def hit(self, key, limit, cost=1):
+        """
+        Spend `cost` units of `limit` for key.
+
+        Returns:
+            (allowed, retry_after_seconds)
+        """
+        now = self._clock()
+        key = key_hash(key)
+        blocked_until = self._blocked.get(key)
+        if blocked_until is not None:
+            if blocked_until > now:
+                return False, blocked_until - now
+            self._blocked.pop(key, None)
+
+        allowed, tat = self.storage.update(key, now, cost * limit.interval, limit.capacity)
+        if allowed:
+            return True, 0.0
+        if len(self._blocked) >= 10_000:
+            self._blocked = {k: v for k, v in self._blocked.items() if v > now}
+        # Earliest time even a single unit fits; this request needs cost units
+        self._blocked[key] = tat + limit.interval - limit.capacity
+        return False, tat + cost * limit.interval - limit.capacity - now
+
+    def check_request(self):
+        if not RATE_LIMIT_ENABLED or request.endpoint is None:
+            return None
+        limit = getattr(current_app.view_functions.get(request.endpoint), "rate_limit", None)
+        if limit is None:
+            return None
+
+        allowed, retry_after = self.hit(f"{request.endpoint}|{client_ip()}", limit, limit.request_cost(request))
+        if allowed:
+            return None
+        retry_after = max(1, math.ceil(retry_after))
+        response = jsonify(error="Rate limit exceeded", retry_after=retry_after)
+        response.status_code = 429
+        response.headers["Retry-After"] = str(retry_after)
+        return response
@@ -0,0 +1,196 @@
+import os
+import threading
+import time
+
+# Pooled database connections opened (and tested) before the app reports ready
+READY_DB_CONNECTIONS = int(os.getenv("READY_DB_CONNECTIONS", "2"))
+# Kept-alive connections opened to the camera API during warm-up
+READY_UPSTREAM_CONNECTIONS = int(os.getenv("READY_UPSTREAM_CONNECTIONS", "4"))
+# Most-watched cameras whose snapshots are prefetched; 0 skips the warm-up pass
+READY_WARMUP_CAMERAS = int(os.getenv("READY_WARMUP_CAMERAS", "10"))
+# Seconds the snapshot warm-up may take before the app goes ready without it
+READY_WARMUP_DEADLINE = float(os.getenv("READY_WARMUP_DEADLINE", "15"))
+# Seconds between retries of a failed required check
+READY_RETRY_SECONDS = float(os.getenv("READY_RETRY_SECONDS", "5"))
+
+
+class Check:
+    """
+    One named readiness step.
+
+    Required checks are retried until they pass and gate readiness; warm-up
+    checks run once and are best effort: their result is reported but a
+    failure does not keep the app out of rotation.
+    """
+
+    def __init__(self, name, run, required=True):
+        self.name = name
+        self.run = run
+        self.required = required
+        self.ok = None          # None until it has run
+        self.ms = None
+        self.detail = None
+        self.error = None
+
+    def execute(self, clock=time.monotonic):
+        start = clock()
+        try:
+            self.detail = self.run()
+            self.ok = True
+            self.error = None
+        except Exception as e:
+            self.ok = False
+            self.error = str(e)
+            print(f"[ERROR] Readiness check {self.name} failed: {e}")
+        self.ms = round((clock() - start) * 1000, 1)
+        return self.ok
+
+    def report(self):
+        entry = {"name": self.name, "required": self.required, "ok": self.ok, "ms": self.ms}
+        if self.detail is not None:
+            entry["detail"] = self.detail
+        if self.error is not None:
+            entry["error"] = self.error
+        return entry
+
+
+class Readiness:
+    """
+    Runs the startup checks in order on a background thread and reports
+    whether the process should receive traffic.
+
+    Ready flips once every required check has passed and every warm-up has
+    run (successfully or not), and stays ready afterwards: a dependency going
+    away later is handled per request (circuit breakers, 503s), not by
+    pulling the whole process out of rotation.
+    """
+
+    def __init__(self, checks, retry_seconds=READY_RETRY_SECONDS, clock=time.monotonic):
+        self.checks = checks
+        self.retry_seconds = retry_seconds
+        self._clock = clock
+        self._started_at = None
+        self._ready_ms = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def ready(self):
+        return self._ready_ms is not None
+
+    def run_checks(self):
+        """Run every check, retrying required ones until they pass. Returns readiness."""
+        if self._started_at is None:
+            self._started_at = self._clock()
+        for check in self.checks:
+            while not check.execute(self._clock) and check.required:
+                if self._stop.wait(self.retry_seconds):
+                    return False
+        self._ready_ms = round((self._clock() - self._started_at) * 1000, 1)
+        print(f"[INFO] Ready after {self._ready_ms:.0f}ms")
+        return True
+
+    def start(self):
+        """Start the checks in the background (idempotent)."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run_checks, name="readiness", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def report(self):
+        return {
+            "ready": self.ready,
+            "ready_ms": self._ready_ms,
+            "checks": [check.report() for check in self.checks],
+        }
+
+
+def load_camera_registry():
+    from helpers.camera_index import get_camera_index
+    return {"cameras": len(get_camera_index().cameras)}
+
+
+def prime_db_pool(connections=READY_DB_CONNECTIONS):
+    """Open `connections` pooled connections at once so the first requests do not pay for them."""
+    from sqlalchemy import text
+    from database.db import engine
+    opened = []
+    try:
+        for _ in range(connections):
+            conn = engine.connect()
+            opened.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        # Back into the pool, still connected
+        for conn in opened:
+            conn.close()
+    return {"connections": connections}
+
+
+def prime_upstream_pool(connections=READY_UPSTREAM_CONNECTIONS):
+    from helpers.fetch_image import prime_http_pool
+    answered = prime_http_pool(connections)
+    if not answered:
+        raise RuntimeError("camera API unreachable")
+    return {"connections": answered}
+
+
+def most_watched_addresses(db, limit):
+    """Addresses with the most watchers, busiest first."""
+    from sqlalchemy import func
+    from database.models import Watcher
+    rows = (
+        db.query(Watcher.camera_address, func.count(Watcher.id))
+        .group_by(Watcher.camera_address)
+        .order_by(func.count(Watcher.id).desc())
+        .limit(limit)
+        .all()
+    )
+    return [address for address, _ in rows]
+
+
+def warm_snapshots(limit=READY_WARMUP_CAMERAS, deadline=READY_WARMUP_DEADLINE):
+    """Prefetch snapshots of the most-watched cameras into the snapshot cache."""
+    from database.db import SessionLocal
+    from helpers.camera_images import fetch_camera_images
+    from helpers.camera_index import get_camera_index
+    db = SessionLocal()
+    try:
+        addresses = most_watched_addresses(db, limit)
+    finally:
+        db.close()
+    cameras = get_camera_index().cameras
+    candidates = [(address, cameras[address]["camera_id"]) for address in addresses if address in cameras]
+    images = fetch_camera_images(candidates, len(candidates), int(time.time()), "", deadline) if candidates else []
+    return {"cameras": len(candidates), "prefetched": len(images)}
+
+
+def default_checks():
+    checks = [
+        Check("camera_registry", load_camera_registry),
+        Check("database", prime_db_pool),
+        Check("upstream", prime_upstream_pool, required=False),
+    ]
+    if READY_WARMUP_CAMERAS > 0:
+        checks.append(Check("warm_snapshots", warm_snapshots, required=False))
+    return checks
+
+
+_readiness = None
+_readiness_lock = threading.Lock()
+
+
+def get_readiness():
+    """Process-wide Readiness, with its checks started on first use."""
+    global _readiness
+    if _readiness is None:
+        with _readiness_lock:
+            if _readiness is None:
+                from helpers.shutdown import on_shutdown
+                readiness = Readiness(default_checks())
+                readiness.start()
+                on_shutdown(readiness.stop, name="readiness checks")
+                _readiness = readiness
+    return _readiness
@@ -0,0 +1,137 @@
+import os
+import signal
+import threading
+import time
+from flask import g
+
+# Seconds /readyz reports 503 before the listener closes, so the load balancer
+# stops routing here while the process still accepts connections
+SHUTDOWN_GRACE_SECONDS = float(os.getenv("SHUTDOWN_GRACE_SECONDS", "5"))
+# Seconds in-flight requests get to finish after the listener closes
+SHUTDOWN_DRAIN_SECONDS = float(os.getenv("SHUTDOWN_DRAIN_SECONDS", "20"))
+
+# Shutdown callbacks run phase by phase: first stop producing work, then write
+# out what is buffered, then close connection pools
+STOP = "stop"
+FLUSH = "flush"
+CLOSE = "close"
+PHASES = (STOP, FLUSH, CLOSE)
+
+_callbacks = []    # (phase, name, callback)
+_callbacks_lock = threading.Lock()
+
+
+def on_shutdown(callback, phase=STOP, name=None):
+    """Run callback() during graceful shutdown, in the given phase."""
+    if phase not in PHASES:
+        raise ValueError(f"phase must be one of: {', '.join(PHASES)}")
+    with _callbacks_lock:
+        _callbacks.append((phase, name or getattr(callback, "__qualname__", repr(callback)), callback))
+
+
+def run_shutdown_callbacks():
+    """
+    Run every registered callback once, phase by phase in registration order.
+    A failing callback is logged and does not stop the others.
+
+    Returns:
+        Names of the callbacks that failed.
+    """
+    with _callbacks_lock:
+        callbacks = list(_callbacks)
+        _callbacks.clear()
+    failed = []
+    for phase in PHASES:
+        for callback_phase, name, callback in callbacks:
+            if callback_phase != phase:
+                continue
+            start = time.monotonic()
+            try:
+                callback()
+            except Exception as e:
+                print(f"[ERROR] Shutdown step {name} failed: {e}")
+                failed.append(name)
+                continue
+            print(f"[INFO] Shutdown step {name} took {(time.monotonic() - start) * 1000:.0f}ms")
+    return failed
+
+
+def handle_signals(callback, signals=(signal.SIGTERM, signal.SIGINT)):
+    """
+    Call callback() on the first SIGTERM/SIGINT. A second signal raises
+    KeyboardInterrupt as usual, so a stuck shutdown can still be interrupted.
+    """
+    received = []
+
+    def handler(signum, frame):
+        if received:
+            raise KeyboardInterrupt
+        received.append(signum)
+        print(f"[INFO] Received {signal.Signals(signum).name}, shutting down")
+        callback()
+
+    for signum in signals:
+        signal.signal(signum, handler)
+
+
+class GracefulShutdown:
+    """
+    Request tracking and the drain sequence for the API server.
+
+    shutdown() marks the process as draining (/readyz turns 503), waits the
+    grace period, stops the listener, waits up to the drain deadline for
+    in-flight requests, streamed responses included, to finish, and then runs
+    the on_shutdown() callbacks.
+    """
+
+    def __init__(self, grace_seconds=SHUTDOWN_GRACE_SECONDS, drain_seconds=SHUTDOWN_DRAIN_SECONDS):
+        self.grace_seconds = grace_seconds
+        self.drain_seconds = drain_seconds
+        self.draining = False
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def init_app(self, app):
+        app.before_request(self.track)
+        app.teardown_request(self.untrack)
+
+    def track(self):
+        with self._cond:
+            self.in_flight += 1
+        g.in_flight = True
+
+    def untrack(self, exc=None):
+        if g.pop("in_flight", False):
+            with self._cond:
+                self.in_flight -= 1
+                self._cond.notify_all()
+
+    def wait_for_requests(self, timeout):
+        """Wait until no request is in flight. False if some were still running at the timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.in_flight == 0, timeout)
+
+    def shutdown(self, stop_listening=None):
+        """
+        Drain and clean up.
+
+        Args:
+            stop_listening: Optional callable that closes the server's listening socket
+
+        Returns:
+            True if every in-flight request finished before the deadline.
+        """
+        start = time.monotonic()
+        self.draining = True
+        print(f"[INFO] Draining: {self.in_flight} requests in flight")
+        if self.grace_seconds > 0:
+            time.sleep(self.grace_seconds)
+        if stop_listening is not None:
+            stop_listening()
+        drained = self.wait_for_requests(self.drain_seconds)
+        if not drained:
+            print(f"[WARNING] {self.in_flight} requests still running after {self.drain_seconds:.0f}s, "
+                  f"shutting down anyway")
+        run_shutdown_callbacks()
+        print(f"[INFO] Shutdown finished in {time.monotonic() - start:.1f}s")
+        return drained
@@ -0,0 +1,208 @@
+import os
+import time
+import numpy as np
+from PIL import Image
+
+# Analysis resolution. Frames are decoded straight to this size class via JPEG
+# draft mode, so the full-resolution image is never materialised.
+FRAME_WIDTH = 64
+FRAME_HEIGHT = 48
+
+# CPU seconds one cycle may spend on decode + analysis before deferring the rest
+STATUS_CPU_BUDGET_SECONDS = float(os.getenv("STATUS_CPU_BUDGET_SECONDS", "5"))
+# Vehicle count anomaly score (standard deviations above the time-of-week
+# baseline) at which an otherwise available camera is reported as congested
+STATUS_ANOMALY_THRESHOLD = float(os.getenv("STATUS_ANOMALY_THRESHOLD", "2.5"))
+
+STATUS_AVAILABLE = 'available'
+STATUS_CONGESTED = 'congested'
+STATUS_OFFLINE = 'offline'
+_STATUS_BY_CODE = (STATUS_AVAILABLE, STATUS_CONGESTED, STATUS_OFFLINE)
+
+# Snapshot placeholder for "same frame as last time" (see fetch_camera_frame)
+UNCHANGED = object()
+
+
+def prepare_frame(img, size=(FRAME_WIDTH, FRAME_HEIGHT)):
+    """
+    Turn a fetched PIL image into a small grayscale uint8 array.
+
+    img.draft() lets the JPEG decoder skip most of the IDCT work by decoding
+    at 1/2, 1/4 or 1/8 scale, which is where nearly all the CPU would go.
+    """
+    if img is None:
+        return None
+    try:
+        img.draft('L', (size[0] * 2, size[1] * 2))
+        small = img.convert('L').resize(size, Image.BILINEAR)
+        return np.asarray(small, dtype=np.uint8)
+    except Exception as e:
+        print(f"[WARNING] Could not prepare frame: {e}")
+        return None
+
+
+class CameraStatusEngine:
+    """
+    Classifies every camera as available / congested / offline from snapshots.
+
+    Each camera keeps a rolling background (exponential moving average) of its
+    downsampled grayscale frames. The share of pixels that differ strongly from
+    the background approximates how much of the road is covered by vehicles;
+    a nearly uniform frame means the feed is down or showing a placeholder.
+    All cameras in a cycle are scored together with vectorised NumPy.
+
+    A new status must be seen on `confirm_frames` consecutive cycles before it
+    is reported, so single noisy frames do not flap notifications.
+
+    If `anomaly_score` is given (e.g. TimeOfWeekBaseline.anomaly) it is called
+    with a camera address and returns how unusual the camera's latest vehicle
+    count is for the time of week; a camera that looks available but scores
+    at least `anomaly_threshold` is reported as congested.
+    """
+
+    def __init__(
+        self,
+        frame_size=(FRAME_WIDTH, FRAME_HEIGHT),
+        background_alpha=0.05,
+        foreground_threshold=25,
+        congested_ratio=0.18,
+        offline_std=4.0,
+        confirm_frames=2,
+        cpu_budget=STATUS_CPU_BUDGET_SECONDS,
+        anomaly_score=None,
+        anomaly_threshold=STATUS_ANOMALY_THRESHOLD,
+    ):
+        self.frame_size = frame_size
+        self.background_alpha = background_alpha
+        self.foreground_threshold = foreground_threshold
+        self.congested_ratio = congested_ratio
+        self.offline_std = offline_std
+        self.confirm_frames = confirm_frames
+        self.cpu_budget = cpu_budget
+        self.anomaly_score = anomaly_score
+        self.anomaly_threshold = anomaly_threshold
+
+        self._index = {}
+        self._background = np.zeros((0, frame_size[1], frame_size[0]), dtype=np.float32)
+        self._initialized = np.zeros(0, dtype=bool)
+        self._status = {}
+        self._candidate = {}
+        self._cursor = 0
+        self.last_cycle = {}
+
+    def _slot(self, address):
+        slot = self._index.get(address)
+        if slot is None:
+            slot = len(self._index)
+            self._index[address] = slot
+            shape = (1, self.frame_size[1], self.frame_size[0])
+            self._background = np.concatenate([self._background, np.zeros(shape, dtype=np.float32)])
+            self._initialized = np.append(self._initialized, False)
+        return slot
+
+    def status(self, address):
+        return self._status.get(address, 'unknown')
+
+    def process(self, snapshots):
+        """
+        Run one cycle over a batch of snapshots.
+
+        Args:
+            snapshots: Mapping of camera address -> PIL image (None if the fetch
+                failed or the camera is showing a placeholder, UNCHANGED if the
+                frame is identical to the previous one and needs no analysis)
+
+        Returns:
+            (changes, observed): changes is a list of (address, new_status) for
+            cameras whose confirmed status changed; observed maps every camera
+            analysed this cycle to its current confirmed status.
+        """
+        start_cpu = time.process_time()
+        addresses = list(snapshots)
+        if addresses:
+            # Rotate the starting point so deferred cameras go first next cycle
+            offset = self._cursor % len(addresses)
+            addresses = addresses[offset:] + addresses[:offset]
+
+        frames, slots, frame_addresses, raw = [], [], [], {}
+        deferred = 0
+        for i, address in enumerate(addresses):
+            if i and time.process_time() - start_cpu > self.cpu_budget:
+                deferred = len(addresses) - i
+                self._cursor += i
+                break
+            snapshot = snapshots[address]
+            if snapshot is UNCHANGED:
+                if address in self._status:
+                    raw[address] = self._status[address]
+                continue
+            frame = prepare_frame(snapshot, self.frame_size)
+            if frame is None:
+                raw[address] = STATUS_OFFLINE
+                continue
+            frames.append(frame)
+            slots.append(self._slot(address))
+            frame_addresses.append(address)
+
+        if frames:
+            for address, code in zip(frame_addresses, self._classify(np.stack(frames), np.array(slots))):
+                if code == 0 and self._anomalous(address):
+                    code = 1
+                raw[address] = _STATUS_BY_CODE[code]
+
+        changes = []
+        for address, status in raw.items():
+            if self._confirm(address, status):
+                changes.append((address, status))
+
+        self.last_cycle = {
+            "cameras": len(raw),
+            "deferred": deferred,
+            "changes": len(changes),
+            "cpu_seconds": time.process_time() - start_cpu,
+        }
+        observed = {address: self._status.get(address, 'unknown') for address in raw}
+        return changes, observed
+
+    def _anomalous(self, address):
+        if self.anomaly_score is None:
+            return False
+        score = self.anomaly_score(address)
+        return score is not None and score >= self.anomaly_threshold
+
+    def _classify(self, frames, slots):
+        """Vectorised scoring of an (N, H, W) uint8 stack. Returns status codes."""
+        frames = frames.astype(np.float32)
+        new = ~self._initialized[slots]
+        if new.any():
+            # First frame seeds the background
+            self._background[slots[new]] = frames[new]
+            self._initialized[slots[new]] = True
+
+        background = self._background[slots]
+        foreground = np.abs(frames - background) > self.foreground_threshold
+        foreground_ratio = foreground.mean(axis=(1, 2))
+        spread = frames.std(axis=(1, 2))
+
+        # Adapt the background slowly towards the current frame
+        self._background[slots] = background + self.background_alpha * (frames - background)
+
+        codes = np.where(foreground_ratio >= self.congested_ratio, 1, 0)
+        return np.where(spread < self.offline_std, 2, codes)
+
+    def _confirm(self, address, observed):
+        """Apply hysteresis. Returns True if the confirmed status changed."""
+        current = self._status.get(address)
+        if observed == current:
+            self._candidate.pop(address, None)
+            return False
+
+        candidate, count = self._candidate.get(address, (None, 0))
+        count = count + 1 if candidate == observed else 1
+        # The very first observation of a camera is reported immediately
+        if current is None or count >= self.confirm_frames:
+            self._status[address] = observed
+            self._candidate.pop(address, None)
+            return True
+        self._candidate[address] = (observed, count)
+        return False
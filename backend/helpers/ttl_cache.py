@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Thread-safe memo of computed values that expire after `ttl` seconds.
+
+    get_or_compute() is single-flight: when several requests miss the same key
+    at once, one computes the value and the others wait for it instead of
+    repeating the work. At most max_entries values are kept, least recently
+    used first out.
+    """
+
+    def __init__(self, ttl, max_entries=1024, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (expires_at, value)
+        self._pending = {}              # key -> Event set when its value is stored
+
+    def get(self, key):
+        """Cached value for key, or None if missing or expired."""
+        with self._lock:
+            return self._get(key)
+
+    def _get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= self._clock():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key, compute, keep=None):
+        """
+        Cached value for key, calling compute() to fill it on a miss.
+
+        Args:
+            keep: Optional callable(value) -> bool; values it rejects are
+                returned to this caller but not stored
+
+        Returns:
+            (value, hit) where hit is False only for the caller that computed it.
+        """
+        while True:
+            with self._lock:
+                value = self._get(key)
+                if value is not None:
+                    return value, True
+                pending = self._pending.get(key)
+                if pending is None:
+                    pending = self._pending[key] = threading.Event()
+                    break
+            # Someone else is computing it; wait, then look again
+            pending.wait()
+
+        try:
+            value = compute()
+            if value is not None and (keep is None or keep(value)):
+                self.set(key, value)
+            return value, False
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.set()
+
+    def dump(self):
+        """Unexpired entries as [key, seconds_left, value], least recently used first."""
+        now = self._clock()
+        with self._lock:
+            return [[key, expires_at - now, value]
+                    for key, (expires_at, value) in self._entries.items() if expires_at > now]
+
+    def load(self, entries, elapsed=0.0):
+        """
+        Restore dump() output taken `elapsed` seconds ago. Entries that have
+        expired since are dropped; the rest keep their remaining lifetime.
+
+        Returns:
+            Number of entries restored.
+        """
+        now = self._clock()
+        restored = 0
+        with self._lock:
+            for key, seconds_left, value in entries:
+                seconds_left -= elapsed
+                if seconds_left <= 0:
+                    continue
+                # JSON turns tuple keys into lists
+                key = tuple(key) if isinstance(key, list) else key
+                self._entries[key] = (now + min(seconds_left, self.ttl), value)
+                self._entries.move_to_end(key)
+                restored += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return restored
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,260 @@
+import os
+import queue
+import threading
+import time
+from io import BytesIO
+from datetime import datetime, timezone
+import numpy as np
+from PIL import Image
+
+# Path to a YOLOv8-style ONNX detector (e.g. yolov8n exported with imgsz=320).
+# Vehicle counting is disabled when this is not set.
+VEHICLE_MODEL_PATH = os.getenv("VEHICLE_MODEL_PATH", "")
+VEHICLE_INPUT_SIZE = int(os.getenv("VEHICLE_INPUT_SIZE", "320"))
+VEHICLE_SCORE_THRESHOLD = float(os.getenv("VEHICLE_SCORE_THRESHOLD", "0.35"))
+VEHICLE_MAX_BATCH = int(os.getenv("VEHICLE_MAX_BATCH", "16"))
+VEHICLE_MAX_WAIT_SECONDS = float(os.getenv("VEHICLE_MAX_WAIT_SECONDS", "0.5"))
+VEHICLE_QUEUE_SIZE = int(os.getenv("VEHICLE_QUEUE_SIZE", "256"))
+VEHICLE_THREADS = int(os.getenv("VEHICLE_THREADS", "2"))
+
+# COCO class ids: car, motorcycle, bus, truck
+VEHICLE_CLASSES = (2, 3, 5, 7)
+
+
+def letterbox(img, size=VEHICLE_INPUT_SIZE):
+    """
+    Fit an image (PIL image or JPEG bytes) into a size x size RGB array,
+    padded at the bottom/right.
+
+    Returns:
+        (array, scale, (width, height)): the SxSx3 uint8 input, the factor
+        mapping decoded pixels to input pixels and the decoded size.
+    """
+    if isinstance(img, (bytes, bytearray)):
+        img = Image.open(BytesIO(img))
+    img.draft('RGB', (size, size))
+    img = img.convert('RGB')
+    scale = size / max(img.width, img.height)
+    resized = img.resize((max(1, round(img.width * scale)), max(1, round(img.height * scale))), Image.BILINEAR)
+    canvas = np.full((size, size, 3), 114, dtype=np.uint8)
+    canvas[:resized.height, :resized.width] = np.asarray(resized)
+    return canvas, scale, (img.width, img.height)
+
+
+def nms(boxes, scores, iou_threshold=0.45):
+    """Greedy non-maximum suppression. boxes are (N, 4) x1, y1, x2, y2."""
+    order = scores.argsort()[::-1]
+    keep = []
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        xx1 = np.maximum(boxes[i, 0], boxes[order[1:], 0])
+        yy1 = np.maximum(boxes[i, 1], boxes[order[1:], 1])
+        xx2 = np.minimum(boxes[i, 2], boxes[order[1:], 2])
+        yy2 = np.minimum(boxes[i, 3], boxes[order[1:], 3])
+        inter = np.clip(xx2 - xx1, 0, None) * np.clip(yy2 - yy1, 0, None)
+        iou = inter / (areas[i] + areas[order[1:]] - inter + 1e-9)
+        order = order[1:][iou <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
+
+
+class OnnxVehicleDetector:
+    """
+    Runs a YOLOv8-style ONNX model on CPU with ONNX Runtime.
+
+    Expects input (N, 3, S, S) float32 in [0, 1] and output (N, 4 + classes, anchors).
+    detect_batch returns, per image, an (K, 5) array of x1, y1, x2, y2, score
+    in the letterboxed input's pixel space.
+    """
+
+    def __init__(self, model_path=VEHICLE_MODEL_PATH, score_threshold=VEHICLE_SCORE_THRESHOLD,
+                 threads=VEHICLE_THREADS):
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise RuntimeError("VEHICLE_MODEL_PATH is set but the 'onnxruntime' package is not installed")
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self._session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self._input_name = self._session.get_inputs()[0].name
+        self.score_threshold = score_threshold
+
+    def detect_batch(self, batch):
+        """batch: (N, S, S, 3) uint8."""
+        tensor = batch.transpose(0, 3, 1, 2).astype(np.float32) / 255.0
+        output = self._session.run(None, {self._input_name: tensor})[0]
+        predictions = output.transpose(0, 2, 1)  # (N, anchors, 4 + classes)
+
+        results = []
+        for pred in predictions:
+            scores = pred[:, 4:][:, VEHICLE_CLASSES].max(axis=1)
+            mask = scores >= self.score_threshold
+            if not mask.any():
+                results.append(np.zeros((0, 5), dtype=np.float32))
+                continue
+            cx, cy, w, h = pred[mask, :4].T
+            boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+            keep = nms(boxes, scores[mask])
+            results.append(np.hstack([boxes[keep], scores[mask][keep, None]]).astype(np.float32))
+        return results
+
+
+class InferenceWorker:
+    """
+    Batches snapshots across cameras into single detector calls.
+
+    Producers call submit(), which never blocks: when the bounded queue is full
+    the snapshot is dropped (counted in stats) because a newer one will arrive
+    on the next poll anyway. The worker thread takes the first waiting item,
+    then keeps collecting until it has max_batch items or max_wait seconds
+    have passed, and runs one forward pass for the whole batch.
+
+    Each handler is called once per batch with a list of
+    (address, captured_at, detections) where detections is an (K, 5) array of
+    x1, y1, x2, y2, score normalised to the original frame (0-1).
+    """
+
+    def __init__(self, detector, handlers=(), max_batch=VEHICLE_MAX_BATCH,
+                 max_wait=VEHICLE_MAX_WAIT_SECONDS, queue_size=VEHICLE_QUEUE_SIZE,
+                 input_size=VEHICLE_INPUT_SIZE):
+        self.detector = detector
+        self.handlers = list(handlers)
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.input_size = input_size
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {"submitted": 0, "dropped": 0, "processed": 0, "batches": 0, "frames_per_second": 0.0}
+
+    def submit(self, address, image, captured_at=None):
+        """Queue a snapshot for counting. Returns False if it was dropped."""
+        try:
+            self._queue.put_nowait((address, image, captured_at or datetime.now(timezone.utc)))
+            self.stats["submitted"] += 1
+            return True
+        except queue.Full:
+            self.stats["dropped"] += 1
+            return False
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="vehicle-counter", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=10):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def _next_batch(self):
+        try:
+            first = self._queue.get(timeout=0.5)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            if batch:
+                try:
+                    self.process_batch(batch)
+                except Exception as e:
+                    print(f"[ERROR] Vehicle counting batch failed: {e}")
+
+    def process_batch(self, batch):
+        """Preprocess, run one forward pass and dispatch results. Returns the results."""
+        start = time.perf_counter()
+        inputs, meta = [], []
+        for address, image, captured_at in batch:
+            try:
+                array, scale, (width, height) = letterbox(image, self.input_size)
+            except Exception as e:
+                print(f"[WARNING] Could not prepare {address} for vehicle counting: {e}")
+                continue
+            inputs.append(array)
+            meta.append((address, captured_at, scale, width, height))
+        if not inputs:
+            return []
+
+        detections = self.detector.detect_batch(np.stack(inputs))
+        results = []
+        for (address, captured_at, scale, width, height), boxes in zip(meta, detections):
+            boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 5).copy()
+            # Undo the letterbox: input pixels -> decoded pixels -> 0-1
+            boxes[:, [0, 2]] = np.clip(boxes[:, [0, 2]] / scale / width, 0, 1)
+            boxes[:, [1, 3]] = np.clip(boxes[:, [1, 3]] / scale / height, 0, 1)
+            results.append((address, captured_at, boxes))
+
+        for handler in self.handlers:
+            try:
+                handler(results)
+            except Exception as e:
+                print(f"[ERROR] Vehicle count handler failed: {e}")
+
+        elapsed = time.perf_counter() - start
+        self.stats["processed"] += len(results)
+        self.stats["batches"] += 1
+        self.stats["frames_per_second"] = len(results) / elapsed if elapsed > 0 else 0.0
+        return results
+
+
+class VehicleCountRecorder:
+    """Batch handler that stores one count per snapshot next to the status history."""
+
+    def __init__(self, session_factory=None):
+        if session_factory is None:
+            from database.db import SessionLocal
+            session_factory = SessionLocal
+        self._session_factory = session_factory
+        self._keys = {}
+
+    def __call__(self, results):
+        from database.history import camera_keys, record_vehicle_counts
+        db = self._session_factory()
+        try:
+            missing = [address for address, _, _ in results if address not in self._keys]
+            if missing:
+                self._keys.update(camera_keys(db, missing))
+            record_vehicle_counts(db, [
+                (self._keys[address], captured_at, len(boxes))
+                for address, captured_at, boxes in results
+                if address in self._keys
+            ])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+def create_vehicle_counter(handlers=None, model_path=VEHICLE_MODEL_PATH):
+    """
+    Build and start the inference worker, or return None when no model is configured.
+
+    Counts are stored with VehicleCountRecorder unless other handlers are given.
+    """
+    if not model_path:
+        return None
+    detector = OnnxVehicleDetector(model_path)
+    worker = InferenceWorker(detector, handlers if handlers is not None else [VehicleCountRecorder()])
+    worker.start()
+    print(f"[INFO] Vehicle counting enabled with {model_path} "
+          f"(batch {worker.max_batch}, wait {worker.max_wait}s)")
+    return worker
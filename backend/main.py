@@ -8,40 +8,89 @@ Author: Parking Spotter Team
 License: MIT
 """
 
-from flask import Flask, send_from_directory
-from flask_cors import CORS
+import os
+import sys
+import time
+
+_started = time.perf_counter()
+
 from dotenv import load_dotenv
-from routes import register_routes
-from waitress import serve
-from database.db import init_db
 
-# Initialize Flask application
-app = Flask(__name__)
+# Load environment variables from .env file (development) or system (production)
+# before any module reads its settings at import time
+load_dotenv()
+
+from flask import Flask
+from flask_cors import CORS
+from helpers.http_cache import apply_cache_policy
+
+# Seconds importing and building the app may take before a warning is logged;
+# see scripts/profile_startup.py for where the time goes
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "1.5"))
 
-# Enable CORS for cross-origin requests from mobile app
-CORS(app)
 
-@app.after_request
 def add_cache_headers(response):
     """
-    Add cache control headers to all responses.
-    Helps improve performance by allowing browsers to cache static content.
+    Apply each route's cache policy (see helpers/http_cache.py).
+    Cacheable GETs get ETags and 304 responses; POST results and watch
+    mutations are never stored.
     """
-    if 'Cache-Control' not in response.headers:
-        response.headers['Cache-Control'] = 'public, max-age=60'  # Cache for 1 minute
-    return response
+    return apply_cache_policy(response)
 
-# Load environment variables from .env file (development) or system (production)
-load_dotenv()
 
-# Initialize database connection and create tables if needed
-print("Initializing database...")
-init_db()
+def create_app():
+    """
+    Build the API application.
+
+    Nothing here touches the database or the camera API, so a worker starts
+    even while Postgres is unavailable; schema changes are a separate step
+    (`python main.py migrate`). Heavy libraries (Pillow, numpy, googlemaps,
+    psutil) are imported on first use rather than at startup.
+    """
+    app = Flask(__name__)
+
+    # Enable CORS for cross-origin requests from mobile app
+    CORS(app)
+    app.after_request(add_cache_headers)
+
+    # Register all API route blueprints
+    from routes import register_routes
+    register_routes(app)
 
-# Register all API route blueprints
-register_routes(app)
+    elapsed = time.perf_counter() - _started
+    if elapsed > STARTUP_BUDGET_SECONDS:
+        print(f"[WARNING] Startup took {elapsed:.2f}s, over the {STARTUP_BUDGET_SECONDS:.2f}s budget; "
+              f"run scripts/profile_startup.py to see which imports are slow")
+    else:
+        print(f"[INFO] Startup took {elapsed:.2f}s")
+    return app
+
+
+def migrate():
+    """
+    Create any missing tables and the history partitions inserts need right
+    away. Run once per deploy, before starting servers.
+    """
+    from database.db import SessionLocal, init_db
+    from database.history import ensure_partitions
+    print("Initializing database...")
+    init_db()
+    # Partitioned parents reject every insert until a partition covers the row
+    db = SessionLocal()
+    try:
+        ensure_partitions(db)
+    finally:
+        db.close()
+    print("Database schema is up to date")
+
+
+app = create_app()
 
 if __name__ == "__main__":
+    if sys.argv[1:] == ["migrate"]:
+        migrate()
+        sys.exit(0)
+
     """
     Start the production WSGI server.
     
@@ -49,6 +98,50 @@ if __name__ == "__main__":
     - Multiple concurrent requests
     - Proper HTTP protocol implementation
     - Security features like request size limits
+
+    SIGTERM (or Ctrl+C) shuts down gracefully: /readyz turns 503, the listener
+    closes, in-flight requests finish, then background work is stopped,
+    caches are saved and connection pools are closed (helpers/shutdown.py).
+    A second signal exits at once.
     """
+    import _thread
+    import threading
+    from waitress import create_server, wasyncore
+    from database.db import engine
+    from helpers.cache_persistence import CacheSaver, restore_caches
+    from helpers.readiness import get_readiness
+    from helpers.shutdown import CLOSE, FLUSH, handle_signals, on_shutdown
+    from routes import graceful_shutdown
+
+    # Pick up where the previous process left off, then keep the snapshot fresh
+    restore_caches()
+    cache_saver = CacheSaver()
+    cache_saver.start()
+    on_shutdown(cache_saver.stop, FLUSH, name="cache snapshot")
+    on_shutdown(engine.dispose, CLOSE, name="database pool")
+    # Warm up while waitress starts; /readyz reports 503 until this finishes
+    get_readiness()
+
+    server = create_server(app, host="0.0.0.0", port=8000)
+
+    def stop_listening():
+        # Waitress is not thread safe: close the socket from its own loop
+        server.trigger.pull_trigger(lambda: wasyncore.dispatcher.close(server))
+
+    finished = threading.Event()
+
+    def shut_down():
+        graceful_shutdown.shutdown(stop_listening)
+        finished.set()
+        # Counts as the second signal, which ends server.run() below
+        _thread.interrupt_main()
+
+    handle_signals(lambda: threading.Thread(target=shut_down, name="shutdown", daemon=True).start())
     print("Starting HTTP server on http://0.0.0.0:8000")
-    serve(app, host="0.0.0.0", port=8000)
+    try:
+        server.run()
+    except KeyboardInterrupt:
+        pass
+    print("Server stopped")
+    # Non-zero only when a second signal cut the shutdown short
+    sys.exit(0 if finished.is_set() else 1)
@@ -1,24 +1,34 @@
-from routes.five_nearest import bp as five_nearest_bp
-from routes.watch_camera import bp as watch_camera_bp
-from routes.direct_camera_search import bp as direct_camera_search_bp
-from flask import Blueprint, request
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
+from helpers.admission import AdmissionControl
+from helpers.rate_limit import RateLimiter
+from helpers.shutdown import GracefulShutdown
 
-limiter = Limiter(
-    key_func=get_remote_address,
-    default_limits=["200 per day", "50 per hour"]
-)
+# Enforces each view's @rate_limit per client IP and route
+limiter = RateLimiter()
+# Enforces each view's @admission concurrency limit; runs after the rate limiter
+admission_control = AdmissionControl()
+# Tracks in-flight requests so shutdown can drain them; /readyz fails while draining
+graceful_shutdown = GracefulShutdown()
 
 def register_routes(app):
+    # Imported here so that importing one route module (e.g. watch_camera from
+    # the WebSocket server) does not load every route and its dependencies
+    from routes.five_nearest import bp as five_nearest_bp
+    from routes.watch_camera import bp as watch_camera_bp
+    from routes.direct_camera_search import bp as direct_camera_search_bp
+    from routes.camera_baseline import bp as camera_baseline_bp
+    from routes.route_cameras import bp as route_cameras_bp
+    from routes.snapshots import bp as snapshots_bp
+    from routes.nearest_cell import bp as nearest_cell_bp
+    from routes.health import bp as health_bp
+
+    graceful_shutdown.init_app(app)
+    limiter.init_app(app)
+    admission_control.init_app(app)
     app.register_blueprint(five_nearest_bp)
     app.register_blueprint(watch_camera_bp)
     app.register_blueprint(direct_camera_search_bp)
-
-# Apply rate limiting to our routes
-@limiter.limit("1 per second")
-@five_nearest_bp.before_request
-@watch_camera_bp.before_request
-@direct_camera_search_bp.before_request
-def limit_request_rate():
-    pass
+    app.register_blueprint(camera_baseline_bp)
+    app.register_blueprint(route_cameras_bp)
+    app.register_blueprint(snapshots_bp)
+    app.register_blueprint(nearest_cell_bp)
+    app.register_blueprint(health_bp)
@@ -0,0 +1,68 @@
+import math
+from datetime import datetime, timezone
+from flask import Blueprint, jsonify
+from database.db import SessionLocal
+from database.history import count_baseline
+from helpers.camera_dataset import get_cameras
+from helpers.http_cache import cache_policy, short_lived
+
+bp = Blueprint('camera_baseline', __name__)
+
+
+def _bin_json(dow, hour, samples, mean, variance):
+    return {
+        "dow": dow,
+        "hour": hour,
+        "samples": samples,
+        "mean": round(mean, 2),
+        "std": round(math.sqrt(max(variance, 0.0)), 2),
+    }
+
+
+@bp.get("/cameras/<address>/baseline")
+@cache_policy(short_lived(60))
+def camera_baseline(address):
+    """
+    Typical vehicle counts for a camera by local hour of week, plus how the
+    latest count compares with the current hour's baseline.
+    """
+    # numpy is only needed here, not at startup
+    from helpers.baseline import BASELINE_MIN_SAMPLES, BASELINE_MIN_STD, BASELINE_TIMEZONE, time_of_week
+
+    if address not in get_cameras():
+        return jsonify(error="Camera not found"), 404
+
+    db = SessionLocal()
+    try:
+        bins, latest = count_baseline(db, address)
+    except Exception as e:
+        print(f"[ERROR] Failed to load baseline for {address}: {e}")
+        return jsonify(error="Failed to load baseline"), 500
+    finally:
+        db.close()
+
+    profile = [_bin_json(*row) for row in bins]
+    by_bin = {(item["dow"], item["hour"]): row for item, row in zip(profile, bins)}
+
+    dow, hour = time_of_week(datetime.now(timezone.utc))
+    current = by_bin.get((dow, hour))
+    response = {
+        "address": address,
+        "timezone": BASELINE_TIMEZONE.key,
+        "profile": profile,
+        "current": _bin_json(*current) if current else None,
+        "latest": None,
+    }
+
+    if latest is not None:
+        recorded_at, vehicle_count = latest
+        score = None
+        if current and current[2] >= BASELINE_MIN_SAMPLES:
+            std = max(math.sqrt(max(current[4], 0.0)), BASELINE_MIN_STD)
+            score = round((vehicle_count - current[3]) / std, 2)
+        response["latest"] = {
+            "recorded_at": recorded_at.isoformat(),
+            "vehicle_count": vehicle_count,
+            "anomaly_score": score,
+        }
+    return jsonify(response)
@@ -1,25 +1,20 @@
 import os
-from dotenv import load_dotenv
 import time
-import json
-import uuid
 from flask import Blueprint, request, jsonify
-from PIL import Image
-import googlemaps
-from helpers.fetch_image import fetch_and_save_image
-from helpers.get_nearby_cameras import find_nearby_cameras
-from routes.five_nearest import cleanup_old_dirs
-
-# Load environment variables from .env file
-load_dotenv()
+from helpers.camera_images import cleanup_old_snapshots, fetch_camera_images, requested_stream_format, stream_camera_images
+from helpers.camera_index import get_camera_index
+from helpers.admission import ADMISSION_IMAGE_BUDGET, ADMISSION_IMAGE_CONCURRENCY, ADMISSION_IMAGE_QUEUE, admission
+from helpers.rate_limit import RATE_LIMIT_CAMERAS_BURST, RATE_LIMIT_CAMERAS_PER_MINUTE, camera_request_cost, rate_limit
+from helpers.geocoding import geocode
 
 bp = Blueprint('direct_camera_search', __name__)
 BASE_URL = os.getenv("BACKEND_URL", "http://localhost:8000")  # Default to localhost if not set
 GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY")
 
 
-
 @bp.post("/search_cameras")
+@rate_limit(RATE_LIMIT_CAMERAS_PER_MINUTE, RATE_LIMIT_CAMERAS_BURST, cost=camera_request_cost)
+@admission(ADMISSION_IMAGE_CONCURRENCY, ADMISSION_IMAGE_QUEUE, ADMISSION_IMAGE_BUDGET, degrade=False)
 def search_cameras():
     data = request.get_json()
     
@@ -44,21 +39,19 @@ def search_cameras():
     if not isinstance(addresses, list) or len(addresses) == 0:
         return jsonify(error="Must provide at least one address"), 400
 
+    # Optional NDJSON / SSE streaming of each image as soon as it is ready
+    try:
+        stream = requested_stream_format(data)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
     if not GOOGLE_MAPS_API_KEY:
         return jsonify(error="Google Maps API key not configured on server"), 500
+    import googlemaps
     gmaps = googlemaps.Client(key=GOOGLE_MAPS_API_KEY)
 
-    # Load camera data
-    with open("camera_id_lat_lng_wiped.json", "r") as f:
-        camera_data = json.load(f)
-    
-    # Create a unique directory for this request
-    request_id = str(uuid.uuid4())
-    img_dir = os.path.join("static", "imgs", request_id)
-    os.makedirs(img_dir, exist_ok=True)
-    
-    # Clean up old request directories
-    cleanup_old_dirs()
+    # Drop snapshot files nobody has been served for a while
+    cleanup_old_snapshots()
 
     stamp = int(time.time())
     all_nearby_cameras = {}
@@ -67,16 +60,15 @@ def search_cameras():
     for addr in addresses:
         try:
             # Geocode the address to get its latitude and longitude
-            geocode_result = gmaps.geocode(addr)
-            if not geocode_result:
+            location = geocode(gmaps, addr)
+            if not location:
                 print(f"[WARNING] Could not geocode address: {addr}")
                 continue
 
-            search_lat = geocode_result[0]['geometry']['location']['lat']
-            search_lng = geocode_result[0]['geometry']['location']['lng']
+            search_lat, search_lng = location
 
             # Find nearby cameras around this geocoded location
-            nearby_cameras = find_nearby_cameras(search_lat, search_lng, "camera_id_lat_lng_wiped.json")
+            nearby_cameras = get_camera_index().nearby(search_lat, search_lng)
             if nearby_cameras:
                 # Merge with existing cameras (avoid duplicates)
                 for camera_addr, camera_info in nearby_cameras.items():
@@ -94,32 +86,12 @@ def search_cameras():
     if not all_nearby_cameras:
         return jsonify(error="No cameras found near the searched addresses"), 404
 
-    output = []
-    
-    # Process up to numCams cameras from all nearby results
-    for addr, info in list(all_nearby_cameras.items())[:numCams]:
-        try:
-            img = fetch_and_save_image(info["camera_id"], stamp)
-            if img and img.width > 640:
-                h = img.height * 640 // img.width
-                img = img.resize((640, h), Image.LANCZOS)
-
-            if img:
-                filename = f"{stamp}_{addr.replace(' ', '_')}.jpg"
-                path = os.path.join(img_dir, filename)
-                with open(path, 'wb') as f:
-                    img.save(f, format="JPEG", quality=70, optimize=True)
-                    f.flush()
-                    os.fsync(f.fileno())
-
-                output.append({
-                    "address": addr,
-                    "url": f"{BASE_URL}/static/imgs/{request_id}/{filename}"
-                })
-            else:
-                print(f"[ERROR] No image returned for {addr}")
-        except Exception as e:
-            print(f"[ERROR] Failed to fetch/process image for {addr}: {e}")
+    # Up to numCams images from all nearby results, backfilling failed cameras
+    candidates = [(addr, info["camera_id"]) for addr, info in all_nearby_cameras.items()]
+    if stream:
+        return stream_camera_images(stream, candidates, numCams, stamp, BASE_URL)
+
+    output = fetch_camera_images(candidates, numCams, stamp, BASE_URL)
 
     if not output:
         return jsonify(error="No valid camera images could be retrieved"), 404
@@ -1,11 +1,11 @@
 import os
 import time
-import uuid
 from flask import Blueprint, request, jsonify
-from PIL import Image
-from helpers.fetch_image import fetch_and_save_image
-from helpers.get_nearby_cameras import find_nearby_cameras
-import psutil
+from helpers.camera_images import cleanup_old_snapshots, fetch_camera_images, requested_stream_format, stream_camera_images
+from helpers.camera_ranking import RANK_MODES, get_camera_scores, rank_cameras
+from helpers.camera_index import get_camera_index
+from helpers.admission import ADMISSION_IMAGE_BUDGET, ADMISSION_IMAGE_CONCURRENCY, ADMISSION_IMAGE_QUEUE, admission
+from helpers.rate_limit import RATE_LIMIT_CAMERAS_BURST, RATE_LIMIT_CAMERAS_PER_MINUTE, camera_request_cost, rate_limit
 import os
 import inspect 
 
@@ -26,27 +26,11 @@ def is_within_nyc(lat: float, lng: float) -> bool:
             NYC_BOUNDS["lng_min"] <= lng <= NYC_BOUNDS["lng_max"])
 
 def log_memory(label=""):
+    import psutil
     proc = psutil.Process(os.getpid())
     mem = proc.memory_info().rss / 1024 / 1024  # in MB
     print(f"[{label}] Memory usage: {mem:.2f} MB")
 
-def cleanup_old_dirs():
-    """Clean up directories older than 5 minutes"""
-    base_dir = os.path.join("static", "imgs")
-    now = time.time()
-    if os.path.exists(base_dir):
-        for dir_name in os.listdir(base_dir):
-            dir_path = os.path.join(base_dir, dir_name)
-            if os.path.isdir(dir_path):
-                # Check if directory is older than 5 minutes
-                if now - os.path.getctime(dir_path) > 300:  # 300 seconds = 5 minutes
-                    try:
-                        for f in os.listdir(dir_path):
-                            os.remove(os.path.join(dir_path, f))
-                        os.rmdir(dir_path)
-                    except Exception as e:
-                        print(f"Failed to cleanup directory {dir_path}: {e}")
-
 @bp.before_app_request
 def log_headers():
     print("BASE_URL is:", BASE_URL)
@@ -55,6 +39,8 @@ def log_headers():
         print(f"{h}: {v}")
 
 @bp.post("/fiveNearest")
+@rate_limit(RATE_LIMIT_CAMERAS_PER_MINUTE, RATE_LIMIT_CAMERAS_BURST, cost=camera_request_cost)
+@admission(ADMISSION_IMAGE_CONCURRENCY, ADMISSION_IMAGE_QUEUE, ADMISSION_IMAGE_BUDGET, degrade=True)
 def fiveNearest():
     print(f"Above is for the {inspect.stack()[1][3]} endpoint")
     
@@ -88,43 +74,36 @@ def fiveNearest():
     if numCams < 1 or numCams > 8:  # Set reasonable limits
         return jsonify(error="numCams must be between 1 and 8"), 400
 
-    # Create a unique directory for this request
-    request_id = str(uuid.uuid4())
-    img_dir = os.path.join("static", "imgs", request_id)
-    os.makedirs(img_dir, exist_ok=True)
-    
-    # Clean up old request directories in the background
-    cleanup_old_dirs()
+    # "distance" (default) or "likelihood" to favour cameras likely to show parking
+    rank = data.get("rank", "distance")
+    if rank not in RANK_MODES:
+        return jsonify(error=f"rank must be one of: {', '.join(RANK_MODES)}"), 400
+
+    # Optional NDJSON / SSE streaming of each image as soon as it is ready
+    try:
+        stream = requested_stream_format(data)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
 
-    cameras = find_nearby_cameras(lat, lng, "camera_id_lat_lng_wiped.json")
+    # Drop snapshot files nobody has been served for a while
+    cleanup_old_snapshots()
+
+    cameras = get_camera_index().nearby(lat, lng)
     if not cameras:
         return jsonify(error="no cameras nearby"), 404
 
+    if rank == "likelihood":
+        cameras = rank_cameras(cameras, get_camera_scores())
+
     log_memory("after image fetch")
 
     stamp = int(time.time())
-    output = []
-
-    for addr, info in list(cameras.items())[:numCams]:
-        try:
-            img = fetch_and_save_image(info["camera_id"], stamp)
-            if img.width > 640:
-                h = img.height * 640 // img.width
-                img = img.resize((640, h), Image.LANCZOS)
-
-            filename = f"{stamp}_{addr.replace(' ', '_')}.jpg"
-            path = os.path.join(img_dir, filename)
-            with open(path, 'wb') as f:
-                img.save(f, format="JPEG", quality=70, optimize=True)
-                f.flush()
-                os.fsync(f.fileno())
-
-            output.append({
-                "address": addr,
-                "url": f"{BASE_URL}/static/imgs/{request_id}/{filename}"
-            })
-        except Exception as e:
-            print(f"[ERROR] Failed for {addr}: {e}")
+    # All nearby cameras, best first: failed ones are backfilled from the rest
+    candidates = [(addr, info["camera_id"]) for addr, info in cameras.items()]
+    if stream:
+        return stream_camera_images(stream, candidates, numCams, stamp, BASE_URL)
+
+    output = fetch_camera_images(candidates, numCams, stamp, BASE_URL)
 
     log_memory("before return")
     print(f"Request took {time.time() - start:.2f} seconds")
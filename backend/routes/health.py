@@ -0,0 +1,28 @@
+from flask import Blueprint, jsonify
+from helpers.http_cache import NO_STORE, cache_policy
+from helpers.readiness import get_readiness
+from routes import graceful_shutdown
+
+bp = Blueprint('health', __name__)
+
+
+@bp.get("/healthz")
+@cache_policy(NO_STORE)
+def healthz():
+    """Liveness: the process is up and serving requests. Checks nothing else."""
+    return jsonify(status="ok")
+
+
+@bp.get("/readyz")
+@cache_policy(NO_STORE)
+def readyz():
+    """
+    Readiness: 200 once the camera registry is loaded, the database pool is
+    primed and the warm-up pass has run, 503 until then and again once
+    shutdown has begun. Lists every check with how long it took.
+    """
+    report = get_readiness().report()
+    if graceful_shutdown.draining:
+        report["ready"] = False
+        report["draining"] = True
+    return jsonify(report), 200 if report["ready"] else 503
@@ -0,0 +1,149 @@
+import os
+import time
+from flask import Blueprint, jsonify, redirect, request, url_for
+from helpers import geohash
+from helpers.camera_images import cleanup_old_snapshots, fetch_camera_images
+from helpers.camera_index import get_camera_index
+from helpers.http_cache import NO_STORE, REVALIDATE, cache_policy, response_cache_policy, short_lived
+from helpers.cache_persistence import persistent_cache
+from helpers.admission import ADMISSION_IMAGE_BUDGET, ADMISSION_IMAGE_CONCURRENCY, ADMISSION_IMAGE_QUEUE, admission, cached_only
+from helpers.rate_limit import RATE_LIMIT_CAMERAS_BURST, RATE_LIMIT_CAMERAS_PER_MINUTE, camera_request_cost, rate_limit
+from helpers.ttl_cache import TTLCache
+from routes.five_nearest import is_within_nyc
+
+bp = Blueprint('nearest_cell', __name__)
+BASE_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
+
+# Geohash length locations are snapped to; 7 is a cell of roughly 150 x 150 m
+NEAREST_GEOHASH_PRECISION = int(os.getenv("NEAREST_GEOHASH_PRECISION", "7"))
+MIN_PRECISION = 5
+MAX_PRECISION = 8
+# Seconds a cell's cameras and image URLs are reused, server-side and by HTTP caches
+NEAREST_CACHE_SECONDS = int(os.getenv("NEAREST_CACHE_SECONDS", "30"))
+NEAREST_CACHE_CELLS = int(os.getenv("NEAREST_CACHE_CELLS", "2048"))
+# Extra nearby cameras to fall back on when some of the nearest fail
+NEAREST_BACKFILL_CAMERAS = 8
+
+_results = TTLCache(NEAREST_CACHE_SECONDS, max_entries=NEAREST_CACHE_CELLS)
+persistent_cache("nearest_cells", _results.dump, _results.load)
+
+
+def parse_num_cams(value):
+    """numCams query argument (default 5). Raises ValueError if not 1-8."""
+    try:
+        numCams = int(value if value is not None else 5)
+    except (ValueError, TypeError):
+        raise ValueError("numCams must be a valid integer")
+    if numCams < 1 or numCams > 8:
+        raise ValueError("numCams must be between 1 and 8")
+    return numCams
+
+
+def cell_cameras(cell, numCams):
+    """
+    Cameras nearest the cell's centre, and snapshot URLs for the first
+    numCams of them that return an image.
+    """
+    lat, lng = geohash.center(cell)
+    index = get_camera_index()
+    nearest = index.nearest(lat, lng, numCams + NEAREST_BACKFILL_CAMERAS)
+
+    cameras = []
+    for address, distance_km in nearest:
+        info = index.cameras[address]
+        cameras.append({
+            "address": address,
+            "lat": info["latitude"],
+            "lng": info["longitude"],
+            "distance_m": round(distance_km * 1000),
+        })
+
+    cleanup_old_snapshots()
+    stamp = int(time.time())
+    candidates = [(camera["address"], index.cameras[camera["address"]]["camera_id"]) for camera in cameras]
+    images = fetch_camera_images(candidates, numCams, stamp, BASE_URL)
+
+    return {
+        "cell": cell,
+        "center": {"lat": lat, "lng": lng},
+        "cameras": cameras,
+        "images": images,
+    }
+
+
+def is_complete(result, numCams):
+    """Whether every camera that could have supplied an image did."""
+    return len(result["images"]) >= min(numCams, len(result["cameras"]))
+
+
+@bp.get("/nearest")
+def nearest():
+    """Snap ?lat=&lng= to its geohash cell and redirect to that cell's URL."""
+    try:
+        lat = float(request.args["lat"])
+        lng = float(request.args["lng"])
+    except KeyError:
+        return jsonify(error="Missing latitude or longitude"), 400
+    except ValueError:
+        return jsonify(error="Invalid latitude or longitude format"), 400
+    if not is_within_nyc(lat, lng):
+        return jsonify(error="Location must be within NYC boundaries"), 400
+
+    try:
+        precision = int(request.args.get("precision", NEAREST_GEOHASH_PRECISION))
+    except ValueError:
+        return jsonify(error="precision must be a valid integer"), 400
+    if precision < MIN_PRECISION or precision > MAX_PRECISION:
+        return jsonify(error=f"precision must be between {MIN_PRECISION} and {MAX_PRECISION}"), 400
+
+    try:
+        numCams = parse_num_cams(request.args.get("numCams"))
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+    cell = geohash.encode(lat, lng, precision)
+    return redirect(url_for("nearest_cell.nearest_in_cell", cell=cell, numCams=numCams))
+
+
+@bp.get("/nearest/<cell>")
+@cache_policy(short_lived(NEAREST_CACHE_SECONDS))
+@rate_limit(RATE_LIMIT_CAMERAS_PER_MINUTE, RATE_LIMIT_CAMERAS_BURST, cost=camera_request_cost)
+@admission(ADMISSION_IMAGE_CONCURRENCY, ADMISSION_IMAGE_QUEUE, ADMISSION_IMAGE_BUDGET, degrade=True)
+def nearest_in_cell(cell):
+    """
+    Nearest cameras and their images for a geohash cell.
+
+    Everyone inside the cell gets the same URL and the same answer, so it is
+    computed once per cell per NEAREST_CACHE_SECONDS and can be cached by
+    browsers and CDNs for as long. Answers missing images are neither.
+    """
+    cell = cell.lower()
+    if not MIN_PRECISION <= len(cell) <= MAX_PRECISION:
+        return jsonify(error=f"cell must be a geohash of {MIN_PRECISION}-{MAX_PRECISION} characters"), 400
+    try:
+        lat, lng = geohash.center(cell)
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    if not is_within_nyc(lat, lng):
+        return jsonify(error="Location must be within NYC boundaries"), 400
+
+    try:
+        numCams = parse_num_cams(request.args.get("numCams"))
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+    if cached_only():
+        # Shed: a fresh answer if there is one, else cached images only, not
+        # memoised. Either way no shared cache may keep serving it once the
+        # load is gone.
+        response_cache_policy(NO_STORE)
+        result = _results.get((cell, numCams)) or cell_cameras(cell, numCams)
+    else:
+        result, _ = _results.get_or_compute((cell, numCams), lambda: cell_cameras(cell, numCams),
+                                            keep=lambda result: is_complete(result, numCams))
+        if not is_complete(result, numCams):
+            # Cameras failed or ran out of time: the next request retries them
+            response_cache_policy(REVALIDATE)
+    if not result["cameras"]:
+        return jsonify(error="no cameras nearby"), 404
+    return jsonify(result)
@@ -0,0 +1,89 @@
+import os
+import time
+from flask import Blueprint, request, jsonify
+from helpers.camera_index import get_camera_index
+from helpers.camera_images import cleanup_old_snapshots, fetch_camera_images
+from helpers.admission import ADMISSION_IMAGE_BUDGET, ADMISSION_IMAGE_CONCURRENCY, ADMISSION_IMAGE_QUEUE, admission
+from helpers.rate_limit import RATE_LIMIT_CAMERAS_BURST, RATE_LIMIT_CAMERAS_PER_MINUTE, camera_request_cost, rate_limit
+from routes.five_nearest import is_within_nyc
+
+bp = Blueprint('route_cameras', __name__)
+BASE_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
+
+DEFAULT_CORRIDOR_METERS = 150
+MAX_CORRIDOR_METERS = 1000
+MAX_WAYPOINTS = 500
+
+
+def parse_point(point):
+    """Accept {"lat": .., "lng": ..} or [lat, lng]. Returns (lat, lng) or None."""
+    try:
+        if isinstance(point, dict):
+            return float(point["lat"]), float(point["lng"])
+        lat, lng = point
+        return float(lat), float(lng)
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+@bp.post("/route_cameras")
+@rate_limit(RATE_LIMIT_CAMERAS_PER_MINUTE, RATE_LIMIT_CAMERAS_BURST, cost=camera_request_cost)
+@admission(ADMISSION_IMAGE_CONCURRENCY, ADMISSION_IMAGE_QUEUE, ADMISSION_IMAGE_BUDGET, degrade=True)
+def route_cameras():
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify(error="Missing route"), 400
+
+    # Either a full polyline or just its two ends
+    raw_points = data.get("waypoints")
+    if raw_points is None and "start" in data and "end" in data:
+        raw_points = [data["start"], data["end"]]
+    if not isinstance(raw_points, list) or len(raw_points) < 2:
+        return jsonify(error="Provide waypoints (at least two points) or start and end"), 400
+    if len(raw_points) > MAX_WAYPOINTS:
+        return jsonify(error=f"At most {MAX_WAYPOINTS} waypoints are allowed"), 400
+
+    waypoints = [parse_point(point) for point in raw_points]
+    if any(point is None for point in waypoints):
+        return jsonify(error="Invalid waypoint; use {\"lat\": .., \"lng\": ..} or [lat, lng]"), 400
+    if not all(is_within_nyc(lat, lng) for lat, lng in waypoints):
+        return jsonify(error="Route must be within NYC boundaries"), 400
+
+    try:
+        corridor = float(data.get("corridor", DEFAULT_CORRIDOR_METERS))
+    except (ValueError, TypeError):
+        return jsonify(error="corridor must be a number of meters"), 400
+    if corridor <= 0 or corridor > MAX_CORRIDOR_METERS:
+        return jsonify(error=f"corridor must be between 1 and {MAX_CORRIDOR_METERS} meters"), 400
+
+    try:
+        numCams = int(data.get("numCams", 5))
+    except (ValueError, TypeError):
+        return jsonify(error="numCams must be a valid integer"), 400
+    if numCams < 1 or numCams > 8:
+        return jsonify(error="numCams must be between 1 and 8"), 400
+
+    index = get_camera_index()
+    matches = index.along_route(waypoints, corridor / 1000)
+    if not matches:
+        return jsonify(error="No cameras found along the route"), 404
+
+    cameras = []
+    for address, distance_km, along_km in matches:
+        info = index.cameras[address]
+        cameras.append({
+            "address": address,
+            "lat": info["latitude"],
+            "lng": info["longitude"],
+            "distance_m": round(distance_km * 1000),
+            "along_route_m": round(along_km * 1000),
+        })
+
+    # Images for the first numCams cameras along the route
+    cleanup_old_snapshots()
+
+    stamp = int(time.time())
+    candidates = [(camera["address"], index.cameras[camera["address"]]["camera_id"]) for camera in cameras]
+    output = fetch_camera_images(candidates, numCams, stamp, BASE_URL)
+
+    return jsonify(cameras=cameras, images=output)
@@ -0,0 +1,26 @@
+import os
+import re
+from flask import Blueprint, jsonify, send_file
+from helpers.camera_images import snapshot_path
+from helpers.http_cache import IMMUTABLE, IMMUTABLE_MAX_AGE, cache_policy
+
+bp = Blueprint('snapshots', __name__)
+
+DIGEST_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+
+@bp.get("/snapshots/<digest>.jpg")
+@cache_policy(IMMUTABLE)
+def snapshot(digest):
+    """
+    Serve a content-addressed camera snapshot.
+
+    The file name is the hash of its bytes, so the content behind a URL never
+    changes: it is cacheable forever and the hash doubles as the ETag.
+    """
+    if not DIGEST_PATTERN.fullmatch(digest):
+        return jsonify(error="Snapshot not found"), 404
+    path = os.path.abspath(snapshot_path(digest))
+    if not os.path.exists(path):
+        return jsonify(error="Snapshot not found"), 404
+    return send_file(path, mimetype="image/jpeg", etag=digest, conditional=True, max_age=IMMUTABLE_MAX_AGE)
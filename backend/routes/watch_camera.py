@@ -1,10 +1,11 @@
 from flask import Blueprint, request, jsonify
-from flask_socketio import emit
 from datetime import datetime, timezone, timedelta
-import json
 from sqlalchemy.exc import IntegrityError
 from database.models import Camera, Watcher
 from database.db import SessionLocal
+from helpers.camera_dataset import get_cameras
+from helpers.http_cache import NO_STORE, cache_policy
+from helpers.rate_limit import RATE_LIMIT_REQUESTS_BURST, RATE_LIMIT_REQUESTS_PER_MINUTE, rate_limit
 
 bp = Blueprint('watch_camera', __name__)
 
@@ -15,15 +16,6 @@ def get_db():
     finally:
         db.close()
 
-def load_camera_data():
-    """Load camera data to validate addresses"""
-    try:
-        with open('camera_id_lat_lng_wiped.json', 'r') as f:
-            return json.load(f)
-    except Exception as e:
-        print(f"Error loading camera data: {e}")
-        return {}
-
 def is_valid_notification_interval(interval):
     """Check if notification interval is valid (10-180 mins, multiple of 5)"""
     return (
@@ -48,6 +40,8 @@ def cleanup_expired_watches():
         db.close()
 
 @bp.route("/watch_camera", methods=['POST'])
+@cache_policy(NO_STORE)
+@rate_limit(RATE_LIMIT_REQUESTS_PER_MINUTE, RATE_LIMIT_REQUESTS_BURST)
 def watch_camera():
     data = request.get_json()
     db = next(get_db())
@@ -68,9 +62,8 @@ def watch_camera():
                 "message": "Invalid notification interval. Must be between 10-180 minutes and multiple of 5."
             }), 400
         
-        # Validate camera exists in our JSON data
-        camera_data = load_camera_data()
-        if data['address'] not in camera_data:
+        # Validate camera exists in our camera data
+        if data['address'] not in get_cameras():
             return jsonify({
                 "status": "error",
                 "message": "Invalid camera address"
@@ -138,6 +131,8 @@ def watch_camera():
         db.close()
 
 @bp.route("/unwatch_camera", methods=['POST'])
+@cache_policy(NO_STORE)
+@rate_limit(RATE_LIMIT_REQUESTS_PER_MINUTE, RATE_LIMIT_REQUESTS_BURST)
 def unwatch_camera():
     data = request.get_json()
     db = next(get_db())
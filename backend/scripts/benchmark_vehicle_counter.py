@@ -0,0 +1,63 @@
+"""
+Vehicle counter throughput check.
+
+Pushes synthetic camera-sized JPEG frames through the batched ONNX detector and
+reports frames per second, and whether every camera fits in one poll interval:
+
+    python scripts/benchmark_vehicle_counter.py --model yolov8n-320.onnx --cameras 900
+"""
+
+import argparse
+import os
+import sys
+import time
+from io import BytesIO
+import numpy as np
+from PIL import Image
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from helpers.vehicle_counter import (
+    InferenceWorker, OnnxVehicleDetector, VEHICLE_MAX_BATCH, VEHICLE_THREADS,
+)
+
+
+def synthetic_frames(count, width=352, height=240):
+    rng = np.random.default_rng(0)
+    frames = []
+    for _ in range(count):
+        buffer = BytesIO()
+        Image.fromarray(rng.integers(0, 255, (height, width, 3), dtype=np.uint8)).save(buffer, 'JPEG', quality=70)
+        frames.append(buffer.getvalue())
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--cameras", type=int, default=900)
+    parser.add_argument("--batch", type=int, default=VEHICLE_MAX_BATCH)
+    parser.add_argument("--threads", type=int, default=VEHICLE_THREADS)
+    parser.add_argument("--interval", type=float, default=60, help="poll interval in seconds")
+    args = parser.parse_args()
+
+    worker = InferenceWorker(OnnxVehicleDetector(args.model, threads=args.threads), max_batch=args.batch)
+    frames = synthetic_frames(args.cameras)
+
+    # Warm up graph optimisation and allocations
+    worker.process_batch([("warmup", frames[0], None)] * args.batch)
+
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    for i in range(0, len(frames), args.batch):
+        worker.process_batch([(f"camera-{j}", frame, None) for j, frame in enumerate(frames[i:i + args.batch], i)])
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+
+    fps = len(frames) / elapsed
+    print(f"{len(frames)} frames in {elapsed:.1f}s ({fps:.1f} frames/s, {cpu / elapsed:.1f} cores busy)")
+    verdict = "OK" if elapsed <= args.interval else "TOO SLOW"
+    print(f"Poll interval {args.interval:.0f}s: {verdict}")
+
+
+if __name__ == "__main__":
+    main()
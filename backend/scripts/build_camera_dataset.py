@@ -0,0 +1,49 @@
+"""
+Compile camera_id_lat_lng_wiped.json into the memory-mapped binary dataset
+the servers load at startup (see helpers/camera_dataset.py). Run it from the
+backend directory after every change to the JSON, and as part of the build:
+
+    python scripts/build_camera_dataset.py [--input FILE] [--output FILE]
+
+Servers fall back to the JSON, with a warning, while the dataset is missing
+or older than it.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from helpers.camera_dataset import CAMERA_DATA_FILE, CAMERA_DATASET_PATH, CameraDataset, build_dataset
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", default=CAMERA_DATA_FILE, help="camera JSON to compile")
+    parser.add_argument("--output", default=CAMERA_DATASET_PATH, help="dataset file to write")
+    parser.add_argument("--cell-km", type=float, default=0.5, help="spatial index grid cell size")
+    args = parser.parse_args()
+
+    with open(args.input, "r") as f:
+        camera_data = json.load(f)
+    count = build_dataset(camera_data, args.output, cell_km=args.cell_km)
+
+    # Read it back: every camera must round-trip exactly
+    start = time.perf_counter()
+    dataset = CameraDataset(args.output)
+    opened_ms = (time.perf_counter() - start) * 1000
+    mismatched = [address for address, details in camera_data.items()
+                  if dataset.get(address) != {key: details.get(key) for key in ("camera_id", "latitude", "longitude")}]
+    if mismatched:
+        print(f"Dataset does not match {args.input} for: {', '.join(mismatched[:10])}")
+        sys.exit(1)
+
+    print(f"Wrote {count} cameras to {args.output} ({os.path.getsize(args.output)} bytes, "
+          f"{dataset.cells} grid cells, JSON was {os.path.getsize(args.input)} bytes); "
+          f"opens in {opened_ms:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
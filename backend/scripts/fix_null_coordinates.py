@@ -1,19 +1,48 @@
+"""
+Bulk geocoding of camera coordinates.
+
+Geocodes every camera in camera_id_lat_lng_wiped.json whose coordinates are
+missing (or every camera, with --all) and writes the result to
+camera_id_lat_lng_updated.json for scripts/patch_coordinates.py.
+
+Lookups run on a pool of --workers threads behind a shared token bucket of
+--qps requests per second (the API quota), and go through the server's
+geocode cache: restored from its cache snapshot, and saved back into it when
+the job finishes. A server that is running keeps its own geocode cache and
+replaces the saved one on its next snapshot, so run this while it is down or
+restart it afterwards to make the results available to /search_cameras.
+
+Every result is appended to a journal as soon as it arrives, so an
+interrupted run picks up where it stopped when started again with the same
+input and --all setting; a journal of another or a finished run is started
+over. --fake swaps Google for a local stand-in for testing:
+
+    python scripts/fix_null_coordinates.py [--all] [--workers 8] [--qps 40] [--fake]
+"""
+
+import argparse
+import hashlib
 import json
 import os
-from dotenv import load_dotenv
-import googlemaps
+import sys
+import threading
 import time
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from helpers.cache_persistence import CACHE_SNAPSHOT_PATH, restore_caches, save_caches
+from helpers.geocoding import geocode
+from helpers.rate_limit import Limit, gcra
 
 # Load environment variables
 load_dotenv()
 
-# Initialize Google Maps client
 GOOGLE_MAPS_API_KEY = os.getenv('GOOGLE_MAPS_API_KEY')
-if not GOOGLE_MAPS_API_KEY:
-    raise ValueError("Please set GOOGLE_MAPS_API_KEY in .env file")
-
-gmaps = googlemaps.Client(key=GOOGLE_MAPS_API_KEY)
+# Google's default Geocoding quota is 50 requests per second; stay under it
+GEOCODE_QPS = float(os.getenv("GEOCODE_QPS", "40"))
+GEOCODE_WORKERS = int(os.getenv("GEOCODE_WORKERS", "8"))
+JOURNAL_PATH = "geocode_journal.ndjson"
 
 def format_address(address: str) -> str:
     """Convert address from JSON key format to Google Maps friendly format."""
@@ -42,74 +71,255 @@ def format_address(address: str) -> str:
     
     return address
 
-def get_coordinates(formatted_address: str) -> tuple[float | None, float | None]:
-    """Get coordinates from Google Maps Geocoding API."""
-    try:
-        # Add a small delay to respect API rate limits
-        time.sleep(0.1)
-        
-        # Make the geocoding request
-        result = gmaps.geocode(formatted_address)
-        
-        if result and len(result) > 0:
-            location = result[0]['geometry']['location']
-            return location['lat'], location['lng']
-        
-        return None, None
-    
-    except Exception as e:
-        print(f"Error geocoding {formatted_address}: {e}")
-        return None, None
+class Throttle:
+    """
+    Blocking token bucket shared by the worker threads: `per_second` calls
+    per second on average, `burst` at once. Uses the same GCRA step as the
+    API's rate limiter.
+    """
+
+    def __init__(self, per_second, burst=1, clock=time.monotonic, sleep=time.sleep):
+        self.limit = Limit(per_second * 60, burst)
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tat = None
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = self._clock()
+                allowed, tat = gcra(self._tat, now, self.limit.interval, self.limit.capacity)
+                if allowed:
+                    self._tat = tat
+                    return
+                wait = tat + self.limit.interval - self.limit.capacity - now
+            self._sleep(wait)
+
+
+class FakeGeocoder:
+    """
+    Stand-in for googlemaps.Client: places every address at a stable,
+    made-up point in Manhattan after `latency` seconds. Addresses containing
+    "Nowhere" are not found.
+    """
+
+    def __init__(self, latency=0.05):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def geocode(self, address):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        if "Nowhere" in address:
+            return []
+        digest = hashlib.sha256(address.encode()).digest()
+        lat = 40.70 + int.from_bytes(digest[:4], "big") / 2**32 * 0.12
+        lng = -74.02 + int.from_bytes(digest[4:8], "big") / 2**32 * 0.08
+        return [{'geometry': {'location': {'lat': lat, 'lng': lng}}}]
+
+
+class ThrottledGeocoder:
+    """A geocoder whose every call first takes a token from the throttle."""
+
+    def __init__(self, geocoder, throttle):
+        self.geocoder = geocoder
+        self.throttle = throttle
+
+    def geocode(self, address):
+        self.throttle.acquire()
+        return self.geocoder.geocode(address)
+
+
+def get_coordinates(geocoder, formatted_address):
+    """
+    Coordinates of an address: [lat, lng], or None if it cannot be placed.
+    Goes through the geocode cache, so only misses reach the geocoder.
+
+    Raises:
+        Whatever the geocoder raises (network errors, quota), so the address
+        is retried on the next run.
+    """
+    return geocode(geocoder, formatted_address)
+
+
+def journal_run(input_path, refresh_all):
+    """What a journal belongs to: the input file's content and the --all setting."""
+    with open(input_path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    return {"input": digest, "all": refresh_all}
+
+
+def _journal_lines(path):
+    """Records of a journal, skipping a line cut short by a crash."""
+    if not os.path.exists(path):
+        return
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def read_journal(path):
+    """Results journaled so far: {address: record}, the last record per address winning."""
+    return {record["address"]: record for record in _journal_lines(path) if "address" in record}
+
+
+def resumable(path, run):
+    """
+    Whether a journal can be picked up by this run: it was written for the
+    same run and that run did not finish. Journals without a run header
+    (run=None on both sides) always match.
+    """
+    header = None
+    for record in _journal_lines(path):
+        if "run" in record:
+            header = record["run"]
+        elif record.get("finished"):
+            return False
+    return header == run
+
+
+def geocode_addresses(addresses, geocoder, journal_path, workers=GEOCODE_WORKERS, run=None):
+    """
+    Geocode camera addresses concurrently, appending each result to the
+    journal as it completes. Resuming an interrupted run, addresses already
+    settled in the journal are skipped and ones that errored are tried again.
+    The journal is marked finished once every address is settled.
+
+    Args:
+        geocoder: Shared by all workers; wrap it in ThrottledGeocoder to stay in quota
+        run: What the journal belongs to (see journal_run); a journal written
+            for anything else, or whose run finished, is started over
+
+    Returns:
+        {address: record} for every address, journaled or new, where a
+        record is {"address", "formatted_address", "status", "lat", "lng"}
+        and status is "ok", "not_found" or "error".
+    """
+    if os.path.exists(journal_path) and not resumable(journal_path, run):
+        print(f"{journal_path} belongs to another or a finished run, starting over")
+        os.remove(journal_path)
+    results = read_journal(journal_path)
+    todo = [address for address in addresses
+            if results.get(address, {}).get("status") not in ("ok", "not_found")]
+    if len(todo) < len(addresses):
+        print(f"Resuming: {len(addresses) - len(todo)} addresses already done")
+
+    def work(address):
+        formatted_address = format_address(address)
+        record = {"address": address, "formatted_address": formatted_address,
+                  "status": "not_found", "lat": None, "lng": None}
+        try:
+            location = get_coordinates(geocoder, formatted_address)
+        except Exception as e:
+            print(f"Error geocoding {formatted_address}: {e}")
+            record["status"] = "error"
+            return record
+        if location is not None:
+            record["status"] = "ok"
+            record["lat"], record["lng"] = location
+        return record
+
+    # A crash can leave a partial last line; start on a fresh one
+    new = not os.path.exists(journal_path) or not os.path.getsize(journal_path)
+    partial = False
+    if not new:
+        with open(journal_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            partial = f.read(1) != b"\n"
+
+    start = time.time()
+    with open(journal_path, "a") as journal, ThreadPoolExecutor(max_workers=workers) as pool:
+        if partial:
+            journal.write("\n")
+        if new:
+            journal.write(json.dumps({"run": run}) + "\n")
+        futures = [pool.submit(work, address) for address in todo]
+        for done, future in enumerate(as_completed(futures), 1):
+            record = future.result()
+            # One line per result, written out at once so a crash loses nothing
+            journal.write(json.dumps(record) + "\n")
+            journal.flush()
+            results[record["address"]] = record
+            if done % 100 == 0 or done == len(todo):
+                print(f"{done}/{len(todo)} geocoded ({done / max(time.time() - start, 1e-9):.1f}/s)")
+        if all(results[address]["status"] != "error" for address in addresses):
+            journal.write(json.dumps({"finished": True}) + "\n")
+    return results
+
+
+def apply_results(camera_data, results):
+    """Copy geocoded coordinates into camera_data. Returns (fixed, failed) address lists."""
+    fixed, failed = [], []
+    for address, record in results.items():
+        if address not in camera_data:
+            continue
+        data = camera_data[address]
+        data['formatted_address'] = record["formatted_address"]
+        if record["status"] == "ok":
+            data['latitude'] = record["lat"]
+            data['longitude'] = record["lng"]
+            fixed.append(address)
+        else:
+            failed.append(address)
+    return fixed, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", default="camera_id_lat_lng_wiped.json")
+    parser.add_argument("--output", default="camera_id_lat_lng_updated.json")
+    parser.add_argument("--journal", default=JOURNAL_PATH, help="append-only progress file of the current run")
+    parser.add_argument("--all", action="store_true", help="refresh every camera, not only those missing coordinates")
+    parser.add_argument("--workers", type=int, default=GEOCODE_WORKERS)
+    parser.add_argument("--qps", type=float, default=GEOCODE_QPS, help="geocoding requests per second")
+    parser.add_argument("--fake", action="store_true", help="use a local fake geocoder instead of Google")
+    args = parser.parse_args(argv)
+
+    if args.fake:
+        geocoder = FakeGeocoder()
+    else:
+        if not GOOGLE_MAPS_API_KEY:
+            raise ValueError("Please set GOOGLE_MAPS_API_KEY in .env file")
+        import googlemaps
+        geocoder = googlemaps.Client(key=GOOGLE_MAPS_API_KEY, queries_per_second=max(1, int(args.qps)))
+        # Addresses the server has geocoded recently cost nothing
+        restore_caches(CACHE_SNAPSHOT_PATH)
 
-def main():
     # Load the JSON file
-    with open("camera_id_lat_lng_wiped.json", "r") as f:
+    with open(args.input, "r") as f:
         camera_data = json.load(f)
-    
-    # Keep track of changes
-    addresses_fixed = 0
-    addresses_failed = 0
-    null_addresses = []
-    
-    # Find and process null coordinates
-    for address, data in camera_data.items():
-        if data['latitude'] is None or data['longitude'] is None:
-            null_addresses.append(address)
-            
-            # Format the address for geocoding
-            formatted_address = format_address(address)
-            data['formatted_address'] = formatted_address
-            
-            print(f"\nProcessing: {address}")
-            print(f"Formatted as: {formatted_address}")
-            
-            # Get coordinates
-            lat, lng = get_coordinates(formatted_address)
-            
-            if lat is not None and lng is not None:
-                data['latitude'] = lat
-                data['longitude'] = lng
-                addresses_fixed += 1
-                print(f"✓ Fixed! New coordinates: {lat}, {lng}")
-            else:
-                addresses_failed += 1
-                print(f"✗ Failed to get coordinates")
-    
+
+    addresses = [address for address, data in camera_data.items()
+                 if args.all or data['latitude'] is None or data['longitude'] is None]
+    print(f"Geocoding {len(addresses)} addresses with {args.workers} workers at up to {args.qps:g}/s")
+    throttled = ThrottledGeocoder(geocoder, Throttle(args.qps, burst=args.workers))
+    run = journal_run(args.input, args.all)
+    results = geocode_addresses(addresses, throttled, args.journal, args.workers, run)
+    if not args.fake:
+        # Into the server's snapshot, leaving its other caches as they were
+        save_caches(CACHE_SNAPSHOT_PATH, merge=True)
+    fixed, failed = apply_results(camera_data, {address: results[address] for address in addresses})
+
     # Save the updated data
-    with open("camera_id_lat_lng_updated.json", "w") as f:
+    with open(args.output, "w") as f:
         json.dump(camera_data, f, indent=4)
-    
+
     # Print summary
     print("\nSummary:")
-    print(f"Total addresses with null coordinates: {len(null_addresses)}")
-    print(f"Successfully fixed: {addresses_fixed}")
-    print(f"Failed to fix: {addresses_failed}")
-    
-    if addresses_failed > 0:
-        print("\nAddresses that still need fixing:")
-        for address in null_addresses:
-            if camera_data[address]['latitude'] is None:
-                print(f"- {address}")
+    print(f"Total addresses geocoded: {len(addresses)}")
+    print(f"Successfully fixed: {len(fixed)}")
+    print(f"Failed to fix: {len(failed)}")
+
+    if failed:
+        print("\nAddresses that still need fixing (errors are retried on the next run):")
+        for address in failed:
+            print(f"- {address} ({results[address]['status']})")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,38 @@
+"""
+Camera status history maintenance.
+
+Creates the next few daily partitions, refreshes the hourly/daily rollups and
+drops raw partitions older than HISTORY_RETENTION_DAYS. Run it from cron (or a
+Render cron job) every 15 minutes or so:
+
+    python scripts/maintain_history.py
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.db import SessionLocal
+from database.history import run_maintenance, HISTORY_RETENTION_DAYS
+
+def main():
+    db = SessionLocal()
+    try:
+        result = run_maintenance(db)
+        print(f"Partitions ensured: {', '.join(result['partitions_ensured'])}")
+        if result['partitions_dropped']:
+            print(f"Dropped partitions older than {HISTORY_RETENTION_DAYS} days: "
+                  f"{', '.join(result['partitions_dropped'])}")
+        else:
+            print("No expired partitions")
+        if result['default_rows_purged']:
+            print(f"Deleted {result['default_rows_purged']} expired rows from the default partitions")
+    except Exception as e:
+        db.rollback()
+        print(f"History maintenance failed: {e}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Import-time profile of the API server's startup.
+
+Imports main (which builds the app) in a fresh interpreter with
+`python -X importtime`, then prints the slowest imports and the total against
+STARTUP_BUDGET_SECONDS. Exits non-zero when over budget, so it can run in CI:
+
+    python scripts/profile_startup.py [--top 25]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(stderr):
+    """
+    Parse `-X importtime` output.
+
+    Returns:
+        List of (cumulative_us, self_us, module, depth) in import order.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(cumulative_us), int(self_us), name.strip(), depth))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=25, help="slowest imports to list")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        sys.exit(result.returncode)
+
+    rows = parse_importtime(result.stderr)
+    # Top-level imports are depth 0 (indented by one space in the raw output)
+    total_us = sum(cumulative for cumulative, _, _, depth in rows if depth == 0)
+
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative, self_us, name, depth in sorted(rows, reverse=True)[:args.top]:
+        print(f"{cumulative / 1000:14.1f} {self_us / 1000:9.1f}  {'  ' * depth}{name}")
+
+    from_env = os.getenv("STARTUP_BUDGET_SECONDS")
+    budget = float(from_env) if from_env else 1.5
+    print(f"\nImports: {total_us / 1e6:.2f}s, process wall time: {wall:.2f}s, budget: {budget:.2f}s")
+    for line in result.stdout.splitlines():
+        if "Startup took" in line:
+            print(line)
+    if total_us / 1e6 > budget:
+        print("Over budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Camera status poller.
+
+Fetches a snapshot from every NYCTMC camera each cycle, classifies it with
+CameraStatusEngine and publishes status changes through the message bus, where
+the WebSocket nodes pick them up. Every cycle also appends one history sample
+per camera so the hourly rollups have data to aggregate. When VEHICLE_MODEL_PATH
+is set, changed frames are also queued for batched vehicle counting, and the
+counted vehicles are tracked across polls to report 'gridlock' (vehicles that
+have not moved for several minutes) in place of the engine's status. The counts
+also keep per-camera time-of-week baselines up to date; a count far above the
+usual level for the hour marks the camera congested.
+
+Run it as its own process next to the WebSocket server; both must share
+MESSAGE_BUS_URL (e.g. Redis) for updates to reach watchers:
+    python status_poller.py
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from database.db import SessionLocal
+from database.history import camera_keys, record_samples
+from helpers.camera_updates import publish_camera_update
+from helpers.camera_dataset import load_cameras
+from helpers.fetch_image import fetch_camera_frame
+from helpers.status_engine import CameraStatusEngine, UNCHANGED
+from helpers.baseline import BaselineRecorder, TimeOfWeekBaseline
+from helpers.gridlock_tracker import GridlockTracker, STATUS_GRIDLOCK
+from helpers.shutdown import handle_signals, run_shutdown_callbacks
+from helpers.vehicle_counter import VehicleCountRecorder, create_vehicle_counter
+
+load_dotenv()
+
+STATUS_POLL_INTERVAL = float(os.getenv("STATUS_POLL_INTERVAL", "60"))  # seconds per cycle
+STATUS_FETCH_WORKERS = int(os.getenv("STATUS_FETCH_WORKERS", "16"))
+
+
+class StatusPoller:
+    def __init__(self, cameras, engine=None, publish=publish_camera_update,
+                 fetch=fetch_camera_frame, session_factory=SessionLocal, counter=None,
+                 gridlock=None):
+        self.cameras = cameras
+        self.counter = counter
+        self.gridlock = gridlock
+        self.engine = engine or CameraStatusEngine()
+        self._publish = publish
+        self._fetch = fetch
+        self._session_factory = session_factory
+        self._executor = ThreadPoolExecutor(max_workers=STATUS_FETCH_WORKERS, thread_name_prefix="status-fetch")
+        self._keys = {}
+
+    def _snapshot(self, address, stamp):
+        frame = self._fetch(self.cameras[address]["camera_id"], stamp)
+        if frame is None or frame.offline:
+            return None
+        if frame.unchanged:
+            # Byte-identical means a frozen feed, not cars standing still:
+            # counting it again would fake gridlock and skew the baselines
+            return UNCHANGED
+        if self.counter is not None:
+            self.counter.submit(address, frame.data, datetime.fromtimestamp(stamp, timezone.utc))
+        try:
+            return frame.image
+        except ValueError as e:
+            print(f"Image validation failed for {address}: {e}")
+            return None
+
+    def fetch_snapshots(self, stamp):
+        """
+        Fetch every camera concurrently.
+
+        Failed fetches and placeholder frames map to None; frames identical to
+        the previous poll map to UNCHANGED so the engine can skip them.
+        """
+        addresses = list(self.cameras)
+        snapshots = self._executor.map(lambda address: self._snapshot(address, stamp), addresses)
+        return dict(zip(addresses, snapshots))
+
+    def run_cycle(self):
+        """One poll: fetch, classify, publish changes, record samples."""
+        start = time.time()
+        snapshots = self.fetch_snapshots(int(start))
+        fetched = time.time()
+
+        changes, observed = self.engine.process(snapshots)
+        for address, status in changes:
+            if not self._gridlocked(address):
+                self._publish(address, status, record_history=False)
+        observed = {
+            address: STATUS_GRIDLOCK if self._gridlocked(address) else status
+            for address, status in observed.items()
+        }
+
+        self._record(observed)
+        stats = dict(self.engine.last_cycle, fetch_seconds=fetched - start, total_seconds=time.time() - start)
+        print(f"[status] {stats['cameras']} cameras, {stats['changes']} changes, "
+              f"{stats['deferred']} deferred, cpu {stats['cpu_seconds']:.2f}s, "
+              f"fetch {stats['fetch_seconds']:.1f}s")
+        return stats
+
+    def _gridlocked(self, address):
+        return self.gridlock is not None and self.gridlock.is_gridlocked(address)
+
+    def on_gridlock(self, address, gridlocked):
+        """GridlockTracker callback: publish gridlock, or the engine's status once it clears."""
+        status = STATUS_GRIDLOCK if gridlocked else self.engine.status(address)
+        print(f"[status] {address} {'entered' if gridlocked else 'left'} gridlock")
+        self._publish(address, status, record_history=False)
+
+    def _record(self, observed):
+        if not observed:
+            return
+        db = self._session_factory()
+        try:
+            missing = [address for address in observed if address not in self._keys]
+            if missing:
+                self._keys.update(camera_keys(db, missing))
+            record_samples(db, observed, self._keys)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"[ERROR] Failed to record status samples: {e}")
+        finally:
+            db.close()
+
+    def run_forever(self, stop_event=None):
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            started = time.time()
+            try:
+                self.run_cycle()
+            except Exception as e:
+                print(f"[ERROR] Status poll cycle failed: {e}")
+            stop_event.wait(max(0, STATUS_POLL_INTERVAL - (time.time() - started)))
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        if self.counter is not None:
+            self.counter.stop()
+
+
+if __name__ == "__main__":
+    cameras = load_cameras()
+    print(f"Polling {len(cameras)} cameras every {STATUS_POLL_INTERVAL:.0f}s")
+    baseline = TimeOfWeekBaseline()
+    baseline_recorder = BaselineRecorder(baseline)
+    print(f"Loaded {baseline_recorder.load()} baseline bins")
+    poller = StatusPoller(cameras, engine=CameraStatusEngine(anomaly_score=baseline.anomaly))
+    poller.gridlock = GridlockTracker(poller.on_gridlock)
+    poller.counter = create_vehicle_counter(
+        handlers=[VehicleCountRecorder(), poller.gridlock, baseline_recorder])
+    # SIGTERM lets the current cycle finish (and record its samples) before exiting
+    stop_event = threading.Event()
+    handle_signals(stop_event.set)
+    try:
+        poller.run_forever(stop_event)
+    finally:
+        poller.close()
+        baseline_recorder.flush()
+        run_shutdown_callbacks()
@@ -3,7 +3,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from database.db import Base
 from database.config import DATABASE_URL
-from main import app
+from main import app, migrate
 
 # Use a test database URL
 TEST_DATABASE_URL = DATABASE_URL.replace(
@@ -30,8 +30,13 @@ def db_session(test_engine):
         session.rollback()
         session.close()
 
+@pytest.fixture(scope="session")
+def app_schema():
+    """Create the app database's tables (main.py no longer does it on import)."""
+    migrate()
+
 @pytest.fixture(scope="function")
-def test_client():
+def test_client(app_schema):
     """Create a test client for the Flask app."""
     with app.test_client() as client:
         yield client 
\ No newline at end of file
@@ -0,0 +1,98 @@
+import threading
+import time
+from flask import Flask, jsonify
+from helpers import camera_images
+from helpers.admission import AdmissionControl, RouteGate, admission, cached_only, time_left
+
+
+def test_gate_queues_then_sheds():
+    gate = RouteGate(concurrency=1, queue=1, budget=10)
+    assert gate.acquire(0.1)
+
+    # One waiter fits in the queue and gets the slot once it is released
+    got_slot = []
+    waiter = threading.Thread(target=lambda: got_slot.append(gate.acquire(2)))
+    waiter.start()
+    while gate.waiting == 0:
+        time.sleep(0.001)
+    # The queue is full: shed immediately
+    start = time.monotonic()
+    assert not gate.acquire(2)
+    assert time.monotonic() - start < 0.5
+
+    gate.release()
+    waiter.join()
+    assert got_slot == [True]
+    gate.release()
+    assert gate.active == 0
+
+    assert gate.acquire(0.1)
+    assert not gate.acquire(0.05)  # queue has room, but the wait times out
+
+
+def make_app(degrade):
+    app = Flask(__name__)
+    AdmissionControl().init_app(app)
+    release = threading.Event()
+    entered = threading.Event()
+
+    @app.get("/images")
+    @admission(1, 0, budget=5, degrade=degrade)
+    def images():
+        entered.set()
+        remaining = time_left(None)
+        if not cached_only():
+            release.wait(5)
+        return jsonify(cached_only=cached_only(), time_left=remaining)
+
+    return app, release, entered
+
+
+def test_busy_route_returns_503_with_retry_after():
+    app, release, entered = make_app(degrade=False)
+    results = []
+    first = threading.Thread(target=lambda: results.append(app.test_client().get("/images")))
+    first.start()
+    assert entered.wait(5)
+
+    shed = app.test_client().get("/images")
+    assert shed.status_code == 503
+    assert shed.headers["Retry-After"] == "2"
+
+    release.set()
+    first.join()
+    admitted = results[0].get_json()
+    assert admitted["cached_only"] is False
+    assert 4 < admitted["time_left"] <= 5
+    # The slot was given back
+    assert app.test_client().get("/images").status_code == 200
+
+
+def test_degrade_routes_serve_cached_images_only(tmp_path, monkeypatch):
+    app, release, entered = make_app(degrade=True)
+    first = threading.Thread(target=lambda: app.test_client().get("/images"))
+    first.start()
+    assert entered.wait(5)
+
+    shed = app.test_client().get("/images")
+    assert shed.status_code == 200
+    assert shed.get_json()["cached_only"] is True
+    assert shed.headers["X-Degraded"] == "cached-only"
+    release.set()
+    first.join()
+
+
+def test_cached_only_requests_never_fetch(tmp_path, monkeypatch):
+    monkeypatch.setattr(camera_images, "SNAPSHOT_DIR", str(tmp_path))
+    digest = "ab" * 16
+    (tmp_path / f"{digest}.jpg").write_bytes(b"jpeg")
+    monkeypatch.setattr(camera_images, "last_frame_digest", lambda camera_id: digest if camera_id == "b" else None)
+    monkeypatch.setattr(camera_images, "fetch_camera_frame", lambda *args: _no_fetch())
+    monkeypatch.setattr(camera_images, "cached_only", lambda: True)
+
+    images = camera_images.fetch_camera_images([("A", "a"), ("B", "b")], 2, 1, "http://x")
+    assert images == [{"address": "B", "url": f"http://x/snapshots/{digest}.jpg"}]
+
+
+def _no_fetch():
+    raise AssertionError("cached-only request fetched a camera")
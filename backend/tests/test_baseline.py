@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from helpers.baseline import TimeOfWeekBaseline, time_of_week
+from helpers.status_engine import CameraStatusEngine
+from tests.test_status_engine import jpeg, road
+
+# Tuesday 2024-05-07 18:30 in New York
+TUESDAY_EVENING = datetime(2024, 5, 7, 22, 30, tzinfo=timezone.utc)
+
+
+def test_time_of_week_uses_local_time_and_sunday_zero():
+    assert time_of_week(TUESDAY_EVENING) == (2, 18)
+    assert time_of_week(datetime(2024, 5, 5, 16, 0, tzinfo=timezone.utc)) == (0, 12)
+
+
+def test_running_mean_and_variance_match_batch_statistics():
+    baseline = TimeOfWeekBaseline(max_samples=1000)
+    values = [3, 5, 4, 6, 2, 5, 4, 7]
+    for week, value in enumerate(values):
+        baseline.update("A", value, TUESDAY_EVENING + timedelta(weeks=week))
+    samples, mean, variance = baseline.bin("A", 2, 18)
+    assert samples == len(values)
+    assert abs(mean - np.mean(values)) < 1e-9
+    assert abs(variance - np.var(values)) < 1e-9
+
+
+def test_score_needs_min_samples_then_flags_outliers():
+    baseline = TimeOfWeekBaseline(min_samples=4, min_std=1.0)
+    for minute in range(4):
+        assert baseline.update("A", 4 + minute % 2, TUESDAY_EVENING + timedelta(minutes=minute)) is None
+    assert baseline.score("A", 4.5, TUESDAY_EVENING) == 0
+    assert baseline.score("A", 20, TUESDAY_EVENING) > 10
+    # Another hour of the week has its own (empty) bin
+    assert baseline.score("A", 20, TUESDAY_EVENING + timedelta(hours=1)) is None
+
+
+def test_capped_samples_track_drift():
+    baseline = TimeOfWeekBaseline(max_samples=10)
+    for minute in range(50):
+        baseline.update("A", 2, TUESDAY_EVENING + timedelta(minutes=minute % 30))
+    for minute in range(50):
+        baseline.update("A", 10, TUESDAY_EVENING + timedelta(minutes=minute % 30))
+    samples, mean, _ = baseline.bin("A", 2, 18)
+    assert samples == 10
+    assert mean > 9.9
+
+
+def test_anomaly_lookup_expires():
+    now = [1000.0]
+    baseline = TimeOfWeekBaseline(min_samples=2, clock=lambda: now[0])
+    for value in (3, 3, 30):
+        baseline.update("A", value, TUESDAY_EVENING)
+    assert baseline.anomaly("A") > 2.5
+    now[0] += 600
+    assert baseline.anomaly("A", max_age=180) is None
+    assert baseline.anomaly("unknown") is None
+
+
+def test_drain_dirty_returns_changed_bins_once():
+    baseline = TimeOfWeekBaseline()
+    baseline.update("A", 3, TUESDAY_EVENING)
+    assert baseline.drain_dirty() == [("A", 2, 18, 1, 3.0, 0.0)]
+    assert baseline.drain_dirty() == []
+
+
+def test_engine_marks_anomalous_available_camera_congested():
+    scores = {"A": 4.0, "B": 0.5}
+    engine = CameraStatusEngine(confirm_frames=1, anomaly_score=scores.get)
+    changes, _ = engine.process({"A": jpeg(road()), "B": jpeg(road(1)), "C": jpeg(road(2))})
+    assert dict(changes) == {"A": "congested", "B": "available", "C": "available"}
@@ -0,0 +1,127 @@
+import gzip
+import hashlib
+import io
+import threading
+import time
+from PIL import Image
+from helpers import cache_persistence, fetch_image
+from helpers.cache_persistence import CacheSaver, persistent_cache, restore_caches, save_caches
+from helpers.ttl_cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_dump_and_load_keep_remaining_lifetime():
+    clock = FakeClock()
+    cache = TTLCache(30, clock=clock)
+    cache.set(("dr5ru6j", 5), {"cell": "dr5ru6j"})
+    clock.now += 20
+    cache.set("fresh", 1)
+    entries = cache.dump()
+
+    restored = TTLCache(30, clock=clock)
+    # Saved 5s ago: the first entry has 5s left, the second 25s
+    assert restored.load(entries, elapsed=5) == 2
+    assert restored.get(("dr5ru6j", 5)) == {"cell": "dr5ru6j"}
+    clock.now += 6
+    assert restored.get(("dr5ru6j", 5)) is None
+    assert restored.get("fresh") == 1
+
+    # Everything expired while the process was down
+    assert TTLCache(30, clock=clock).load(entries, elapsed=60) == 0
+
+
+def test_save_and_restore_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_persistence, "_caches", {})
+    path = str(tmp_path / "caches.json.gz")
+    before = TTLCache(60)
+    before.set("350 5th ave", [40.7484, -73.9857])
+    persistent_cache("geocodes", before.dump, before.load)
+    assert save_caches(path) == {"geocodes": 1}
+
+    after = TTLCache(60)
+    monkeypatch.setattr(cache_persistence, "_caches", {})
+    persistent_cache("geocodes", after.dump, after.load)
+    assert restore_caches(path) == {"geocodes": 1}
+    assert after.get("350 5th ave") == [40.7484, -73.9857]
+
+    # Restored long after it was saved, nothing is left to use
+    stale = TTLCache(60)
+    persistent_cache("geocodes", stale.dump, stale.load)
+    assert restore_caches(path, now=cache_persistence.time.time() + 120) == {"geocodes": 0}
+
+
+def test_unreadable_snapshot_restores_nothing(tmp_path):
+    path = tmp_path / "caches.json.gz"
+    path.write_bytes(b"not gzip")
+    assert restore_caches(str(path)) == {}
+    path.write_bytes(gzip.compress(b'{"version": 2, "caches": {}}')[:-12])
+    assert restore_caches(str(path)) == {}
+    assert restore_caches(str(tmp_path / "missing.json.gz")) == {}
+
+
+def test_saver_stop_waits_for_the_save_in_progress(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_persistence, "_caches", {})
+    path = str(tmp_path / "caches.json.gz")
+    dumping = threading.Event()
+    release = threading.Event()
+    active = []
+    overlaps = []
+
+    def dump():
+        overlaps.append(len(active))
+        active.append(True)
+        dumping.set()
+        release.wait(5)
+        active.pop()
+        return []
+
+    persistent_cache("slow", dump, lambda entries, elapsed: 0)
+    saver = CacheSaver(path, interval=0.01)
+    saver.start()
+    assert dumping.wait(5)
+    stopper = threading.Thread(target=saver.stop)
+    stopper.start()
+    time.sleep(0.1)
+    # The final save must not race the periodic one for the temporary file
+    assert stopper.is_alive()
+    release.set()
+    stopper.join(5)
+    assert overlaps == [0, 0]
+    assert restore_caches(path) == {"slow": 0}
+
+
+def test_frames_restore_only_while_their_snapshot_exists(monkeypatch):
+    monkeypatch.setattr(fetch_image, "_frames", {})
+    monkeypatch.setattr(fetch_image, "_hash_cameras", {})
+    entries = [["kept", "00ff00ff00ff00ff", "a" * 32, "c" * 64], ["swept", "ff00ff00ff00ff00", "b" * 32, "d" * 64]]
+
+    assert fetch_image.load_frames(entries, keep=lambda digest: digest == "a" * 32) == 1
+    assert fetch_image.last_frame_digest("kept") == "a" * 32
+    assert fetch_image.last_frame_digest("swept") is None
+    assert fetch_image.dump_frames() == [entries[0]]
+
+
+def test_restored_frame_is_encoded_again_before_its_digest_is_reused(monkeypatch):
+    monkeypatch.setattr(fetch_image, "_frames", {})
+    monkeypatch.setattr(fetch_image, "_hash_cameras", {})
+    buf = io.BytesIO()
+    Image.new("RGB", (64, 48), (90, 120, 150)).save(buf, format="JPEG")
+    data = buf.getvalue()
+    monkeypatch.setattr(fetch_image, "download_image_bytes", lambda camera_id, stamp, timeout=None: data)
+
+    phash = f"{fetch_image.dhash(data):016x}"
+    fetch_image.load_frames([["cam", phash, "a" * 32, hashlib.sha256(data).hexdigest()]])
+
+    frame = fetch_image.fetch_camera_frame("cam", 1)
+    assert frame.unchanged
+    # The snapshot file named by the restored digest may be gone: the name
+    # comes from the bytes that will be written
+    assert frame.digest() == hashlib.sha256(frame.jpeg()).hexdigest()[:32]
+    assert fetch_image.last_frame_digest("cam") == frame.digest()
@@ -0,0 +1,66 @@
+import os
+import pytest
+from helpers.camera_dataset import CameraDataset, build_dataset, load_cameras
+from helpers.camera_index import CameraIndex
+
+
+def camera(camera_id, lat, lng):
+    return {"camera_id": camera_id, "latitude": lat, "longitude": lng}
+
+
+CAMERAS = {
+    "5_Ave_34_St": camera("b55781b8-827c-40e3-b094-27c289d22f7a", 40.7484, -73.9857),
+    "5_Ave_42_St": camera("d4bbce49-b087-4524-a835-08cb253926a7", 40.7532, -73.9822),
+    "5_Ave_57_St": camera("2bc8aef2-fc97-47e0-84cd-1efc8ee21bfe", 40.7636, -73.9746),
+    "12_Ave_42_St": camera("f8e7c70d-bdcb-4394-b55c-d9bcef891fba", 40.7620, -74.0020),
+    "Flatbush_Ave_@_Église": camera("0a7e2b8c-4c1d-4f7e-9a51-3b2d8e6f1c90", 40.6782, -73.9442),
+    "No_Coordinates": camera("5f0c7d1e-2a3b-4c5d-8e9f-a0b1c2d3e4f5", None, None),
+}
+
+
+def test_dataset_round_trips_the_json(tmp_path):
+    path = str(tmp_path / "cameras.bin")
+    assert build_dataset(CAMERAS, path) == len(CAMERAS)
+    dataset = CameraDataset(path)
+
+    assert len(dataset) == len(CAMERAS)
+    assert sorted(dataset) == sorted(CAMERAS)
+    for address, details in CAMERAS.items():
+        assert address in dataset
+        assert dataset[address] == details
+    assert "Missing_Camera" not in dataset
+    with pytest.raises(KeyError):
+        dataset["Missing_Camera"]
+
+
+def test_index_over_dataset_matches_index_over_json(tmp_path):
+    path = str(tmp_path / "cameras.bin")
+    build_dataset(CAMERAS, path, cell_km=0.3)
+    mapped = CameraIndex.from_dataset(CameraDataset(path))
+    parsed = CameraIndex(CAMERAS, cell_km=0.3)
+
+    assert mapped.nearest(40.7500, -73.9840, 3) == parsed.nearest(40.7500, -73.9840, 3)
+    route = [(40.7460, -73.9875), (40.7650, -73.9736)]
+    assert mapped.along_route(route, 0.15) == parsed.along_route(route, 0.15)
+    assert mapped.cameras["5_Ave_42_St"]["camera_id"] == CAMERAS["5_Ave_42_St"]["camera_id"]
+
+
+def test_load_cameras_falls_back_to_json_when_dataset_is_stale_or_bad(tmp_path):
+    import json
+    json_path = str(tmp_path / "cameras.json")
+    dataset_path = str(tmp_path / "cameras.bin")
+    with open(json_path, "w") as f:
+        json.dump(CAMERAS, f)
+    build_dataset(CAMERAS, dataset_path)
+    os.utime(json_path, (1, 1))
+    assert isinstance(load_cameras(json_path, dataset_path), CameraDataset)
+
+    # JSON edited after the last build
+    os.utime(json_path, None)
+    os.utime(dataset_path, (1, 1))
+    assert load_cameras(json_path, dataset_path) == CAMERAS
+
+    with open(dataset_path, "wb") as f:
+        f.write(b"not a dataset")
+    os.utime(dataset_path, None)
+    assert load_cameras(json_path, dataset_path) == CAMERAS
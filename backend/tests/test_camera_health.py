@@ -0,0 +1,90 @@
+import pytest
+from helpers import camera_health, fetch_image
+from helpers.camera_health import CLOSED, HALF_OPEN, OPEN, CameraBreaker
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_breaker(probe=None):
+    clock = Clock()
+    return CameraBreaker(probe=probe, failures=3, cooldown=60, max_cooldown=240, clock=clock), clock
+
+
+def test_consecutive_failures_open_the_circuit():
+    breaker, _ = make_breaker()
+    breaker.record("cam", True, 0.2)
+    for _ in range(2):
+        breaker.record("cam", False, 5.0)
+    assert breaker.allow("cam")
+    breaker.record("cam", False, 5.0)
+    assert not breaker.allow("cam")
+    assert breaker.health("cam").state == OPEN
+    assert breaker.allow("other")
+
+
+def test_latency_is_an_ewma_of_successes():
+    breaker, _ = make_breaker()
+    breaker.record("cam", True, 1.0)
+    breaker.record("cam", True, 2.0)
+    assert breaker.latency("cam") == pytest.approx(1.2)
+    breaker.record("cam", False, 5.0)
+    assert breaker.latency("cam") == pytest.approx(1.2)
+
+
+def test_low_success_rate_opens_even_without_a_streak():
+    breaker, _ = make_breaker()
+    for i in range(40):
+        breaker.record("flaky", i % 3 == 0, 0.5)
+    assert not breaker.allow("flaky")
+
+
+def test_background_probe_closes_or_backs_off():
+    results = {"cam": False}
+    probed = []
+
+    def probe(camera_id):
+        probed.append(camera_id)
+        return results[camera_id]
+
+    breaker, clock = make_breaker(probe)
+    for _ in range(3):
+        breaker.record("cam", False, 5.0)
+
+    # Not due yet
+    assert breaker.probe_once() == 0
+    clock.now = 60
+    assert breaker.due_probes() == ["cam"]
+    assert breaker.health("cam").state == HALF_OPEN
+    # Half-open cameras are still skipped by user requests
+    assert not breaker.allow("cam")
+    breaker.record("cam", False, 5.0)
+    assert breaker.health("cam").state == OPEN
+    assert breaker.health("cam").retry_at == 60 + 120
+
+    clock.now = 180
+    results["cam"] = True
+    assert breaker.probe_once() == 1
+    assert probed == ["cam"]
+    assert breaker.health("cam").state == CLOSED
+    assert breaker.allow("cam")
+
+
+def test_open_camera_costs_no_request(monkeypatch):
+    breaker, _ = make_breaker()
+    calls = []
+
+    def request(camera_id, timestamp, timeout):
+        calls.append(camera_id)
+        return None
+
+    monkeypatch.setattr(camera_health, "_breaker", breaker)
+    monkeypatch.setattr(fetch_image, "request_image_bytes", request)
+    for _ in range(10):
+        assert fetch_image.download_image_bytes("down", 1) is None
+    assert calls == ["down"] * 3
@@ -0,0 +1,80 @@
+import json
+import pytest
+from haversine import haversine
+from helpers.camera_index import CameraIndex
+
+
+def camera(lat, lng):
+    return {"camera_id": f"{lat},{lng}", "latitude": lat, "longitude": lng}
+
+
+# A few cameras along 5th Ave (running roughly north-east) and one off to the side
+CAMERAS = {
+    "5_Ave_34_St": camera(40.7484, -73.9857),
+    "5_Ave_42_St": camera(40.7532, -73.9822),
+    "5_Ave_57_St": camera(40.7636, -73.9746),
+    "12_Ave_42_St": camera(40.7620, -74.0020),
+    "No_Coordinates": {"camera_id": "x", "latitude": None, "longitude": None},
+}
+
+
+def test_cameras_are_ordered_along_the_route():
+    index = CameraIndex(CAMERAS)
+    route = [(40.7460, -73.9875), (40.7650, -73.9736)]
+    matches = index.along_route(route, corridor_km=0.15)
+    assert [address for address, _, _ in matches] == ["5_Ave_34_St", "5_Ave_42_St", "5_Ave_57_St"]
+    assert all(distance <= 0.15 for _, distance, _ in matches)
+
+    # Reversing the route reverses the order
+    reverse = index.along_route(route[::-1], corridor_km=0.15)
+    assert [address for address, _, _ in reverse] == ["5_Ave_57_St", "5_Ave_42_St", "5_Ave_34_St"]
+
+
+def test_along_route_distance_accumulates_over_segments():
+    index = CameraIndex(CAMERAS)
+    # Detour west then back east; 5_Ave_57_St is on the second segment
+    route = [(40.7484, -73.9857), (40.7620, -74.0020), (40.7636, -73.9746)]
+    matches = dict((address, along) for address, _, along in index.along_route(route, 0.1))
+    first_leg = haversine(route[0], route[1])
+    assert matches["12_Ave_42_St"] == pytest.approx(first_leg, rel=0.01)
+    assert matches["5_Ave_57_St"] > first_leg
+
+
+def test_matches_brute_force_on_real_data():
+    with open("camera_id_lat_lng_wiped.json") as f:
+        data = json.load(f)
+    index = CameraIndex(data, cell_km=0.3)
+    route = [(40.7060, -74.0090), (40.7580, -73.9855), (40.7870, -73.9540)]
+    found = {address for address, _, _ in index.along_route(route, 0.2)}
+
+    coarse = CameraIndex(data, cell_km=100)  # one cell: every camera is a candidate
+    expected = {address for address, _, _ in coarse.along_route(route, 0.2)}
+    assert found == expected
+    assert found
+
+
+
+def test_nearest_matches_brute_force_on_real_data():
+    with open("camera_id_lat_lng_wiped.json") as f:
+        data = json.load(f)
+    index = CameraIndex(data, cell_km=0.5)
+    coarse = CameraIndex(data, cell_km=100)
+    for lat, lng in [(40.7580, -73.9855), (40.6413, -73.7781), (40.5800, -74.1500)]:
+        found = index.nearest(lat, lng, 8)
+        assert [address for address, _ in found] == [address for address, _ in coarse.nearest(lat, lng, 8)]
+        assert [distance for _, distance in found] == sorted(distance for _, distance in found)
+
+
+def test_nearest_respects_radius():
+    index = CameraIndex(CAMERAS)
+    assert [address for address, _ in index.nearest(40.7484, -73.9857, 5, radius_km=0.7)] == ["5_Ave_34_St", "5_Ave_42_St"]
+
+
+def test_nearby_returns_details_with_distance():
+    index = CameraIndex(CAMERAS)
+    nearby = index.nearby(40.7484, -73.9857, limit=2)
+    assert list(nearby) == ["5_Ave_34_St", "5_Ave_42_St"]
+    assert nearby["5_Ave_42_St"]["camera_id"] == CAMERAS["5_Ave_42_St"]["camera_id"]
+    assert nearby["5_Ave_42_St"]["distance"] == pytest.approx(0.6, abs=0.05)
+    # The index's own data is not modified
+    assert "distance" not in CAMERAS["5_Ave_42_St"]
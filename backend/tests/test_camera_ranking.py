@@ -0,0 +1,36 @@
+from helpers.camera_ranking import CameraScores, likelihood_score, rank_cameras
+
+
+def scores_with(statuses, history=None):
+    scores = CameraScores()
+    for address, status in statuses.items():
+        scores.on_camera_update({'address': address, 'status': status})
+    scores._history = history or {}
+    return scores
+
+
+def nearby(**distances):
+    return {address: {'camera_id': address, 'distance': km} for address, km in distances.items()}
+
+
+def test_closer_wins_when_everything_else_is_equal():
+    assert likelihood_score(0.2, 'available', 0.5) > likelihood_score(1.5, 'available', 0.5)
+
+
+def test_available_camera_outranks_slightly_closer_congested_one():
+    cameras = nearby(A=0.30, B=0.35)
+    ranked = rank_cameras(cameras, scores_with({'A': 'congested', 'B': 'available'}))
+    assert list(ranked) == ['B', 'A']
+
+
+def test_history_breaks_ties_between_unknown_cameras():
+    cameras = nearby(A=0.5, B=0.5)
+    ranked = rank_cameras(cameras, scores_with({}, history={'A': 0.1, 'B': 0.9}))
+    assert list(ranked) == ['B', 'A']
+
+
+def test_offline_cameras_go_last_even_when_closest():
+    cameras = nearby(A=0.01, B=3.0)
+    ranked = rank_cameras(cameras, scores_with({'A': 'offline'}))
+    assert list(ranked) == ['B', 'A']
+    assert ranked['A'] is cameras['A']
@@ -0,0 +1,189 @@
+import json
+import os
+import threading
+import time
+import pytest
+from flask import Flask
+import helpers.camera_images as camera_images
+
+app = Flask(__name__)
+
+
+class FakeFrame:
+    def __init__(self, offline=False, content=b"jpeg"):
+        self.offline = offline
+        self.content = content
+
+    def jpeg(self):
+        return self.content
+
+    def digest(self):
+        return self.content.hex().ljust(32, "0")
+
+
+def test_stream_format_from_body_or_accept_header():
+    with app.test_request_context(headers={"Accept": "text/event-stream"}):
+        assert camera_images.requested_stream_format({}) == "sse"
+        assert camera_images.requested_stream_format({"stream": "ndjson"}) == "ndjson"
+    with app.test_request_context():
+        assert camera_images.requested_stream_format({}) is None
+        with pytest.raises(ValueError):
+            camera_images.requested_stream_format({"stream": "xml"})
+
+
+def test_ndjson_emits_fast_cameras_first_then_summary(tmp_path, monkeypatch):
+    monkeypatch.setattr(camera_images, "SNAPSHOT_DIR", str(tmp_path))
+    slow_may_finish = threading.Event()
+
+    def fetch(camera_id, stamp, timeout=None):
+        if camera_id == "slow":
+            assert slow_may_finish.wait(5)
+        return FakeFrame(offline=camera_id == "offline")
+
+    monkeypatch.setattr(camera_images, "fetch_camera_frame", fetch)
+    cameras = [("Slow_Cam", "slow"), ("Fast_Cam", "fast"), ("Placeholder_Cam", "offline")]
+    with app.test_request_context():
+        response = camera_images.stream_camera_images("ndjson", cameras, 3, 1, "http://x")
+        chunks = iter(response.response)
+
+        first = json.loads(next(chunks))
+        assert first["type"] == "camera" and first["address"] == "Fast_Cam"
+        slow_may_finish.set()
+        rest = [json.loads(chunk) for chunk in chunks]
+
+    assert response.mimetype == "application/x-ndjson"
+    assert [record["type"] for record in rest] == ["camera", "summary"]
+    assert rest[-1]["requested"] == 3 and rest[-1]["returned"] == 2
+    digest = FakeFrame().digest()
+    assert first["url"] == f"http://x/snapshots/{digest}.jpg"
+    assert (tmp_path / f"{digest}.jpg").read_bytes() == b"jpeg"
+
+
+def test_sse_events(tmp_path, monkeypatch):
+    monkeypatch.setattr(camera_images, "SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(camera_images, "fetch_camera_frame", lambda camera_id, stamp, timeout=None: FakeFrame())
+    with app.test_request_context():
+        response = camera_images.stream_camera_images("sse", [("A", "a")], 1, 1, "http://x")
+        body = "".join(response.response)
+    assert body.startswith("event: camera\ndata: ")
+    assert "event: summary\n" in body
+
+
+def test_unchanged_frame_reuses_snapshot_and_old_ones_expire(tmp_path, monkeypatch):
+    monkeypatch.setattr(camera_images, "SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(camera_images, "fetch_camera_frame", lambda camera_id, stamp, timeout=None: FakeFrame())
+    first = camera_images.save_camera_image("A", "a", 1, "http://x")
+    second = camera_images.save_camera_image("A", "a", 2, "http://x")
+    assert first["url"] == second["url"]
+    assert len(list(tmp_path.iterdir())) == 1
+
+    monkeypatch.setattr(camera_images, "_last_cleanup", 0.0)
+    later = time.time() + camera_images.SNAPSHOT_TTL_SECONDS + 1
+    assert camera_images.cleanup_old_snapshots(now=later) == 1
+    assert not list(tmp_path.iterdir())
+
+
+def test_serving_a_snapshot_keeps_it_without_touching_its_mtime(tmp_path, monkeypatch):
+    monkeypatch.setattr(camera_images, "SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(camera_images, "_served", {})
+    monkeypatch.setattr(camera_images, "fetch_camera_frame", lambda camera_id, stamp, timeout=None: FakeFrame())
+    camera_images.save_camera_image("A", "a", 1, "http://x")
+    (path,) = tmp_path.iterdir()
+    os.utime(path, (1000, 1000))
+
+    served_at = 1000 + camera_images.SNAPSHOT_TTL_SECONDS
+    monkeypatch.setattr(camera_images.time, "time", lambda: served_at)
+    camera_images.save_camera_image("A", "a", 2, "http://x")
+    # Last-Modified stays the time the image was written
+    assert os.path.getmtime(path) == 1000
+
+    monkeypatch.setattr(camera_images, "_last_cleanup", 0.0)
+    assert camera_images.cleanup_old_snapshots(now=served_at + 10) == 0
+    monkeypatch.setattr(camera_images, "_last_cleanup", 0.0)
+    assert camera_images.cleanup_old_snapshots(now=served_at + camera_images.SNAPSHOT_TTL_SECONDS + 1) == 1
+
+
+def test_failed_cameras_are_backfilled_in_candidate_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(camera_images, "SNAPSHOT_DIR", str(tmp_path))
+    fetched = []
+
+    def fetch(camera_id, stamp, timeout=None):
+        fetched.append(camera_id)
+        return None if camera_id in ("b", "c") else FakeFrame(content=camera_id.encode())
+
+    monkeypatch.setattr(camera_images, "fetch_camera_frame", fetch)
+    candidates = [("A", "a"), ("B", "b"), ("C", "c"), ("D", "d"), ("E", "e"), ("F", "f")]
+    images = camera_images.fetch_camera_images(candidates, 3, 1, "http://x")
+    assert [image["address"] for image in images] == ["A", "D", "E"]
+    assert "f" not in fetched
+
+
+def test_stragglers_are_hedged(tmp_path, monkeypatch):
+    monkeypatch.setattr(camera_images, "SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(camera_images, "hedge_delay", lambda: 0.05)
+    calls = []
+    first_call_stuck = threading.Event()
+
+    def fetch(camera_id, stamp, timeout=None):
+        calls.append(camera_id)
+        if len(calls) == 1:
+            # The first request hangs; the hedged duplicate answers
+            first_call_stuck.wait(5)
+        return FakeFrame()
+
+    monkeypatch.setattr(camera_images, "fetch_camera_frame", fetch)
+    start = time.monotonic()
+    images = camera_images.fetch_camera_images([("A", "a")], 1, 1, "http://x")
+    first_call_stuck.set()
+    assert [image["address"] for image in images] == ["A"]
+    assert calls == ["a", "a"]
+    assert time.monotonic() - start < 2
+
+
+def test_failure_after_a_won_hedge_is_backfilled_at_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(camera_images, "SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(camera_images, "hedge_delay", lambda: 0.05)
+    calls = []
+    first_call_stuck = threading.Event()
+
+    def fetch(camera_id, stamp, timeout=None):
+        calls.append(camera_id)
+        if calls == ["a"]:
+            # The original request for "a" hangs; its hedge wins
+            first_call_stuck.wait(5)
+        if camera_id == "b":
+            # ...and "b" fails only after that
+            time.sleep(0.3)
+            return None
+        return FakeFrame(content=camera_id.encode())
+
+    monkeypatch.setattr(camera_images, "fetch_camera_frame", fetch)
+    start = time.monotonic()
+    images = camera_images.fetch_camera_images([("A", "a"), ("B", "b"), ("C", "c")], 2, 1, "http://x", deadline=3)
+    elapsed = time.monotonic() - start
+    first_call_stuck.set()
+    assert [image["address"] for image in images] == ["A", "C"]
+    # The hung copy of "a" must not hold a slot until the deadline
+    assert elapsed < 1
+
+
+def test_deadline_returns_what_is_ready(tmp_path, monkeypatch):
+    monkeypatch.setattr(camera_images, "SNAPSHOT_DIR", str(tmp_path))
+    release = threading.Event()
+
+    def fetch(camera_id, stamp, timeout=None):
+        if camera_id == "slow":
+            release.wait(5)
+        return FakeFrame()
+
+    monkeypatch.setattr(camera_images, "fetch_camera_frame", fetch)
+    images = camera_images.fetch_camera_images([("Slow", "slow"), ("Fast", "fast")], 2, 1, "http://x", deadline=0.3)
+    release.set()
+    assert [image["address"] for image in images] == ["Fast"]
+
+
+def test_hedge_delay_follows_recent_latencies(monkeypatch):
+    monkeypatch.setattr(camera_images, "_latencies", camera_images.deque([0.1 * i for i in range(1, 101)]))
+    assert camera_images.hedge_delay() == pytest.approx(9.1)
+    monkeypatch.setattr(camera_images, "_latencies", camera_images.deque([0.2]))
+    assert camera_images.hedge_delay() == camera_images.HEDGE_DEFAULT_SECONDS
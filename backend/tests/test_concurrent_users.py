@@ -1,6 +1,5 @@
 import asyncio
 import aiohttp
-import json
 import time
 import shutil
 from urllib.parse import urlparse
@@ -47,10 +46,8 @@ async def simulate_user_request(session, user_id, lat, lng):
                 print(f"User {user_id} got no images in response")
                 return None
                 
-            # Extract request_id from first URL
-            first_url = data["images"][0]["url"]
-            url_path = urlparse(first_url).path
-            request_id = Path(url_path).parts[-2]  # Get the UUID directory name
+            # Snapshot file names (content hashes) from the image URLs
+            snapshots = [Path(urlparse(img["url"]).path).name for img in data["images"]]
             
             # Create user's test directory
             user_dir = TEST_PHOTOS_DIR / f"user_{user_id}"
@@ -66,11 +63,11 @@ async def simulate_user_request(session, user_id, lat, lng):
             download_results = await asyncio.gather(*download_tasks)
             successful_downloads = sum(1 for r in download_results if r)
             
-            print(f"User {user_id} got {len(data['images'])} images with request_id: {request_id}")
+            print(f"User {user_id} got {len(data['images'])} images")
             print(f"User {user_id} successfully downloaded {successful_downloads} images")
             
             return {
-                "request_id": request_id,
+                "snapshots": snapshots,
                 "total_images": len(data["images"]),
                 "downloaded": successful_downloads
             }
@@ -124,16 +121,13 @@ async def main():
             else:
                 print(f"User {i}: Failed")
         
-        # Check server-side directories
-        print("\nServer-side directories:")
-        print("=======================")
-        for result in valid_results:
-            img_dir = Path("static/imgs") / result["request_id"]
-            if img_dir.exists():
-                images = list(img_dir.glob("*.jpg"))
-                print(f"Directory {result['request_id']}: {len(images)} images")
-            else:
-                print(f"Directory {result['request_id']}: Not found!")
+        # Check server-side snapshot cache; nearby users share the same files
+        print("\nServer-side snapshots:")
+        print("=====================")
+        shared = {name for result in valid_results for name in result["snapshots"]}
+        for name in sorted(shared):
+            status = "ok" if (Path("static/snapshots") / name).exists() else "Not found!"
+            print(f"{name}: {status}")
         
         # Summary of downloaded files
         print("\nDownloaded files:")
@@ -0,0 +1,115 @@
+import pytest
+from helpers.connection_registry import ConnectionLimitError, ConnectionRegistry, ConnectionStateWriter
+
+
+class FakeSession:
+    """Records executed statements instead of talking to Postgres."""
+
+    def __init__(self, log):
+        self.log = log
+
+    def execute(self, stmt):
+        params = stmt.compile().params
+        self.log.append((params["is_connected"], sorted(params["client_id_1"])))
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_client_stays_connected_until_last_socket_closes():
+    registry = ConnectionRegistry()
+    assert registry.connect("sid-1", "client_a") is True
+    assert registry.connect("sid-2", "client_a") is False
+
+    assert registry.disconnect("sid-1") == ("client_a", False)
+    assert registry.is_connected("client_a")
+
+    assert registry.disconnect("sid-2") == ("client_a", True)
+    assert not registry.is_connected("client_a")
+
+
+def test_disconnect_unknown_sid():
+    registry = ConnectionRegistry()
+    assert registry.disconnect("never-seen") == (None, False)
+
+
+def test_connected_watchers_filters_by_connectivity():
+    registry = ConnectionRegistry()
+    registry.set_camera_watchers("10_Ave_42_St", ["client_a", "client_b"])
+    registry.connect("sid-1", "client_a")
+
+    assert registry.connected_watchers("10_Ave_42_St") == {"client_a"}
+    assert registry.watched_cameras("client_b") == {"10_Ave_42_St"}
+
+    registry.set_camera_watchers("10_Ave_42_St", ["client_b"])
+    assert registry.connected_watchers("10_Ave_42_St") == set()
+    assert registry.watched_cameras("client_a") == set()
+
+
+def test_writer_coalesces_reconnect_storm():
+    log = []
+    writer = ConnectionStateWriter(interval=5, session_factory=lambda: FakeSession(log))
+
+    for _ in range(10):
+        writer.mark("client_a", True)
+        writer.mark("client_a", False)
+    writer.mark("client_a", True)
+    writer.mark("client_b", False)
+
+    assert writer.flush() == 2
+    assert sorted(log) == [(False, ["client_b"]), (True, ["client_a"])]
+
+    # Re-marking an already persisted state writes nothing
+    log.clear()
+    writer.mark("client_a", True)
+    assert writer.flush() == 0
+    assert log == []
+
+
+def test_writer_forgets_disconnected_clients():
+    log = []
+    writer = ConnectionStateWriter(interval=5, session_factory=lambda: FakeSession(log))
+    for i in range(100):
+        writer.mark(f"client_{i}", True)
+    writer.flush()
+    for i in range(100):
+        writer.mark(f"client_{i}", False)
+    assert writer.flush() == 100
+    assert writer._persisted == {}
+
+    # A client coming back is written as connected again
+    log.clear()
+    writer.mark("client_7", True)
+    assert writer.flush() == 1
+    assert log == [(True, ["client_7"])]
+
+
+def test_writer_disabled_with_zero_interval():
+    log = []
+    writer = ConnectionStateWriter(interval=0, session_factory=lambda: FakeSession(log))
+    writer.mark("client_a", True)
+    assert writer.flush() == 0
+    assert log == []
+
+
+def test_connection_limits():
+    registry = ConnectionRegistry(max_connections=3, max_per_client=2)
+    registry.connect("sid-1", "client_a")
+    registry.connect("sid-2", "client_a")
+    with pytest.raises(ConnectionLimitError):
+        registry.connect("sid-3", "client_a")
+
+    registry.connect("sid-4", "client_b")
+    with pytest.raises(ConnectionLimitError):
+        registry.connect("sid-5", "client_c")
+
+    # A refused socket must not leave anything behind
+    assert registry.stats()["sockets"] == 3
+    registry.disconnect("sid-4")
+    registry.connect("sid-5", "client_c")
@@ -0,0 +1,109 @@
+import json
+import pytest
+from helpers import cache_persistence, geocoding
+from helpers.cache_persistence import persistent_cache, restore_caches, save_caches
+from helpers.ttl_cache import TTLCache
+from scripts import fix_null_coordinates as fix
+from scripts.fix_null_coordinates import FakeGeocoder, Throttle, apply_results, geocode_addresses, read_journal
+
+
+@pytest.fixture(autouse=True)
+def empty_geocode_cache(monkeypatch):
+    monkeypatch.setattr(geocoding, "_geocodes", TTLCache(60))
+
+
+def test_throttle_spaces_calls_after_the_burst():
+    now = [0.0]
+    waits = []
+
+    def sleep(seconds):
+        waits.append(seconds)
+        now[0] += seconds
+
+    throttle = Throttle(per_second=10, burst=2, clock=lambda: now[0], sleep=sleep)
+    for _ in range(5):
+        throttle.acquire()
+    # Two at once, then one every 0.1s
+    assert now[0] == pytest.approx(0.3)
+    assert len(waits) == 3
+
+
+def test_bulk_geocoding_resumes_from_the_journal(tmp_path):
+    journal = str(tmp_path / "journal.ndjson")
+    addresses = [f"{n}_Ave_42_St" for n in range(1, 21)] + ["Nowhere_Rd"]
+    # An earlier run got through three addresses, then crashed mid-line
+    with open(journal, "w") as f:
+        for address in addresses[:3]:
+            f.write(json.dumps({"address": address, "formatted_address": address, "status": "ok",
+                                "lat": 40.7, "lng": -73.9}) + "\n")
+        f.write('{"address": "4_Ave')
+
+    geocoder = FakeGeocoder(latency=0.001)
+    results = geocode_addresses(addresses, geocoder, journal, workers=4)
+    assert geocoder.calls == len(addresses) - 3
+    assert results["1_Ave_42_St"]["lat"] == 40.7
+    assert results["Nowhere_Rd"]["status"] == "not_found"
+    assert all(results[address]["status"] == "ok" for address in addresses[:-1])
+    assert read_journal(journal).keys() == set(addresses)
+    assert not fix.resumable(journal, None)
+
+
+def test_journal_of_another_or_finished_run_is_started_over(tmp_path):
+    journal = str(tmp_path / "journal.ndjson")
+    addresses = ["5_Ave_34_St", "5_Ave_42_St"]
+    missing_only = {"input": "abc", "all": False}
+    geocode_addresses(addresses[:1], FakeGeocoder(latency=0), journal, run=missing_only)
+
+    # A refresh of every camera does not inherit the earlier run's results
+    refresh = {"input": "abc", "all": True}
+    geocode_addresses(addresses, FakeGeocoder(latency=0), journal, run=refresh)
+    with open(journal) as f:
+        assert json.loads(f.readline()) == {"run": refresh}
+    assert read_journal(journal).keys() == set(addresses)
+
+    # Neither does the same refresh once it has finished
+    geocode_addresses(addresses[1:], FakeGeocoder(latency=0), journal, run=refresh)
+    assert read_journal(journal).keys() == {"5_Ave_42_St"}
+
+
+def test_results_are_saved_into_the_server_cache_snapshot(tmp_path, monkeypatch):
+    snapshot = str(tmp_path / "caches.json.gz")
+    monkeypatch.setattr(cache_persistence, "_caches", {})
+    cells = TTLCache(60)
+    cells.set("dr5ru6j", {"cameras": []})
+    persistent_cache("nearest_cells", cells.dump, cells.load)
+    save_caches(snapshot)
+
+    # The job only has the geocode cache registered
+    monkeypatch.setattr(cache_persistence, "_caches", {})
+    persistent_cache("geocodes", geocoding._geocodes.dump, geocoding._geocodes.load)
+    geocode_addresses(["5_Ave_34_St"], FakeGeocoder(latency=0), str(tmp_path / "journal.ndjson"))
+    assert save_caches(snapshot, merge=True) == {"geocodes": 1, "nearest_cells": 1}
+
+    restored_cells, restored_geocodes = TTLCache(60), TTLCache(60)
+    monkeypatch.setattr(cache_persistence, "_caches", {})
+    persistent_cache("nearest_cells", restored_cells.dump, restored_cells.load)
+    persistent_cache("geocodes", restored_geocodes.dump, restored_geocodes.load)
+    assert restore_caches(snapshot) == {"nearest_cells": 1, "geocodes": 1}
+    assert restored_geocodes.get(geocoding.geocode_key(fix.format_address("5_Ave_34_St"))) is not None
+
+
+def test_errors_are_retried_on_the_next_run(tmp_path, monkeypatch):
+    journal = str(tmp_path / "journal.ndjson")
+
+    class Down:
+        def geocode(self, address):
+            raise OSError("connection reset")
+
+    results = geocode_addresses(["5_Ave_34_St"], Down(), journal)
+    assert results["5_Ave_34_St"]["status"] == "error"
+
+    camera_data = {"5_Ave_34_St": {"camera_id": "x", "latitude": None, "longitude": None}}
+    fixed, failed = apply_results(camera_data, results)
+    assert (fixed, failed) == ([], ["5_Ave_34_St"])
+
+    results = geocode_addresses(["5_Ave_34_St"], FakeGeocoder(latency=0), journal)
+    fixed, _ = apply_results(camera_data, results)
+    assert fixed == ["5_Ave_34_St"]
+    assert camera_data["5_Ave_34_St"]["latitude"] is not None
+    assert camera_data["5_Ave_34_St"]["formatted_address"] == fix.format_address("5_Ave_34_St")
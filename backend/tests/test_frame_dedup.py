@@ -0,0 +1,98 @@
+import io
+import numpy as np
+import pytest
+from PIL import Image
+from helpers import fetch_image
+
+
+def jpeg_bytes(array, quality=85):
+    buf = io.BytesIO()
+    Image.fromarray(array.astype(np.uint8)).convert("RGB").save(buf, format="JPEG", quality=quality)
+    return buf.getvalue()
+
+
+def scene(seed):
+    rng = np.random.default_rng(seed)
+    return np.kron(rng.integers(0, 255, (12, 16)), np.ones((40, 44)))
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(fetch_image, "_frames", {})
+    monkeypatch.setattr(fetch_image, "_hash_cameras", {})
+
+
+def serve(monkeypatch, payloads):
+    monkeypatch.setattr(fetch_image, "download_image_bytes", lambda camera_id, stamp, timeout=None: payloads[camera_id])
+
+
+def street(cars):
+    """Flat road with `cars` small dark blocks parked along it."""
+    frame = np.full((480, 704), 120.0)
+    for i in range(cars):
+        row, col = divmod(i, 20)
+        frame[300 + row * 30:318 + row * 30, 20 + col * 34:48 + col * 34] = 30
+    return frame
+
+
+def test_repeated_frame_is_unchanged_and_reuses_jpeg(monkeypatch):
+    payloads = {"cam": jpeg_bytes(scene(1))}
+    serve(monkeypatch, payloads)
+    first = fetch_image.fetch_camera_frame("cam", 1)
+    assert not first.unchanged
+    encoded = first.jpeg()
+
+    second = fetch_image.fetch_camera_frame("cam", 2)
+    assert second.unchanged
+    assert second.jpeg() is encoded
+
+
+def test_vehicles_arriving_count_as_a_new_frame(monkeypatch):
+    payloads = {"cam": jpeg_bytes(street(0))}
+    serve(monkeypatch, payloads)
+    digests = [fetch_image.fetch_camera_frame("cam", 0).digest()]
+
+    # Each step barely moves the perceptual hash, but none may reuse the old frame
+    for step, cars in enumerate((10, 20, 21), start=1):
+        payloads["cam"] = jpeg_bytes(street(cars))
+        frame = fetch_image.fetch_camera_frame("cam", step)
+        assert not frame.unchanged
+        digests.append(frame.digest())
+        assert fetch_image.last_frame_digest("cam") == digests[-1]
+    assert len(set(digests)) == len(digests)
+
+
+def test_new_frame_is_encoded_again(monkeypatch):
+    payloads = {"cam": jpeg_bytes(scene(1))}
+    serve(monkeypatch, payloads)
+    first = fetch_image.fetch_camera_frame("cam", 1).jpeg()
+
+    payloads["cam"] = jpeg_bytes(scene(2))
+    frame = fetch_image.fetch_camera_frame("cam", 2)
+    assert not frame.unchanged
+    assert frame.jpeg() != first
+    assert Image.open(io.BytesIO(frame.jpeg())).width == 640
+
+
+def test_frame_shared_by_many_cameras_is_placeholder(monkeypatch):
+    placeholder = jpeg_bytes(scene(7))
+    serve(monkeypatch, {f"cam_{i}": placeholder for i in range(3)})
+    frames = [fetch_image.fetch_camera_frame(f"cam_{i}", 1) for i in range(3)]
+    assert not frames[0].offline
+    assert frames[2].offline
+
+
+def test_cameras_that_merely_look_alike_are_not_placeholders(monkeypatch):
+    # Three dark night scenes: the same dHash, different bytes
+    night = [jpeg_bytes(np.full((480, 704), 10 + i)) for i in range(3)]
+    assert len({fetch_image.dhash(data) for data in night}) == 1
+    serve(monkeypatch, {f"cam_{i}": data for i, data in enumerate(night)})
+    frames = [fetch_image.fetch_camera_frame(f"cam_{i}", 1) for i in range(3)]
+    assert not any(frame.offline for frame in frames)
+
+
+def test_configured_placeholder_hash(monkeypatch):
+    data = jpeg_bytes(scene(3))
+    monkeypatch.setattr(fetch_image, "PLACEHOLDER_HASHES", {fetch_image.dhash(data)})
+    serve(monkeypatch, {"cam": data})
+    assert fetch_image.fetch_camera_frame("cam", 1).offline
@@ -0,0 +1,86 @@
+from helpers.gridlock_tracker import CameraTracker, GridlockTracker
+
+
+def row_of_cars(count, shift=0.0):
+    return [(0.05 + i * 0.1 + shift, 0.5, 0.12 + i * 0.1 + shift, 0.6, 0.9) for i in range(count)]
+
+
+def test_cars_become_stationary_after_threshold():
+    tracker = CameraTracker(stationary_seconds=180, parked_seconds=900)
+    assert tracker.update(row_of_cars(5), 0) == 0
+    assert tracker.update(row_of_cars(5), 120) == 0
+    assert tracker.update(row_of_cars(5), 180) == 5
+
+
+def test_moving_cars_reset_their_clock():
+    tracker = CameraTracker(stationary_seconds=180)
+    for step in range(6):
+        stationary = tracker.update(row_of_cars(5, shift=0.02 * step), step * 60)
+    assert stationary == 0
+
+
+def test_long_parked_cars_are_ignored():
+    tracker = CameraTracker(stationary_seconds=180, parked_seconds=900)
+    for t in range(0, 1000, 60):
+        stationary = tracker.update(row_of_cars(5), t)
+    assert stationary == 0
+
+
+def test_tracks_and_history_are_bounded():
+    tracker = CameraTracker(max_tracks=8, history=4)
+    for t in range(10):
+        tracker.update([(x / 100, 0.1, x / 100 + 0.005, 0.11) for x in range(0, 100, 2)], t)
+    assert len(tracker.tracks) <= 8
+    assert len(tracker.history) == 4
+
+
+def test_unmatched_tracks_expire():
+    tracker = CameraTracker(max_missed=1)
+    tracker.update(row_of_cars(3), 0)
+    tracker.update([], 60)
+    assert len(tracker.tracks) == 3
+    tracker.update([], 120)
+    assert tracker.tracks == []
+
+
+def test_gridlock_events_enter_and_clear():
+    events = []
+    gridlock = GridlockTracker(lambda address, jammed: events.append((address, jammed)),
+                               min_vehicles=4, confirm=2, stationary_seconds=180)
+    for t in (0, 60, 120, 180, 240):
+        gridlock.observe("Grand_St_Bowery", row_of_cars(6), t)
+    assert events == [("Grand_St_Bowery", True)]
+    assert gridlock.is_gridlocked("Grand_St_Bowery")
+
+    # Traffic clears; one observation is not enough to leave gridlock
+    gridlock.observe("Grand_St_Bowery", row_of_cars(1), 300)
+    assert gridlock.is_gridlocked("Grand_St_Bowery")
+    gridlock.observe("Grand_St_Bowery", row_of_cars(1), 360)
+    assert events[-1] == ("Grand_St_Bowery", False)
+
+
+def test_poller_does_not_count_unchanged_frames():
+    from types import SimpleNamespace
+    from helpers.status_engine import UNCHANGED
+    from status_poller import StatusPoller
+
+    class Counter:
+        def __init__(self):
+            self.submitted = []
+
+        def submit(self, address, image, captured_at=None):
+            self.submitted.append((address, captured_at))
+
+    frames = iter([
+        SimpleNamespace(offline=False, unchanged=False, data=b"jpeg", image="decoded"),
+        SimpleNamespace(offline=False, unchanged=True, data=b"jpeg"),
+    ])
+    poller = StatusPoller({"Main St": {"camera_id": "cam"}}, fetch=lambda camera_id, stamp: next(frames),
+                          counter=Counter())
+    try:
+        assert poller.fetch_snapshots(60) == {"Main St": "decoded"}
+        # A frozen feed repeats the same bytes; it must not read as gridlock
+        assert poller.fetch_snapshots(120) == {"Main St": UNCHANGED}
+    finally:
+        poller._executor.shutdown()
+    assert [stamp.timestamp() for _, stamp in poller.counter.submitted] == [60]
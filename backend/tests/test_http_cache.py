@@ -0,0 +1,94 @@
+from flask import Flask, jsonify
+import helpers.camera_images as camera_images
+from helpers.http_cache import NO_STORE, apply_cache_policy, cache_policy, short_lived
+from routes.snapshots import bp as snapshots_bp
+
+
+def make_app():
+    app = Flask(__name__)
+    app.after_request(apply_cache_policy)
+    app.register_blueprint(snapshots_bp)
+
+    @app.get("/data")
+    @cache_policy(short_lived(60))
+    def data():
+        return jsonify(value=1)
+
+    @app.get("/missing")
+    @cache_policy(short_lived(60))
+    def missing():
+        return jsonify(error="Camera not found"), 404
+
+    @app.get("/limited")
+    @cache_policy(short_lived(30))
+    def limited():
+        return jsonify(error="Rate limit exceeded"), 429
+
+    @app.get("/plain")
+    def plain():
+        return jsonify(value=2)
+
+    @app.post("/search")
+    def search():
+        return jsonify(value=3)
+
+    @app.post("/watch")
+    @cache_policy(NO_STORE)
+    def watch():
+        return jsonify(value=4)
+
+    return app
+
+
+def test_get_gets_etag_and_304_on_match():
+    client = make_app().test_client()
+    first = client.get("/data")
+    assert first.status_code == 200
+    assert first.headers["Cache-Control"] == "public, max-age=60"
+    etag = first.headers["ETag"]
+
+    again = client.get("/data", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+
+    assert client.get("/plain").headers["Cache-Control"] == "no-cache"
+
+
+def test_post_and_mutations_are_not_stored():
+    client = make_app().test_client()
+    for path in ("/search", "/watch"):
+        response = client.post(path)
+        assert response.headers["Cache-Control"] == "no-store"
+        assert "ETag" not in response.headers
+
+
+def test_snapshot_is_immutable_and_conditional(tmp_path, monkeypatch):
+    monkeypatch.setattr(camera_images, "SNAPSHOT_DIR", str(tmp_path))
+    digest = "ab" * 16
+    (tmp_path / f"{digest}.jpg").write_bytes(b"jpeg")
+    client = make_app().test_client()
+
+    response = client.get(f"/snapshots/{digest}.jpg")
+    assert response.status_code == 200
+    assert response.data == b"jpeg"
+    assert response.mimetype == "image/jpeg"
+    assert "immutable" in response.headers["Cache-Control"]
+    assert response.headers["ETag"] == f'"{digest}"'
+    assert "Last-Modified" in response.headers
+
+    cached = client.get(f"/snapshots/{digest}.jpg", headers={"If-None-Match": f'"{digest}"'})
+    assert cached.status_code == 304
+    response.close()
+    cached.close()
+
+    assert client.get(f"/snapshots/{'cd' * 16}.jpg").status_code == 404
+    assert client.get("/snapshots/..%2Fsecret.jpg").status_code == 404
+
+
+def test_errors_are_never_stored():
+    client = make_app().test_client()
+    for path, status in (("/missing", 404), ("/limited", 429), (f"/snapshots/{'cd' * 16}.jpg", 404)):
+        response = client.get(path)
+        assert response.status_code == status
+        assert response.headers["Cache-Control"] == "no-store"
+        assert "ETag" not in response.headers
@@ -0,0 +1,70 @@
+import pytest
+from helpers.camera_updates import deliver_camera_update, send_due_notifications
+from helpers.connection_registry import ConnectionRegistry
+from helpers.message_bus import (
+    CAMERA_UPDATE_CHANNEL,
+    LocalMessageBus,
+    create_message_bus,
+)
+from helpers.notification_scheduler import NotificationScheduler
+
+
+class Node:
+    """A simulated WebSocket node: its own registry, subscribed to the shared bus."""
+
+    def __init__(self, bus):
+        self.registry = ConnectionRegistry()
+        self.scheduler = NotificationScheduler()
+        self.sent = []
+        bus.subscribe(CAMERA_UPDATE_CHANNEL, self.on_update)
+
+    def on_update(self, message):
+        deliver_camera_update(message, self.registry, self.scheduler)
+
+    def tick(self):
+        send_due_notifications(self.scheduler, self.registry, self.emit)
+
+    def emit(self, event, payload, room):
+        for update in payload["updates"]:
+            self.sent.append((event, update["address"], room))
+
+
+def test_each_node_delivers_to_its_own_watchers():
+    bus = LocalMessageBus()
+    node_a, node_b = Node(bus), Node(bus)
+    node_a.registry.connect("sid-1", "client_a")
+    node_b.registry.connect("sid-2", "client_b")
+
+    delivered_to = bus.publish(CAMERA_UPDATE_CHANNEL, {
+        "address": "10_Ave_42_St",
+        "status": "available",
+        "timestamp": "2024-01-01T00:00:00+00:00",
+        "watchers": {"client_a": 15, "client_b": 15, "client_offline": 15},
+    })
+    node_a.tick()
+    node_b.tick()
+
+    assert delivered_to == 2
+    assert node_a.sent == [("camera_update", "10_Ave_42_St", "client_a")]
+    assert node_b.sent == [("camera_update", "10_Ave_42_St", "client_b")]
+
+
+def test_failing_subscriber_does_not_block_others():
+    bus = LocalMessageBus()
+    received = []
+
+    def broken(message):
+        raise RuntimeError("boom")
+
+    bus.subscribe("chan", broken)
+    bus.subscribe("chan", received.append)
+    bus.publish("chan", {"n": 1})
+
+    assert received == [{"n": 1}]
+
+
+def test_create_message_bus_schemes():
+    assert isinstance(create_message_bus("local://"), LocalMessageBus)
+    assert isinstance(create_message_bus(""), LocalMessageBus)
+    with pytest.raises(ValueError):
+        create_message_bus("amqp://localhost")
@@ -0,0 +1,148 @@
+import threading
+import pytest
+from flask import Flask
+from helpers import geohash
+from helpers.camera_index import CameraIndex
+from helpers.http_cache import apply_cache_policy
+from helpers.ttl_cache import TTLCache
+import routes.nearest_cell as nearest_cell
+
+
+def test_geohash_round_trip():
+    # Reference value for the Empire State Building
+    assert geohash.encode(40.7484, -73.9857, 7) == "dr5ru6j"
+    lat_min, lng_min, lat_max, lng_max = geohash.bounds("dr5ru6j")
+    assert lat_min <= 40.7484 <= lat_max and lng_min <= -73.9857 <= lng_max
+    lat, lng = geohash.center("dr5ru6j")
+    assert geohash.encode(lat, lng, 7) == "dr5ru6j"
+    with pytest.raises(ValueError):
+        geohash.bounds("dr5ria")
+
+
+def test_ttl_cache_is_single_flight_and_expires():
+    now = [0.0]
+    cache = TTLCache(ttl=10, clock=lambda: now[0])
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        assert release.wait(5)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert sorted(hit for _, hit in results) == [False, True, True, True]
+
+    now[0] = 11
+    assert cache.get("k") is None
+
+
+@pytest.fixture
+def client(monkeypatch):
+    index = CameraIndex({
+        "5_Ave_34_St": {"camera_id": "a", "latitude": 40.7484, "longitude": -73.9857},
+        "5_Ave_42_St": {"camera_id": "b", "latitude": 40.7532, "longitude": -73.9822},
+    })
+    fetched = []
+
+    def fetch(candidates, numCams, stamp, base_url):
+        fetched.extend(addr for addr, _ in candidates[:numCams])
+        return [{"address": addr, "url": f"{base_url}/snapshots/{camera_id * 32}.jpg"}
+                for addr, camera_id in candidates[:numCams]]
+
+    monkeypatch.setattr(nearest_cell, "get_camera_index", lambda: index)
+    monkeypatch.setattr(nearest_cell, "fetch_camera_images", fetch)
+    monkeypatch.setattr(nearest_cell, "cleanup_old_snapshots", lambda: 0)
+    monkeypatch.setattr(nearest_cell, "_results", TTLCache(30))
+
+    app = Flask(__name__)
+    app.after_request(apply_cache_policy)
+    app.register_blueprint(nearest_cell.bp)
+    test_client = app.test_client()
+    test_client.fetched = fetched
+    return test_client
+
+
+def test_location_redirects_to_its_cell(client):
+    response = client.get("/nearest?lat=40.74845&lng=-73.98565&numCams=2")
+    assert response.status_code == 302
+    assert response.headers["Location"].endswith("/nearest/dr5ru6j?numCams=2")
+
+    coarse = client.get("/nearest?lat=40.74845&lng=-73.98565&precision=5")
+    assert "/nearest/dr5ru?" in coarse.headers["Location"]
+
+    outside = client.get("/nearest?lat=51.5&lng=-0.1")
+    assert outside.status_code == 400
+    assert outside.headers["Cache-Control"] == "no-store"
+    assert client.get("/nearest?lat=40.75&lng=-73.98&precision=12").status_code == 400
+
+
+def test_cell_results_are_shared_and_cacheable(client):
+    first = client.get("/nearest/dr5ru6j?numCams=2")
+    assert first.status_code == 200
+    body = first.get_json()
+    assert [camera["address"] for camera in body["cameras"]] == ["5_Ave_34_St", "5_Ave_42_St"]
+    assert body["images"][0]["url"].endswith(".jpg")
+    assert first.headers["Cache-Control"] == f"public, max-age={nearest_cell.NEAREST_CACHE_SECONDS}"
+
+    # A second user in the same cell reuses the memoised answer
+    second = client.get("/nearest/DR5RU6J?numCams=2")
+    assert second.get_json() == body
+    assert client.fetched == ["5_Ave_34_St", "5_Ave_42_St"]
+
+    revalidated = client.get("/nearest/dr5ru6j?numCams=2", headers={"If-None-Match": first.headers["ETag"]})
+    assert revalidated.status_code == 304
+
+
+def test_incomplete_results_are_not_memoised(client, monkeypatch):
+    failing = {"b"}
+
+    def fetch(candidates, numCams, stamp, base_url):
+        client.fetched.extend(addr for addr, _ in candidates[:numCams])
+        return [{"address": addr, "url": f"{base_url}/snapshots/{camera_id * 32}.jpg"}
+                for addr, camera_id in candidates[:numCams] if camera_id not in failing]
+
+    monkeypatch.setattr(nearest_cell, "fetch_camera_images", fetch)
+    partial = client.get("/nearest/dr5ru6j?numCams=2")
+    assert len(partial.get_json()["images"]) == 1
+    assert partial.headers["Cache-Control"] == "no-cache"
+
+    # The next request fetches again, and its complete answer is kept
+    failing.clear()
+    full = client.get("/nearest/dr5ru6j?numCams=2")
+    assert len(full.get_json()["images"]) == 2
+    assert full.headers["Cache-Control"] == f"public, max-age={nearest_cell.NEAREST_CACHE_SECONDS}"
+    client.get("/nearest/dr5ru6j?numCams=2")
+    assert len(client.fetched) == 4
+
+
+def test_shed_responses_are_not_stored(client, monkeypatch):
+    fresh = client.get("/nearest/dr5ru6j?numCams=2")
+    monkeypatch.setattr(nearest_cell, "cached_only", lambda: True)
+
+    # Even the memoised answer must not outlive the overload in a shared cache
+    shed = client.get("/nearest/dr5ru6j?numCams=2")
+    assert shed.get_json() == fresh.get_json()
+    assert shed.headers["Cache-Control"] == "no-store"
+    assert "ETag" not in shed.headers
+
+    cold = client.get("/nearest/dr5ru6j?numCams=1")
+    assert cold.status_code == 200
+    assert cold.headers["Cache-Control"] == "no-store"
+
+
+def test_invalid_cells(client):
+    assert client.get("/nearest/dr5r").status_code == 400
+    assert client.get("/nearest/dr5ruai").status_code == 400
+    assert client.get("/nearest/gcpvj0d").status_code == 400  # London
+    too_many = client.get("/nearest/dr5ru6j?numCams=9")
+    assert too_many.status_code == 400
+    assert too_many.headers["Cache-Control"] == "no-store"
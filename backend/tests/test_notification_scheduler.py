@@ -0,0 +1,83 @@
+from helpers.notification_scheduler import NotificationScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_scheduler(interval_minutes=10):
+    clock = FakeClock()
+    scheduler = NotificationScheduler(clock=clock)
+    scheduler.sync_camera("10_Ave_42_St", {"client_a": interval_minutes})
+    return scheduler, clock
+
+
+def test_first_status_is_sent_immediately():
+    scheduler, _ = make_scheduler()
+    scheduler.record_status("10_Ave_42_St", "available", "t0")
+
+    due = scheduler.pop_due()
+    assert due == {"client_a": [
+        {"address": "10_Ave_42_St", "status": "available", "timestamp": "t0", "seq": 1}
+    ]}
+
+
+def test_flips_inside_interval_are_coalesced():
+    scheduler, clock = make_scheduler(interval_minutes=10)
+    scheduler.record_status("10_Ave_42_St", "available", "t0")
+    scheduler.pop_due()
+    scheduler.ack("client_a", "10_Ave_42_St", 1)
+
+    clock.now = 60
+    scheduler.record_status("10_Ave_42_St", "congested", "t1")
+    scheduler.record_status("10_Ave_42_St", "offline", "t2")
+    assert scheduler.pop_due() == {}
+
+    clock.now = 600
+    due = scheduler.pop_due()
+    assert [u["status"] for u in due["client_a"]] == ["offline"]
+
+
+def test_flip_back_to_acked_status_sends_nothing():
+    scheduler, clock = make_scheduler(interval_minutes=10)
+    scheduler.record_status("10_Ave_42_St", "available", "t0")
+    scheduler.pop_due()
+    scheduler.ack("client_a", "10_Ave_42_St", 1)
+
+    clock.now = 60
+    scheduler.record_status("10_Ave_42_St", "congested", "t1")
+    scheduler.record_status("10_Ave_42_St", "available", "t2")
+
+    clock.now = 600
+    assert scheduler.pop_due() == {}
+
+
+def test_unacked_update_is_resent_next_interval():
+    scheduler, clock = make_scheduler(interval_minutes=10)
+    scheduler.record_status("10_Ave_42_St", "available", "t0")
+    scheduler.pop_due()
+
+    clock.now = 600
+    assert scheduler.pop_due()["client_a"][0]["seq"] == 1
+
+
+def test_disconnected_client_catches_up_on_wake():
+    scheduler, clock = make_scheduler()
+    scheduler.record_status("10_Ave_42_St", "available", "t0")
+    assert scheduler.pop_due(is_connected=lambda client_id: False) == {}
+
+    clock.now = 5
+    scheduler.wake_client("client_a")
+    assert "client_a" in scheduler.pop_due()
+
+
+def test_removed_watcher_is_not_notified():
+    scheduler, _ = make_scheduler()
+    scheduler.sync_camera("10_Ave_42_St", {})
+    scheduler.record_status("10_Ave_42_St", "available", "t0")
+    assert scheduler.pop_due() == {}
+    assert scheduler.stats()["watches"] == 0
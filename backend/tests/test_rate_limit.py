@@ -0,0 +1,115 @@
+import multiprocessing
+import time
+import pytest
+from flask import Flask, jsonify
+from helpers.rate_limit import (
+    Limit, MemoryStorage, RateLimiter, SharedMemoryStorage, camera_request_cost, key_hash, rate_limit,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_burst_then_sustained_rate():
+    clock = Clock()
+    limiter = RateLimiter(MemoryStorage(), clock=clock)
+    limit = Limit(per_minute=60, burst=3)
+
+    assert [limiter.hit("a", limit)[0] for _ in range(4)] == [True, True, True, False]
+    # Other clients have their own budget
+    assert limiter.hit("b", limit)[0]
+
+    allowed, retry_after = limiter.hit("a", limit)
+    assert not allowed and retry_after == pytest.approx(1.0)
+    clock.now += 1.0
+    assert limiter.hit("a", limit)[0]
+    assert not limiter.hit("a", limit)[0]
+
+
+def test_cost_weighted_requests():
+    clock = Clock()
+    limiter = RateLimiter(MemoryStorage(), clock=clock)
+    limit = Limit(per_minute=60, burst=10)
+
+    assert limiter.hit("a", limit, cost=8)[0]
+    allowed, retry_after = limiter.hit("a", limit, cost=5)
+    assert not allowed and retry_after == pytest.approx(3.0)
+    # A cheaper request still fits in what is left
+    assert limiter.hit("a", limit, cost=2)[0]
+
+
+def test_denials_are_answered_without_touching_storage():
+    class CountingStorage(MemoryStorage):
+        calls = 0
+
+        def update(self, *args):
+            CountingStorage.calls += 1
+            return super().update(*args)
+
+    clock = Clock()
+    limiter = RateLimiter(CountingStorage(), clock=clock)
+    limit = Limit(per_minute=60, burst=1)
+    limiter.hit("a", limit)
+    limiter.hit("a", limit)
+    calls = CountingStorage.calls
+    for _ in range(100):
+        assert not limiter.hit("a", limit)[0]
+    assert CountingStorage.calls == calls
+
+    clock.now += 1.0
+    assert limiter.hit("a", limit)[0]
+
+
+def _spend(path, results):
+    storage = SharedMemoryStorage(path, buckets=16)
+    limiter = RateLimiter(storage)
+    results.put(sum(limiter.hit("client", Limit(per_minute=1, burst=10))[0] for _ in range(10)))
+
+
+def test_shared_storage_holds_across_processes(tmp_path):
+    path = str(tmp_path / "limits")
+    results = multiprocessing.get_context("fork").Queue()
+    workers = [multiprocessing.get_context("fork").Process(target=_spend, args=(path, results)) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(10)
+    assert sum(results.get(timeout=5) for _ in workers) == 10
+
+
+def test_shared_storage_reuses_stale_slots(tmp_path):
+    storage = SharedMemoryStorage(str(tmp_path / "limits"), buckets=1)
+    now = time.time()
+    # More clients than one bucket holds: the oldest entry is replaced
+    for i in range(SharedMemoryStorage.SLOTS_PER_BUCKET + 1):
+        assert storage.update(key_hash(str(i)), now + i, 1.0, 1.0)[0]
+    assert storage.update(key_hash("8"), now + 8, 1.0, 1.0)[0] is False
+    storage.close()
+
+
+def test_views_get_429_with_retry_after(monkeypatch):
+    app = Flask(__name__)
+    RateLimiter(MemoryStorage()).init_app(app)
+
+    @app.post("/cameras")
+    @rate_limit(60, 10, cost=camera_request_cost)
+    def cameras():
+        return jsonify(ok=True)
+
+    @app.get("/free")
+    def free():
+        return jsonify(ok=True)
+
+    client = app.test_client()
+    assert client.post("/cameras", json={"numCams": 8}).status_code == 200
+    limited = client.post("/cameras", json={"addresses": ["a", "b"], "numCams": 4})
+    assert limited.status_code == 429
+    assert limited.headers["Retry-After"] == "4"
+    assert limited.get_json()["error"] == "Rate limit exceeded"
+    assert client.post("/cameras", json={"numCams": 1}).status_code == 200
+    assert all(client.get("/free").status_code == 200 for _ in range(20))
@@ -0,0 +1,73 @@
+from flask import Flask
+from helpers import readiness
+from helpers.readiness import Check, Readiness
+
+
+def test_required_checks_are_retried_until_they_pass():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RuntimeError("database starting")
+        return {"connections": 2}
+
+    probe = Readiness([Check("database", flaky)], retry_seconds=0)
+    assert not probe.ready
+    assert probe.run_checks()
+    assert probe.ready
+    assert len(attempts) == 3
+
+    report = probe.report()
+    assert report["ready"] is True
+    check = report["checks"][0]
+    assert check["ok"] and check["detail"] == {"connections": 2}
+    assert "error" not in check
+    assert check["ms"] >= 0
+
+
+def test_failed_warmup_is_reported_but_does_not_block_readiness():
+    def unreachable():
+        raise RuntimeError("camera API unreachable")
+
+    probe = Readiness([Check("registry", lambda: None), Check("upstream", unreachable, required=False)])
+    assert probe.run_checks()
+    upstream = probe.report()["checks"][1]
+    assert upstream["ok"] is False
+    assert upstream["error"] == "camera API unreachable"
+
+
+def test_stopping_while_a_required_check_fails_leaves_it_not_ready():
+    def down():
+        raise RuntimeError("down")
+
+    probe = Readiness([Check("database", down)], retry_seconds=60)
+    probe.stop()
+    assert not probe.run_checks()
+    assert probe.report()["checks"][0]["ok"] is False
+
+
+def test_readyz_reports_503_then_200(monkeypatch):
+    from routes.health import bp
+    app = Flask(__name__)
+    app.register_blueprint(bp)
+    probe = Readiness([Check("registry", lambda: {"cameras": 1})])
+    monkeypatch.setattr(readiness, "_readiness", probe)
+    client = app.test_client()
+
+    assert client.get("/healthz").get_json() == {"status": "ok"}
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.get_json()["checks"][0]["ok"] is None
+
+    probe.run_checks()
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    assert response.get_json()["ready"] is True
+
+    # Once shutdown begins the load balancer is told to stop sending traffic
+    import routes
+    monkeypatch.setattr(routes.graceful_shutdown, "draining", True)
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.get_json()["draining"] is True
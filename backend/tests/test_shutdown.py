@@ -0,0 +1,68 @@
+import threading
+from flask import Flask
+from helpers import shutdown
+from helpers.shutdown import CLOSE, FLUSH, GracefulShutdown, on_shutdown, run_shutdown_callbacks
+
+
+def test_callbacks_run_by_phase_and_survive_failures(monkeypatch):
+    monkeypatch.setattr(shutdown, "_callbacks", [])
+    calls = []
+    on_shutdown(lambda: calls.append("close pool"), CLOSE, name="pool")
+    on_shutdown(lambda: calls.append("flush writes"), FLUSH, name="writer")
+
+    def broken():
+        raise RuntimeError("already stopped")
+
+    on_shutdown(broken, name="prober")
+    on_shutdown(lambda: calls.append("stop poller"), name="poller")
+
+    assert run_shutdown_callbacks() == ["prober"]
+    assert calls == ["stop poller", "flush writes", "close pool"]
+    # Each callback runs once
+    assert run_shutdown_callbacks() == []
+    assert calls == ["stop poller", "flush writes", "close pool"]
+
+
+def test_shutdown_waits_for_in_flight_requests(monkeypatch):
+    monkeypatch.setattr(shutdown, "_callbacks", [])
+    app = Flask(__name__)
+    drain = GracefulShutdown(grace_seconds=0, drain_seconds=5)
+    drain.init_app(app)
+    entered = threading.Event()
+    release = threading.Event()
+
+    @app.get("/slow")
+    def slow():
+        entered.set()
+        release.wait(5)
+        return "done"
+
+    client = app.test_client()
+    responses = []
+    request_thread = threading.Thread(target=lambda: responses.append(client.get("/slow")))
+    request_thread.start()
+    entered.wait(5)
+    assert drain.in_flight == 1
+
+    steps = []
+    on_shutdown(lambda: steps.append(drain.in_flight), name="record")
+    listening = []
+    shutdown_thread = threading.Thread(target=lambda: listening.append(drain.shutdown(lambda: listening.append("closed"))))
+    shutdown_thread.start()
+    shutdown_thread.join(0.2)
+    # Still draining: the listener is closed but cleanup waits for the request
+    assert shutdown_thread.is_alive()
+    assert drain.draining and listening == ["closed"] and steps == []
+
+    release.set()
+    request_thread.join(5)
+    shutdown_thread.join(5)
+    assert responses[0].data == b"done"
+    assert listening == ["closed", True]
+    assert steps == [0]
+
+
+def test_drain_deadline_is_bounded():
+    drain = GracefulShutdown(grace_seconds=0, drain_seconds=0.05)
+    drain.in_flight = 1
+    assert drain.wait_for_requests(0.05) is False
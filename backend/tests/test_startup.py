@@ -0,0 +1,32 @@
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+print(json.dumps({
+    "seconds": time.perf_counter() - start,
+    "modules": [m for m in ("PIL", "numpy", "googlemaps", "psutil", "flask_socketio") if m in sys.modules],
+    "routes": sorted(rule.rule for rule in main.app.url_map.iter_rules()),
+}))
+"""
+
+
+def test_importing_main_is_fast_and_does_not_touch_the_database():
+    # An unreachable database must not stop the app from being built
+    env = dict(os.environ, DATABASE_URL="postgresql://nobody@unreachable.invalid:5432/none")
+    result = subprocess.run([sys.executable, "-c", PROBE], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert report["modules"] == []
+    assert "/fiveNearest" in report["routes"]
+    assert "/watch_camera" in report["routes"]
+    assert report["seconds"] < 5
+    assert "Initializing database" not in result.stdout
@@ -0,0 +1,72 @@
+import io
+import numpy as np
+from PIL import Image
+from helpers.status_engine import UNCHANGED, CameraStatusEngine, prepare_frame
+
+
+def jpeg(array):
+    """Encode an array the way NYCTMC serves snapshots, then reopen it lazily."""
+    buf = io.BytesIO()
+    Image.fromarray(array.astype(np.uint8)).save(buf, format="JPEG", quality=85)
+    buf.seek(0)
+    return Image.open(buf)
+
+
+def road(seed=0):
+    rng = np.random.default_rng(seed)
+    return np.tile(np.linspace(40, 200, 352), (240, 1)) + rng.normal(0, 3, (240, 352))
+
+
+def with_cars(frame):
+    frame = frame.copy()
+    frame[80:220, 20:330] = 250
+    return frame
+
+
+def test_prepare_frame_downsamples_to_grayscale():
+    frame = prepare_frame(jpeg(road()))
+    assert frame.shape == (48, 64)
+    assert frame.dtype == np.uint8
+
+
+def test_classifies_and_confirms_changes():
+    engine = CameraStatusEngine(confirm_frames=2)
+
+    changes, observed = engine.process({"cam": jpeg(road())})
+    assert changes == [("cam", "available")]
+
+    # One congested frame is not enough to flip the status
+    changes, _ = engine.process({"cam": jpeg(with_cars(road(1)))})
+    assert changes == []
+    changes, _ = engine.process({"cam": jpeg(with_cars(road(2)))})
+    assert changes == [("cam", "congested")]
+    assert engine.status("cam") == "congested"
+
+
+def test_failed_fetch_and_blank_frame_are_offline():
+    engine = CameraStatusEngine(confirm_frames=1)
+    blank = np.full((240, 352), 128)
+    changes, _ = engine.process({"down": None, "blank": jpeg(blank)})
+    assert sorted(changes) == [("blank", "offline"), ("down", "offline")]
+
+
+def test_budget_defers_remaining_cameras_round_robin():
+    engine = CameraStatusEngine(cpu_budget=-1)
+    snapshots = {f"cam_{i}": jpeg(road(i)) for i in range(3)}
+
+    _, observed = engine.process(snapshots)
+    assert list(observed) == ["cam_0"]
+    assert engine.last_cycle["deferred"] == 2
+
+    snapshots = {f"cam_{i}": jpeg(road(i)) for i in range(3)}
+    _, observed = engine.process(snapshots)
+    assert list(observed) == ["cam_1"]
+
+
+def test_unchanged_frames_keep_status_without_analysis():
+    engine = CameraStatusEngine()
+    engine.process({"cam": jpeg(road())})
+
+    changes, observed = engine.process({"cam": UNCHANGED, "never_seen": UNCHANGED})
+    assert changes == []
+    assert observed == {"cam": "available"}
@@ -0,0 +1,61 @@
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import text
+from database.history import (
+    camera_keys, ensure_partitions, partition_bounds, partition_name, purge_expired_default_rows,
+    record_samples, status_code,
+)
+
+
+def test_partition_names_sort_chronologically():
+    names = [partition_name(date(2024, m, d)) for m, d in [(12, 31), (1, 2), (10, 1)]]
+    assert sorted(names) == [
+        "camera_status_history_p20240102",
+        "camera_status_history_p20241001",
+        "camera_status_history_p20241231",
+    ]
+
+
+def test_partition_bounds_cover_one_utc_day():
+    start, end = partition_bounds(date(2024, 3, 10))
+    assert start == datetime(2024, 3, 10, tzinfo=timezone.utc)
+    assert end == datetime(2024, 3, 11, tzinfo=timezone.utc)
+
+
+def test_status_codes():
+    assert status_code("available") == 1
+    assert status_code("offline") == 3
+    assert status_code("something-new") == 0
+
+
+def test_migrate_creates_the_partitions_inserts_need(app_schema):
+    from database.db import engine
+    with engine.connect() as conn:
+        partitions = set(conn.execute(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid"
+        )).scalars())
+    today = datetime.now(timezone.utc).date()
+    for table in ("camera_status_history", "camera_vehicle_counts"):
+        assert f"{table}_default" in partitions
+        assert partition_name(today, table) in partitions
+
+
+def test_rows_in_the_default_partition_move_into_a_new_day_and_expire(db_session):
+    day = date(2031, 1, 10)
+    ensure_partitions(db_session, today=day, ahead=0)
+    keys = camera_keys(db_session, ["Default_Partition_Ave"])
+
+    # The job fell behind: these land in the default partition
+    late = datetime(2031, 1, 12, 9, tzinfo=timezone.utc)
+    old = datetime(2030, 11, 1, 9, tzinfo=timezone.utc)
+    record_samples(db_session, {"Default_Partition_Ave": "available"}, keys, recorded_at=late)
+    record_samples(db_session, {"Default_Partition_Ave": "offline"}, keys, recorded_at=old)
+    db_session.commit()
+
+    ensure_partitions(db_session, today=day + timedelta(days=2), ahead=0)
+    moved = db_session.execute(text(
+        f"SELECT count(*) FROM {partition_name(late.date())}"
+    )).scalar()
+    assert moved == 1
+
+    assert purge_expired_default_rows(db_session, retention_days=30, today=day) == 1
+    assert db_session.execute(text("SELECT count(*) FROM camera_status_history_default")).scalar() == 0
@@ -0,0 +1,96 @@
+import io
+import threading
+from datetime import datetime, timezone
+import numpy as np
+from PIL import Image
+from helpers.vehicle_counter import InferenceWorker, letterbox, nms
+
+
+def jpeg_bytes(width=352, height=240):
+    buf = io.BytesIO()
+    Image.fromarray(np.full((height, width, 3), 128, dtype=np.uint8)).save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+class FakeDetector:
+    """One box covering the left half of the padded input, per image."""
+
+    def __init__(self, size=320):
+        self.size = size
+        self.batch_sizes = []
+
+    def detect_batch(self, batch):
+        self.batch_sizes.append(len(batch))
+        return [np.array([[0, 0, self.size / 2, self.size / 4, 0.9]], dtype=np.float32) for _ in batch]
+
+
+def test_letterbox_keeps_aspect_ratio_and_pads():
+    array, scale, (width, height) = letterbox(jpeg_bytes(), size=320)
+    assert array.shape == (320, 320, 3)
+    assert abs(width * scale - 320) < 1
+    assert height * scale < 320
+    # Padding below the image
+    assert (array[-1] == 114).all()
+
+
+def test_nms_suppresses_overlapping_boxes():
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 10, 10], [20, 20, 30, 30]], dtype=np.float32)
+    scores = np.array([0.9, 0.8, 0.7], dtype=np.float32)
+    assert sorted(nms(boxes, scores).tolist()) == [0, 2]
+
+
+def test_process_batch_maps_boxes_back_to_frame():
+    detector = FakeDetector()
+    worker = InferenceWorker(detector)
+    stamp = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    results = worker.process_batch([("A", jpeg_bytes(), stamp), ("B", jpeg_bytes(), stamp)])
+
+    assert detector.batch_sizes == [2]
+    assert [address for address, _, _ in results] == ["A", "B"]
+    boxes = results[0][2]
+    assert boxes.shape == (1, 5)
+    # Half of the width; a quarter of the padded height is more than a quarter of the frame
+    assert abs(boxes[0, 2] - 0.5) < 0.01
+    assert boxes[0, 3] > 0.25
+
+
+def test_submit_drops_when_queue_is_full():
+    worker = InferenceWorker(FakeDetector(), queue_size=2)
+    assert worker.submit("A", jpeg_bytes())
+    assert worker.submit("B", jpeg_bytes())
+    assert not worker.submit("C", jpeg_bytes())
+    assert worker.stats["dropped"] == 1
+
+
+def test_worker_batches_up_to_max_batch():
+    detector = FakeDetector()
+    seen = []
+    done = threading.Event()
+
+    def handler(results):
+        seen.extend(address for address, _, _ in results)
+        if len(seen) == 5:
+            done.set()
+
+    worker = InferenceWorker(detector, handlers=[handler], max_batch=3, max_wait=0.2)
+    for i in range(5):
+        worker.submit(f"camera-{i}", jpeg_bytes())
+    worker.start()
+    try:
+        assert done.wait(5)
+    finally:
+        worker.stop()
+
+    assert detector.batch_sizes == [3, 2]
+    assert seen == [f"camera-{i}" for i in range(5)]
+
+
+def test_handler_errors_do_not_stop_other_handlers():
+    seen = []
+
+    def broken(results):
+        raise RuntimeError("database down")
+
+    worker = InferenceWorker(FakeDetector(), handlers=[broken, seen.extend])
+    worker.process_batch([("A", jpeg_bytes(), None)])
+    assert len(seen) == 1
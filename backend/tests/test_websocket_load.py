@@ -0,0 +1,99 @@
+"""
+Load test for the WebSocket server's connection ceiling.
+
+Opens many idle watcher connections against a running websocket_server.py,
+holds them open, and checks that:
+- every connection up to WS_MAX_CONNECTIONS is accepted and stays alive
+- connections past the ceiling are refused instead of degrading the server
+- a single client_id cannot open more than WS_MAX_CONNECTIONS_PER_CLIENT sockets
+
+Run against a server started with matching limits, e.g.:
+    WS_MAX_CONNECTIONS=5000 python websocket_server.py
+    python tests/test_websocket_load.py --connections 5100 --max-connections 5000
+
+Raise the open file limit first (ulimit -n) on both sides for large runs.
+"""
+
+import argparse
+import asyncio
+import time
+import socketio
+
+SERVER_URL = "http://localhost:8001"
+
+
+async def open_connection(url, client_id, results, semaphore):
+    """Open one idle watcher socket and record whether it was accepted"""
+    client = socketio.AsyncClient(reconnection=False)
+    async with semaphore:
+        try:
+            await client.connect(f"{url}?client_id={client_id}", transports=["websocket"], wait_timeout=10)
+            results["accepted"].append(client)
+        except socketio.exceptions.ConnectionError as e:
+            results["refused"].append(str(e))
+            await client.disconnect()
+
+
+async def check_per_client_limit(url, per_client_limit):
+    """Open per_client_limit + 1 sockets with one client_id; the last must be refused"""
+    semaphore = asyncio.Semaphore(per_client_limit + 1)
+    results = {"accepted": [], "refused": []}
+    for _ in range(per_client_limit + 1):
+        await open_connection(url, "load_test_same_client", results, semaphore)
+    for client in results["accepted"]:
+        await client.disconnect()
+    return len(results["accepted"]), len(results["refused"])
+
+
+async def main(args):
+    print("\nStarting WebSocket connection ceiling test...")
+    print("=============================================")
+
+    if args.per_client_limit:
+        accepted, refused = await check_per_client_limit(args.url, args.per_client_limit)
+        print(f"Per-client limit: {accepted} accepted, {refused} refused (limit {args.per_client_limit})")
+        assert accepted == args.per_client_limit and refused == 1, "Per-client limit not enforced"
+
+    semaphore = asyncio.Semaphore(args.ramp_concurrency)
+    results = {"accepted": [], "refused": []}
+
+    start = time.time()
+    await asyncio.gather(*[
+        open_connection(args.url, f"load_test_{i}", results, semaphore)
+        for i in range(args.connections)
+    ])
+    ramp_time = time.time() - start
+    print(f"Opened {len(results['accepted'])} connections in {ramp_time:.1f}s "
+          f"({len(results['refused'])} refused)")
+
+    # Hold the connections idle through several heartbeat cycles
+    print(f"Holding connections for {args.hold}s...")
+    await asyncio.sleep(args.hold)
+    alive = sum(1 for client in results["accepted"] if client.connected)
+    print(f"Still connected after hold: {alive}/{len(results['accepted'])}")
+
+    await asyncio.gather(*[client.disconnect() for client in results["accepted"]])
+
+    print("\nTest Results:")
+    print("============")
+    expected = min(args.connections, args.max_connections) if args.max_connections else args.connections
+    print(f"Expected accepted: {expected}")
+    print(f"Accepted: {len(results['accepted'])}, alive after hold: {alive}")
+    assert len(results["accepted"]) == expected, "Connection ceiling not reached or not enforced"
+    assert alive == expected, "Idle connections were dropped during the hold"
+    print("PASS")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=SERVER_URL)
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--max-connections", type=int, default=0,
+                        help="Server WS_MAX_CONNECTIONS; 0 if the server is unlimited")
+    parser.add_argument("--per-client-limit", type=int, default=0,
+                        help="Server WS_MAX_CONNECTIONS_PER_CLIENT; 0 skips that check")
+    parser.add_argument("--ramp-concurrency", type=int, default=200,
+                        help="Connections being opened at the same time")
+    parser.add_argument("--hold", type=int, default=60,
+                        help="Seconds to keep connections idle (should exceed WS_PING_INTERVAL)")
+    asyncio.run(main(parser.parse_args()))
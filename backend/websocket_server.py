@@ -1,16 +1,61 @@
+import os
+
+# The async mode must be chosen (and monkey patching applied) before anything
+# else imports socket, ssl or threading. gevent holds tens of thousands of idle
+# watcher sockets per process; "threading" is only meant for local debugging.
+ASYNC_MODE = os.getenv("SOCKETIO_ASYNC_MODE", "gevent")
+if ASYNC_MODE == "gevent":
+    from gevent import monkey
+    monkey.patch_all()
+elif ASYNC_MODE == "eventlet":
+    import eventlet
+    eventlet.monkey_patch()
+
 from flask import Flask, request
-from flask_socketio import SocketIO
+from flask_socketio import SocketIO, ConnectionRefusedError
 from flask_cors import CORS
-from routes.watch_camera import get_watched_cameras
-from database.db import SessionLocal
-from database.models import Watcher, Camera
-from datetime import datetime, timezone
+from database.db import SessionLocal, engine
+from helpers.blocking_pool import BlockingWorkPool
+from helpers.connection_registry import ConnectionRegistry, ConnectionStateWriter, ConnectionLimitError
+from helpers.camera_updates import record_camera_update, deliver_camera_update, send_due_notifications
+from helpers.message_bus import CAMERA_UPDATE_CHANNEL, get_message_bus
+from helpers.notification_scheduler import NotificationScheduler
+from helpers.shutdown import CLOSE, FLUSH, SHUTDOWN_GRACE_SECONDS, handle_signals, on_shutdown, run_shutdown_callbacks
+
+# Connection limits (0 = unlimited) and heartbeat tuning
+MAX_CONNECTIONS = int(os.getenv("WS_MAX_CONNECTIONS", "20000"))
+MAX_CONNECTIONS_PER_CLIENT = int(os.getenv("WS_MAX_CONNECTIONS_PER_CLIENT", "3"))
+PING_INTERVAL = int(os.getenv("WS_PING_INTERVAL", "25"))  # seconds between server pings
+PING_TIMEOUT = int(os.getenv("WS_PING_TIMEOUT", "20"))  # seconds to wait for a pong
+NOTIFICATION_TICK_SECONDS = float(os.getenv("NOTIFICATION_TICK_SECONDS", "5"))
 
 app = Flask(__name__)
 CORS(app)
 
 # Initialize Socket.IO
-socketio = SocketIO(app, cors_allowed_origins="*")
+socketio = SocketIO(
+    app,
+    cors_allowed_origins="*",
+    async_mode=ASYNC_MODE,
+    ping_interval=PING_INTERVAL,
+    ping_timeout=PING_TIMEOUT,
+)
+
+# Blocking database work never runs on the event loop
+db_pool = BlockingWorkPool(ASYNC_MODE)
+
+# In-memory connectivity; is_connected in the database is only a lagging mirror
+registry = ConnectionRegistry(
+    max_connections=MAX_CONNECTIONS,
+    max_per_client=MAX_CONNECTIONS_PER_CLIENT,
+)
+connection_writer = ConnectionStateWriter(runner=db_pool.run)
+
+# Camera updates fan out through the bus so every node reaches its own sockets
+message_bus = get_message_bus()
+
+# Throttles and coalesces camera_update emits per watcher notification_interval
+scheduler = NotificationScheduler()
 
 def get_db():
     db = SessionLocal()
@@ -23,38 +68,38 @@ def emit_camera_update(camera_address, new_status):
     """
     Emit a camera status update to all connected clients watching this camera.
     
+    The update goes through the message bus, so watchers connected to any
+    WebSocket node receive it, not just the ones attached to this process.
+    Each node then delivers it no more often than the watcher's interval.
+    
     Args:
         camera_address: The address of the camera that changed status
         new_status: The new status of the camera
     """
-    db = next(get_db())
-    try:
-        # Get all connected watchers for this camera
-        watchers = db.query(Watcher).filter_by(
-            camera_address=camera_address,
-            is_connected=True
-        ).all()
-        
-        # Update camera status in database
-        camera = db.query(Camera).filter_by(address=camera_address).first()
-        if camera:
-            camera.last_status = new_status
-            camera.last_checked = datetime.now(timezone.utc)
-            db.commit()
-        
-        # Emit update to each connected watcher
-        for watcher in watchers:
-            socketio.emit('camera_update', {
-                'address': camera_address,
-                'status': new_status,
-                'timestamp': datetime.now(timezone.utc).isoformat()
-            }, room=watcher.client_id)
-            
-    except Exception as e:
-        print(f"Error emitting camera update: {e}")
-        db.rollback()
-    finally:
-        db.close()
+    message = db_pool.run(record_camera_update, camera_address, new_status)
+    if message is not None:
+        message_bus.publish(CAMERA_UPDATE_CHANNEL, message)
+    return message
+
+def _emit_to_room(event, payload, room):
+    socketio.emit(event, payload, room=room)
+
+def handle_bus_camera_update(message):
+    """Queue a camera update from the bus for this node's watchers"""
+    deliver_camera_update(message, registry, scheduler)
+
+message_bus.subscribe(CAMERA_UPDATE_CHANNEL, handle_bus_camera_update)
+
+notifications_running = True
+
+def notification_loop():
+    """Send due notifications every NOTIFICATION_TICK_SECONDS until shutdown"""
+    while notifications_running:
+        socketio.sleep(NOTIFICATION_TICK_SECONDS)
+        try:
+            send_due_notifications(scheduler, registry, _emit_to_room)
+        except Exception as e:
+            print(f"Error sending camera notifications: {e}")
 
 @socketio.on('connect')
 def handle_connect():
@@ -67,52 +112,76 @@ def handle_connect():
         print("Client connection rejected - no client_id provided")
         return False  # Reject the connection
     
-    # Update database to mark this client's watchers as connected
-    db = next(get_db())
     try:
-        watchers = db.query(Watcher).filter_by(client_id=client_id).all()
-        for watcher in watchers:
-            watcher.is_connected = True
-        db.commit()
+        first = registry.connect(request.sid, client_id)
+    except ConnectionLimitError as e:
+        print(f"Client connection rejected for {client_id}: {e}")
+        raise ConnectionRefusedError(str(e))
+    
+    # Join a room named after their client_id for targeted events
+    socketio.server.enter_room(request.sid, client_id)
+    if first:
+        connection_writer.mark(client_id, True)
+        scheduler.wake_client(client_id)
         print(f"Marked watchers for client {client_id} as connected")
-        
-        # Join a room named after their client_id for targeted events
-        socketio.server.enter_room(request.sid, client_id)
-        
-    except Exception as e:
-        print(f"Error updating watcher connection status: {e}")
-        db.rollback()
-    finally:
-        db.close()
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle client disconnection"""
     print(f"Client disconnected with SID: {request.sid}")
     
-    # Get client_id from session
-    client_id = request.args.get('client_id')
+    # The query string is not reliable at disconnect time, so look the sid up
+    client_id, last = registry.disconnect(request.sid)
     if not client_id:
         return
     
-    # Update database to mark this client's watchers as disconnected
-    db = next(get_db())
-    try:
-        watchers = db.query(Watcher).filter_by(client_id=client_id).all()
-        for watcher in watchers:
-            watcher.is_connected = False
-        db.commit()
+    socketio.server.leave_room(request.sid, client_id)
+    if last:
+        connection_writer.mark(client_id, False)
         print(f"Marked watchers for client {client_id} as disconnected")
-        
-        # Leave the client_id room
-        socketio.server.leave_room(request.sid, client_id)
-        
-    except Exception as e:
-        print(f"Error updating watcher disconnection status: {e}")
-        db.rollback()
-    finally:
-        db.close()
+
+@socketio.on('camera_update_ack')
+def handle_camera_update_ack(data):
+    """Client confirms the updates it applied: {'updates': [{'address', 'seq'}, ...]}"""
+    client_id = registry.client_for(request.sid)
+    if not client_id or not isinstance(data, dict):
+        return
+    for update in data.get('updates', []):
+        try:
+            scheduler.ack(client_id, update['address'], int(update['seq']))
+        except (KeyError, TypeError, ValueError):
+            continue
+
+def stop_notifications():
+    global notifications_running
+    notifications_running = False
 
 if __name__ == "__main__":
-    print("Starting WebSocket server on http://0.0.0.0:8001")
-    socketio.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    connection_writer.start()
+    socketio.start_background_task(notification_loop)
+    # On SIGTERM stop sending, write out pending connection states, then close
+    # the bus and database pools. Clients reconnect to another node.
+    on_shutdown(stop_notifications, name="notification loop")
+    on_shutdown(connection_writer.stop, FLUSH, name="connection state writer")
+    on_shutdown(db_pool.shutdown, CLOSE, name="database workers")
+    on_shutdown(engine.dispose, CLOSE, name="database pool")
+
+    def stop_server():
+        if socketio.async_mode == "gevent":
+            # Stop accepting and give short requests a moment; sockets are
+            # long-lived, so the rest are dropped and their clients reconnect
+            socketio.wsgi_server.stop(timeout=SHUTDOWN_GRACE_SECONDS)
+        else:
+            # Ends socketio.run() below
+            raise KeyboardInterrupt
+
+    handle_signals(stop_server)
+    print(f"Starting WebSocket server on http://0.0.0.0:8001 (async_mode={socketio.async_mode}, "
+          f"max_connections={MAX_CONNECTIONS or 'unlimited'})")
+    try:
+        socketio.run(app, host="0.0.0.0", port=8001)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        run_shutdown_callbacks()
+        print("WebSocket server stopped")
\ No newline at end of file